@@ -5,89 +5,119 @@
 __author__ = """Henrik Blidh"""
 __email__ = "henrik.blidh@gmail.com"
 
-import re
 import os
 import sys
 import logging
 import platform
-import subprocess
-import asyncio
 
 from bleak.__version__ import __version__  # noqa
 from bleak.exc import BleakError
 
-_on_rtd = os.environ.get("READTHEDOCS") == "True"
-
 _logger = logging.getLogger(__name__)
 _logger.addHandler(logging.NullHandler())
-_logger.setLevel(logging.DEBUG)
 if bool(os.environ.get("BLEAK_LOGGING", False)):
+    from bleak.backends import trace
+
     FORMAT = "%(asctime)-15s %(name)-8s %(levelname)s: %(message)s"
     handler = logging.StreamHandler(sys.stdout)
     handler.setLevel(logging.DEBUG)
     handler.setFormatter(logging.Formatter(fmt=FORMAT))
     _logger.addHandler(handler)
+    _logger.setLevel(logging.DEBUG)
+    # Log the trace events of the hot paths too.
+    trace.subscribe(trace.LoggingSink())
+
+# Names provided by the backend of the platform.
+_BACKEND_NAMES = ("discover", "BleakScanner", "BleakClient")
+_backend = None
+
+
+def _load_backend() -> dict:
+    """Import the backend of the platform, the first time it is needed.
+
+    Importing a backend pulls in its platform libraries, e.g. pythonnet on
+    Windows, so it is put off until one of its names is used.
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
 
-if platform.system() == "Linux":
-    if not _on_rtd:
-        # TODO: Check if BlueZ version 5.43 is sufficient.
-        p = subprocess.Popen(["bluetoothctl", "--version"], stdout=subprocess.PIPE)
-        out, _ = p.communicate()
-        s = re.search(b"(\\d+).(\\d+)", out.strip(b"'"))
-        if not s:
-            raise BleakError("Could not determine BlueZ version: {0}".format(out))
-
-        major, minor = s.groups()
-        if not (int(major) == 5 and int(minor) >= 43):
+    if platform.system() == "Linux":
+        from bleak.backends.bluezdbus.discovery import discover
+        from bleak.backends.bluezdbus.scanner import (
+            BleakScannerBlueZDBus as BleakScanner,
+        )
+        from bleak.backends.bluezdbus.client import (
+            BleakClientBlueZDBus as BleakClient,
+        )
+    elif platform.system() == "Darwin":
+        from Foundation import NSClassFromString
+
+        if NSClassFromString("CBPeripheral") is None:
+            raise BleakError("Bleak requires the CoreBluetooth Framework")
+
+        from bleak.backends.corebluetooth.discovery import discover
+        from bleak.backends.corebluetooth.scanner import (
+            BleakScannerCoreBluetooth as BleakScanner,
+        )
+        from bleak.backends.corebluetooth.client import (
+            BleakClientCoreBluetooth as BleakClient,
+        )
+    elif platform.system() == "Windows":
+        # Requires Windows 10 Creators update at least, i.e. Window 10.0.16299
+        _vtup = platform.win32_ver()[1].split(".")
+        if int(_vtup[0]) != 10:
             raise BleakError(
-                "Bleak requires BlueZ >= 5.43. Found version {0} installed.".format(out)
+                "Only Windows 10 is supported. Detected was {0}".format(
+                    platform.win32_ver()
+                )
             )
 
-    from bleak.backends.bluezdbus.discovery import discover  # noqa
-    from bleak.backends.bluezdbus.scanner import (
-        BleakScannerBlueZDBus as BleakScanner,
-    )  # noqa
-    from bleak.backends.bluezdbus.client import (
-        BleakClientBlueZDBus as BleakClient,
-    )  # noqa
-elif platform.system() == "Darwin":
-    from Foundation import NSClassFromString
-
-    if NSClassFromString("CBPeripheral") is None:
-        raise BleakError("Bleak requires the CoreBluetooth Framework")
-
-    from bleak.backends.corebluetooth.discovery import discover  # noqa
-    from bleak.backends.corebluetooth.scanner import (
-        BleakScannerCoreBluetooth as BleakScanner,
-    )  # noqa
-    from bleak.backends.corebluetooth.client import (
-        BleakClientCoreBluetooth as BleakClient,
-    )  # noqa
-
-elif platform.system() == "Windows":
-    # Requires Windows 10 Creators update at least, i.e. Window 10.0.16299
-    _vtup = platform.win32_ver()[1].split(".")
-    if int(_vtup[0]) != 10:
-        raise BleakError(
-            "Only Windows 10 is supported. Detected was {0}".format(
-                platform.win32_ver()
+        if (int(_vtup[1]) == 0) and (int(_vtup[2]) < 16299):
+            raise BleakError(
+                "Requires at least Windows 10 version 0.16299 (Fall Creators Update)."
             )
-        )
 
-    if (int(_vtup[1]) == 0) and (int(_vtup[2]) < 16299):
-        raise BleakError(
-            "Requires at least Windows 10 version 0.16299 (Fall Creators Update)."
-        )
+        from bleak.backends.dotnet.discovery import discover
+        from bleak.backends.dotnet.scanner import BleakScannerDotNet as BleakScanner
+        from bleak.backends.dotnet.client import BleakClientDotNet as BleakClient
+    else:
+        _backend = {}
+        return _backend
+
+    _backend = {
+        "discover": discover,
+        "BleakScanner": BleakScanner,
+        "BleakClient": BleakClient,
+    }
+    globals().update(_backend)
+    return _backend
+
+
+if sys.version_info >= (3, 7):
+
+    def __getattr__(name):
+        if name in _BACKEND_NAMES:
+            backend = _load_backend()
+            if name in backend:
+                return backend[name]
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(_BACKEND_NAMES))
+
 
-    from bleak.backends.dotnet.discovery import discover  # noqa
-    from bleak.backends.dotnet.scanner import BleakScannerDotNet as BleakScanner  # noqa
-    from bleak.backends.dotnet.client import BleakClientDotNet as BleakClient  # noqa
+else:
+    # Module level __getattr__ needs Python 3.7, load the backend right away.
+    _load_backend()
 
 
 def cli():
     import argparse
+    import asyncio
     from asyncio.tasks import ensure_future
 
+    discover = _load_backend()["discover"]
     loop = asyncio.get_event_loop()
 
     parser = argparse.ArgumentParser(
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Decoders for common beacon formats: iBeacon, AltBeacon and Eddystone.
+
+Beacons repeat the same few frames over and over, so every decoder is
+memoised on the raw payload bytes: decoding a frame that has been seen
+before is a dictionary lookup. Decoded beacons are immutable named tuples and
+may be shared between callers.
+
+.. code-block:: python
+
+    for beacon in decode_beacons(device.manufacturer_data, device.service_data):
+        if isinstance(beacon, IBeacon):
+            print(beacon.uuid, beacon.major, beacon.minor)
+
+"""
+import uuid
+from collections import namedtuple
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from bleak.uuids import normalize_uuid_str
+
+APPLE_COMPANY_ID = 0x004C
+EDDYSTONE_UUID = normalize_uuid_str("feaa")
+
+_CACHE_SIZE = 4096
+
+IBeacon = namedtuple("IBeacon", ["uuid", "major", "minor", "tx_power"])
+IBeacon.__doc__ = """An Apple iBeacon frame. ``tx_power`` is the measured power at 1 m, in dBm."""
+
+AltBeacon = namedtuple(
+    "AltBeacon", ["company_id", "uuid", "major", "minor", "reference_rssi", "reserved"]
+)
+AltBeacon.__doc__ = """An AltBeacon frame, with its 20 byte beacon id split into
+``uuid``, ``major`` and ``minor``. ``reference_rssi`` is the RSSI at 1 m, in dBm."""
+
+EddystoneUID = namedtuple("EddystoneUID", ["tx_power", "namespace", "instance"])
+EddystoneUID.__doc__ = """An Eddystone-UID frame. ``namespace`` and ``instance`` are
+``bytes``, ``tx_power`` is the power at 0 m, in dBm."""
+
+EddystoneURL = namedtuple("EddystoneURL", ["tx_power", "url"])
+EddystoneURL.__doc__ = """An Eddystone-URL frame, with the URL expanded."""
+
+EddystoneTLM = namedtuple(
+    "EddystoneTLM",
+    ["version", "battery_voltage", "temperature", "advertising_count", "uptime"],
+)
+EddystoneTLM.__doc__ = """An unencrypted Eddystone-TLM frame. ``battery_voltage`` is in mV,
+``temperature`` in degrees Celsius (``None`` if not supported) and ``uptime`` in seconds."""
+
+EddystoneEID = namedtuple("EddystoneEID", ["tx_power", "eid"])
+EddystoneEID.__doc__ = """An Eddystone-EID frame. ``eid`` is the 8 byte ephemeral identifier."""
+
+_URL_SCHEMES = ("http://www.", "https://www.", "http://", "https://")
+_URL_CODES = (
+    ".com/",
+    ".org/",
+    ".edu/",
+    ".net/",
+    ".info/",
+    ".biz/",
+    ".gov/",
+    ".com",
+    ".org",
+    ".edu",
+    ".net",
+    ".info",
+    ".biz",
+    ".gov",
+)
+
+
+def _int8(value: int) -> int:
+    return value - 256 if value > 127 else value
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def decode_ibeacon(data: bytes) -> Optional[IBeacon]:
+    """Decode the Apple manufacturer data of an iBeacon.
+
+    Args:
+        data (bytes): The manufacturer data of company ``0x004C``.
+
+    Returns:
+        An :py:class:`IBeacon`, or ``None`` if the data is not an iBeacon frame.
+
+    """
+    if len(data) != 23 or data[0] != 0x02 or data[1] != 0x15:
+        return None
+    return IBeacon(
+        str(uuid.UUID(bytes=bytes(data[2:18]))),
+        int.from_bytes(data[18:20], "big"),
+        int.from_bytes(data[20:22], "big"),
+        _int8(data[22]),
+    )
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def decode_altbeacon(company_id: int, data: bytes) -> Optional[AltBeacon]:
+    """Decode the manufacturer data of an AltBeacon.
+
+    Args:
+        company_id (int): The company identifier of the manufacturer data.
+        data (bytes): The manufacturer data.
+
+    Returns:
+        An :py:class:`AltBeacon`, or ``None`` if the data is not an
+        AltBeacon frame.
+
+    """
+    if len(data) != 24 or data[0] != 0xBE or data[1] != 0xAC:
+        return None
+    return AltBeacon(
+        company_id,
+        str(uuid.UUID(bytes=bytes(data[2:18]))),
+        int.from_bytes(data[18:20], "big"),
+        int.from_bytes(data[20:22], "big"),
+        _int8(data[22]),
+        data[23],
+    )
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def decode_eddystone(data: bytes):
+    """Decode the service data of an Eddystone frame.
+
+    Args:
+        data (bytes): The service data of service ``0xFEAA``.
+
+    Returns:
+        An :py:class:`EddystoneUID`, :py:class:`EddystoneURL`,
+        :py:class:`EddystoneTLM` or :py:class:`EddystoneEID`, or ``None`` if
+        the frame is unknown or malformed.
+
+    """
+    if not data:
+        return None
+    frame = data[0]
+    if frame == 0x00 and len(data) >= 18:
+        return EddystoneUID(_int8(data[1]), bytes(data[2:12]), bytes(data[12:18]))
+    if frame == 0x10 and len(data) >= 3 and data[2] < len(_URL_SCHEMES):
+        url = [_URL_SCHEMES[data[2]]]
+        for c in data[3:]:
+            url.append(_URL_CODES[c] if c < len(_URL_CODES) else chr(c))
+        return EddystoneURL(_int8(data[1]), "".join(url))
+    if frame == 0x20 and len(data) >= 14 and data[1] == 0x00:
+        temperature = None
+        if data[4:6] != b"\x80\x00":
+            temperature = int.from_bytes(data[4:6], "big", signed=True) / 256.0
+        return EddystoneTLM(
+            data[1],
+            int.from_bytes(data[2:4], "big"),
+            temperature,
+            int.from_bytes(data[6:10], "big"),
+            int.from_bytes(data[10:14], "big") / 10.0,
+        )
+    if frame == 0x30 and len(data) >= 10:
+        return EddystoneEID(_int8(data[1]), bytes(data[2:10]))
+    return None
+
+
+def decode_beacons(
+    manufacturer_data: Optional[Dict[int, bytes]] = None,
+    service_data: Optional[Dict[str, bytes]] = None,
+) -> List[tuple]:
+    """Decode all beacon frames in the data of an advertisement or device.
+
+    Args:
+        manufacturer_data (dict): Company identifier to ``bytes``, e.g.
+            :py:attr:`bleak.backends.device.BLEDevice.manufacturer_data`.
+        service_data (dict): Service UUID to ``bytes``, e.g.
+            :py:attr:`bleak.backends.device.BLEDevice.service_data`.
+
+    Returns:
+        List of decoded beacons, in the order manufacturer data, service data.
+
+    """
+    beacons = []
+    for company_id, data in (manufacturer_data or {}).items():
+        data = bytes(data)
+        beacon = None
+        if company_id == APPLE_COMPANY_ID:
+            beacon = decode_ibeacon(data)
+        if beacon is None:
+            beacon = decode_altbeacon(company_id, data)
+        if beacon is not None:
+            beacons.append(beacon)
+    if service_data:
+        data = service_data.get(EDDYSTONE_UUID)
+        if data is not None:
+            beacon = decode_eddystone(bytes(data))
+            if beacon is not None:
+                beacons.append(beacon)
+    return beacons
+
+
+def clear_cache() -> None:
+    """Empty the caches of decoded frames."""
+    decode_ibeacon.cache_clear()
+    decode_altbeacon.cache_clear()
+    decode_eddystone.cache_clear()
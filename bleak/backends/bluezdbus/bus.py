@@ -0,0 +1,1017 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus connections for the BlueZ backend.
+
+The backend talks to the bus through :py:class:`BaseMessageBus`, which has
+two implementations:
+
+* :py:class:`AsyncioMessageBus`, the default, speaks the D-Bus protocol
+  directly on a non-blocking socket watched by the event loop, with the
+  marshalling of :py:mod:`bleak.backends.bluezdbus.marshal`.
+* :py:class:`TxDBusMessageBus` runs txdbus on a Twisted reactor bridged to
+  the event loop, as earlier versions of bleak did.
+
+Set the ``BLEAK_DBUS_TRANSPORT`` environment variable to ``"txdbus"`` to use
+the latter.
+
+"""
+import abc
+import array
+import asyncio
+import itertools
+import logging
+import os
+import socket
+import time
+from asyncio.events import AbstractEventLoop
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List
+from urllib.parse import unquote
+
+from bleak.exc import BleakDBusError, BleakError
+from bleak.backends import metrics
+from bleak.backends import flightrecorder
+from bleak.backends.stats import _span
+from bleak.backends.trace import TRACER
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.marshal import (
+    ERROR,
+    METHOD_CALL,
+    METHOD_RETURN,
+    NO_REPLY_EXPECTED,
+    SIGNAL,
+    Message,
+    Variant,
+    decode_message,
+    encode_message,
+    message_length,
+    split_signature,
+)
+
+logger = logging.getLogger(__name__)
+
+DBUS_SERVICE = "org.freedesktop.DBus"
+DBUS_PATH = "/org/freedesktop/DBus"
+PEER_INTERFACE = "org.freedesktop.DBus.Peer"
+
+_DEFAULT_SYSTEM_BUS = "unix:path=/var/run/dbus/system_bus_socket"
+_MAX_FDS = 16
+_RECV_SIZE = 65536
+
+
+def _reply_value(signature: str, body: list) -> Any:
+    # Same conventions as txdbus: nothing, the single value, or a list.
+    if not body:
+        return None
+    if len(body) == 1 and not signature.startswith("("):
+        return body[0]
+    return body
+
+
+def _method_call(
+    path, member, interface, destination=defs.BLUEZ_SERVICE, signature="", body=()
+) -> Message:
+    return Message(
+        METHOD_CALL, path, interface, member, signature, body, destination=destination
+    )
+
+
+def _unpack_reply(reply: Message, return_signature: str = None) -> Any:
+    if reply.type == ERROR:
+        text = reply.body[0] if reply.body and isinstance(reply.body[0], str) else ""
+        raise BleakDBusError(reply.error_name, text)
+    if return_signature is not None and reply.signature != return_signature:
+        raise BleakDBusError(
+            "org.freedesktop.DBus.Error.InvalidSignature",
+            'Expected "{0}". Received "{1}"'.format(return_signature, reply.signature),
+        )
+    body = reply.body
+    if reply.unix_fds:
+        # Replace file descriptor indices by the descriptors.
+        body = [
+            reply.unix_fds[v] if t == "h" else v
+            for t, v in zip(split_signature(reply.signature), body)
+        ]
+    return _reply_value(reply.signature, body)
+
+
+def match_rule(**rule) -> str:
+    """Format a signal match rule, e.g. ``match_rule(member="InterfacesAdded")``."""
+    return ",".join(
+        "{0}='{1}'".format(k, v)
+        for k, v in [("type", "signal")] + sorted(rule.items())
+        if v is not None
+    )
+
+
+def _namespace_match(namespace: str, path: str) -> bool:
+    return (
+        namespace == "/"
+        or path == namespace
+        or path.startswith(namespace + "/")
+    )
+
+
+def _rule_matches(rule: dict, message, owners: dict = None) -> bool:
+    # Signals carry the unique name of their sender, so a well known sender
+    # name is looked up in owners. Without owners, the sender is not checked.
+    for key, value in rule.items():
+        if value is None:
+            continue
+        if key == "sender":
+            if owners is not None and message.sender != (
+                value if value.startswith(":") else owners.get(value)
+            ):
+                return False
+        elif key == "interface":
+            if message.interface != value:
+                return False
+        elif key == "member":
+            if message.member != value:
+                return False
+        elif key == "path":
+            if message.path != value:
+                return False
+        elif key == "path_namespace":
+            if not _namespace_match(value, message.path or ""):
+                return False
+        elif key in ("arg0", "arg0path", "arg0namespace"):
+            arg0 = message.body[0] if message.body else None
+            if not isinstance(arg0, str):
+                return False
+            if key == "arg0" and arg0 != value:
+                return False
+            if key == "arg0path" and not (
+                arg0 == value
+                or (value.endswith("/") and arg0.startswith(value))
+                or (arg0.endswith("/") and value.startswith(arg0))
+            ):
+                return False
+            if key == "arg0namespace" and not (
+                arg0 == value or arg0.startswith(value + ".")
+            ):
+                return False
+    return True
+
+
+class ServiceObject(object):
+    """An object exported on a message bus, implementing one interface.
+
+    Subclasses set :py:attr:`interface` and :py:attr:`methods` and return
+    their properties from :py:meth:`get_properties`. Objects without an
+    interface only answer ``GetManagedObjects``, with the objects exported
+    below them.
+
+    Args:
+        path (str): The object path to export the object at.
+
+    """
+
+    #: The name of the implemented interface
+    interface = None
+    #: Member name -> (argument signature, return signature, method name)
+    methods = {}  # type: Dict[str, tuple]
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def get_properties(self) -> Dict[str, Variant]:
+        """Get the properties of the interface, by name."""
+        return {}
+
+
+class BaseMessageBus(abc.ABC):
+    """A connection to a D-Bus message bus.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+
+    """
+
+    def __init__(self, loop: AbstractEventLoop = None):
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.unique_name = None
+        #: Where to record the round trip times of method calls, if anywhere
+        self.stats = None
+        #: Device key of the recorded round trip times and trace spans
+        self.stats_device = None
+        #: Where to record method calls as they are issued and completed
+        self.flight = None
+
+    def _recording(self) -> bool:
+        return self.stats is not None or self.flight is not None or TRACER.enabled
+
+    def _record(self, member: str, start: float, error: bool) -> None:
+        end = time.perf_counter()
+        if self.flight is not None:
+            self.flight.record(
+                flightrecorder.ERROR if error else flightrecorder.REPLY,
+                member,
+                value=int((end - start) * 1e6),
+            )
+        if self.stats is not None:
+            self.stats.record("dbus." + member, self.stats_device, end - start, error)
+        if TRACER.enabled:
+            TRACER.emit(
+                "span",
+                self.stats_device,
+                partial(_span, "dbus", member, id(self), start, end, error),
+            )
+
+    @abc.abstractmethod
+    async def connect(self, address: str = None) -> "BaseMessageBus":
+        """Connect and authenticate to a bus.
+
+        Args:
+            address (str): D-Bus address of the bus. Defaults to the system bus.
+
+        Returns:
+            The bus itself.
+
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def disconnect(self) -> None:
+        """Close the connection."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    async def call(
+        self,
+        path: str,
+        member: str,
+        interface: str,
+        destination: str = defs.BLUEZ_SERVICE,
+        signature: str = "",
+        body=(),
+        return_signature: str = None,
+    ) -> Any:
+        """Call a method and wait for its reply.
+
+        Args:
+            path (str): Object path of the remote object.
+            member (str): Method name.
+            interface (str): Interface of the method.
+            destination (str): Bus name of the service. Defaults to BlueZ.
+            signature (str): Signature of the arguments.
+            body (list): The arguments.
+            return_signature (str): Signature the reply must have, if any.
+
+        Returns:
+            ``None`` for replies without values, the value for replies with
+            one value, and a list of the values otherwise.
+
+        Raises:
+            BleakDBusError: If the call returned an error.
+
+        """
+        raise NotImplementedError()
+
+    async def call_many(self, calls, return_exceptions: bool = False) -> list:
+        """Make several independent method calls concurrently.
+
+        All calls are sent before waiting for any reply, so the batch takes
+        about one round trip instead of one per call.
+
+        Args:
+            calls (iterable of dict): Keyword arguments of :py:meth:`call`,
+                one dict per call.
+            return_exceptions (bool): Return the exceptions of failed calls
+                in place of their results, instead of raising the first one.
+
+        Returns:
+            List of the results, in the order of ``calls``.
+
+        """
+        return await asyncio.gather(
+            *[self.call(**c) for c in calls], return_exceptions=return_exceptions
+        )
+
+    @abc.abstractmethod
+    async def add_match(self, callback: Callable, **rule) -> int:
+        """Subscribe to the signals matching a rule.
+
+        Args:
+            callback: Function called with each matching signal message,
+                which has ``path``, ``interface``, ``member`` and ``body``
+                attributes.
+
+        Keyword Args:
+            interface, member, path, path_namespace, sender, arg0, arg0path,
+            arg0namespace (str): Match rule keys, see the D-Bus specification.
+
+        Returns:
+            An identifier for :py:meth:`remove_match`.
+
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    async def remove_match(self, rule_id: int) -> None:
+        """Remove a subscription made by :py:meth:`add_match`."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def export(self, obj: ServiceObject) -> None:
+        """Export an object, answering the method calls made on it."""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def unexport(self, path: str) -> None:
+        """Remove an object exported by :py:meth:`export`."""
+        raise NotImplementedError()
+
+
+class AsyncioMessageBus(BaseMessageBus):
+    """A D-Bus connection implemented directly on the asyncio event loop.
+
+    Authenticates with SASL ``EXTERNAL``, negotiates file descriptor passing
+    and routes method returns, errors, signals and incoming method calls
+    without any intermediate framework.
+    """
+
+    def __init__(self, loop: AbstractEventLoop = None):
+        super(AsyncioMessageBus, self).__init__(loop)
+        self._sock = None
+        self._unix_fds = False
+        self._serials = itertools.count(1)
+        self._calls = {}  # type: Dict[int, asyncio.Future]
+        self._match_ids = itertools.count(1)
+        # rule id -> (callback, rule, rule string)
+        self._matches = {}  # type: Dict[int, tuple]
+        self._exports = {}  # type: Dict[str, ServiceObject]
+        # Well known name -> unique name of its owner, or None while it has
+        # none, for the senders of match rules. The bus daemon sends under
+        # its well known name.
+        self._owners = {DBUS_SERVICE: DBUS_SERVICE}
+        self._rbuf = bytearray()
+        self._wbuf = bytearray()
+        self._fds = []  # type: List[int]
+
+    @property
+    def connected(self) -> bool:
+        """If the connection is open"""
+        return self._sock is not None
+
+    async def connect(self, address: str = None) -> "AsyncioMessageBus":
+        if address is None or address == "system":
+            address = os.environ.get("DBUS_SYSTEM_BUS_ADDRESS", _DEFAULT_SYSTEM_BUS)
+        elif address == "session":
+            address = os.environ.get("DBUS_SESSION_BUS_ADDRESS", "")
+        sock = await self._open(address)
+        try:
+            await self._authenticate(sock)
+        except Exception:
+            sock.close()
+            raise
+        self._sock = sock
+        self.loop.add_reader(sock.fileno(), self._on_readable)
+        self.unique_name = await self.call(
+            DBUS_PATH, "Hello", DBUS_SERVICE, destination=DBUS_SERVICE
+        )
+        return self
+
+    def disconnect(self) -> None:
+        if self._sock is None:
+            return
+        self.loop.remove_reader(self._sock.fileno())
+        if self._wbuf:
+            self.loop.remove_writer(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        self._wbuf.clear()
+        self._rbuf.clear()
+        for fd in self._fds:
+            os.close(fd)
+        self._fds.clear()
+        calls, self._calls = self._calls, {}
+        for future in calls.values():
+            if not future.done():
+                future.set_exception(BleakError("D-Bus connection closed"))
+
+    async def call(
+        self,
+        path: str,
+        member: str,
+        interface: str,
+        destination: str = defs.BLUEZ_SERVICE,
+        signature: str = "",
+        body=(),
+        return_signature: str = None,
+    ) -> Any:
+        message = _method_call(path, member, interface, destination, signature, body)
+        if not self._recording():
+            return _unpack_reply(await self._call(message), return_signature)
+        if self.flight is not None:
+            self.flight.record(flightrecorder.CALL, member, path)
+        start = time.perf_counter()
+        error = True
+        try:
+            reply = await self._call(message)
+            error = reply.type == ERROR
+        finally:
+            self._record(member, start, error)
+        return _unpack_reply(reply, return_signature)
+
+    async def call_many(self, calls, return_exceptions: bool = False) -> list:
+        calls = list(calls)
+        messages = []
+        for c in calls:
+            c = dict(c)
+            c.pop("return_signature", None)
+            messages.append(_method_call(**c))
+        # Encoded into one buffer, so that the batch goes out in one write.
+        start = time.perf_counter()
+        futures = self._send_messages(messages)
+        if self.flight is not None:
+            for message in messages:
+                self.flight.record(flightrecorder.CALL, message.member, message.path)
+        metrics.DBUS_CALLS_IN_FLIGHT.inc((), len(messages))
+        try:
+            replies = await asyncio.gather(*futures, return_exceptions=True)
+        finally:
+            metrics.DBUS_CALLS_IN_FLIGHT.dec((), len(messages))
+            for message in messages:
+                self._calls.pop(message.serial, None)
+            if self._recording():
+                self._record("batch", start, False)
+        results = []
+        for c, reply in zip(calls, replies):
+            try:
+                if isinstance(reply, BaseException):
+                    raise reply
+                results.append(_unpack_reply(reply, c.get("return_signature")))
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    async def add_match(self, callback: Callable, **rule) -> int:
+        sender = rule.get("sender")
+        if sender is not None:
+            await self._track_owner(sender)
+        rule_string = match_rule(**rule)
+        await self.call(
+            DBUS_PATH,
+            "AddMatch",
+            DBUS_SERVICE,
+            destination=DBUS_SERVICE,
+            signature="s",
+            body=[rule_string],
+        )
+        rule_id = next(self._match_ids)
+        self._matches[rule_id] = (callback, rule, rule_string)
+        return rule_id
+
+    async def remove_match(self, rule_id: int) -> None:
+        _, _, rule_string = self._matches.pop(rule_id)
+        await self.call(
+            DBUS_PATH,
+            "RemoveMatch",
+            DBUS_SERVICE,
+            destination=DBUS_SERVICE,
+            signature="s",
+            body=[rule_string],
+        )
+
+    async def _track_owner(self, name: str) -> None:
+        if name.startswith(":") or name in self._owners:
+            return
+        self._owners[name] = None
+        # Followed from before asking, so that no change is missed.
+        try:
+            await self.add_match(
+                self._name_owner_changed,
+                sender=DBUS_SERVICE,
+                path=DBUS_PATH,
+                interface=DBUS_SERVICE,
+                member="NameOwnerChanged",
+                arg0=name,
+            )
+        except BaseException:
+            del self._owners[name]
+            raise
+        try:
+            owner = await self.call(
+                DBUS_PATH,
+                "GetNameOwner",
+                DBUS_SERVICE,
+                destination=DBUS_SERVICE,
+                signature="s",
+                body=[name],
+                return_signature="s",
+            )
+        except BleakDBusError:
+            # Nobody owns the name yet.
+            return
+        if self._owners.get(name) is None:
+            self._owners[name] = owner
+
+    def _name_owner_changed(self, message):
+        name, _, new_owner = message.body
+        self._owners[name] = new_owner or None
+
+    def export(self, obj: ServiceObject) -> None:
+        self._exports[obj.path] = obj
+        if obj.interface is not None:
+            self._send_message(
+                Message(
+                    SIGNAL,
+                    obj.path,
+                    defs.OBJECT_MANAGER_INTERFACE,
+                    "InterfacesAdded",
+                    "oa{sa{sv}}",
+                    [obj.path, {obj.interface: obj.get_properties()}],
+                )
+            )
+
+    def unexport(self, path: str) -> None:
+        obj = self._exports.pop(path, None)
+        if obj is not None and obj.interface is not None and self._sock is not None:
+            self._send_message(
+                Message(
+                    SIGNAL,
+                    path,
+                    defs.OBJECT_MANAGER_INTERFACE,
+                    "InterfacesRemoved",
+                    "oas",
+                    [path, [obj.interface]],
+                )
+            )
+
+    # Connection setup
+
+    async def _open(self, address: str) -> socket.socket:
+        errors = []
+        for entry in address.split(";"):
+            transport, _, params = entry.partition(":")
+            params = dict(
+                (k, unquote(v))
+                for k, _, v in (p.partition("=") for p in params.split(",") if p)
+            )
+            if transport != "unix":
+                errors.append("unsupported transport {0!r}".format(transport))
+                continue
+            if "path" in params:
+                target = params["path"]
+            elif "abstract" in params:
+                target = "\0" + params["abstract"]
+            else:
+                errors.append("no path in {0!r}".format(entry))
+                continue
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            try:
+                await self.loop.sock_connect(sock, target)
+            except OSError as e:
+                sock.close()
+                errors.append(str(e))
+                continue
+            return sock
+        raise BleakError(
+            "Could not connect to D-Bus at {0}: {1}".format(address, "; ".join(errors))
+        )
+
+    async def _authenticate(self, sock: socket.socket) -> None:
+        uid = str(os.getuid()).encode("ascii").hex().encode("ascii")
+        await self.loop.sock_sendall(sock, b"\0AUTH EXTERNAL " + uid + b"\r\n")
+        line = await self._read_line(sock)
+        if not line.startswith(b"OK"):
+            raise BleakError("D-Bus authentication failed: {0}".format(line))
+        await self.loop.sock_sendall(sock, b"NEGOTIATE_UNIX_FD\r\n")
+        self._unix_fds = (await self._read_line(sock)).startswith(b"AGREE_UNIX_FD")
+        await self.loop.sock_sendall(sock, b"BEGIN\r\n")
+
+    async def _read_line(self, sock: socket.socket) -> bytes:
+        # The server sends nothing but one line per command during the
+        # handshake, so reading ahead cannot swallow any message data.
+        line = b""
+        while not line.endswith(b"\r\n"):
+            data = await self.loop.sock_recv(sock, 512)
+            if not data:
+                raise BleakError("D-Bus connection closed during authentication")
+            line += data
+        return line.strip()
+
+    # Sending
+
+    def _send_message(self, message: Message) -> int:
+        if self._sock is None:
+            raise BleakError("Not connected to D-Bus")
+        message.serial = next(self._serials)
+        self._write(encode_message(message))
+        return message.serial
+
+    def _send_messages(self, messages: List[Message]) -> List[asyncio.Future]:
+        if self._sock is None:
+            raise BleakError("Not connected to D-Bus")
+        data = bytearray()
+        for message in messages:
+            message.serial = next(self._serials)
+            data += encode_message(message)
+        # Registered once the whole batch is encoded, and dropped again if
+        # it cannot be written, so that no reply is waited for in vain.
+        futures = [self.loop.create_future() for _ in messages]
+        for message, future in zip(messages, futures):
+            self._calls[message.serial] = future
+        try:
+            self._write(data)
+        except BaseException:
+            for message in messages:
+                self._calls.pop(message.serial, None)
+            raise
+        return futures
+
+    def _write(self, data: bytes):
+        if self._wbuf:
+            self._wbuf += data
+            return
+        try:
+            n = self._sock.send(data)
+        except (BlockingIOError, InterruptedError):
+            n = 0
+        if n < len(data):
+            self._wbuf += data[n:]
+            self.loop.add_writer(self._sock.fileno(), self._on_writable)
+
+    async def _call(self, message: Message) -> Message:
+        future, = self._send_messages([message])
+        metrics.DBUS_CALLS_IN_FLIGHT.inc()
+        try:
+            return await future
+        finally:
+            metrics.DBUS_CALLS_IN_FLIGHT.dec()
+            self._calls.pop(message.serial, None)
+
+    def _on_writable(self):
+        try:
+            n = self._sock.send(self._wbuf)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._connection_lost(e)
+            return
+        del self._wbuf[:n]
+        if not self._wbuf:
+            self.loop.remove_writer(self._sock.fileno())
+
+    # Receiving
+
+    def _on_readable(self):
+        try:
+            data, ancdata, _, _ = self._sock.recvmsg(
+                _RECV_SIZE, socket.CMSG_SPACE(_MAX_FDS * 4)
+            )
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as e:
+            self._connection_lost(e)
+            return
+        if not data:
+            self._connection_lost(None)
+            return
+        for level, kind, cdata in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds = array.array("i")
+                fds.frombytes(cdata[: len(cdata) - len(cdata) % fds.itemsize])
+                self._fds.extend(fds)
+        if self._rbuf:
+            # Take the pending buffer over rather than copying it, so that a
+            # message arriving in many reads costs linear time. Handlers may
+            # disconnect, which clears self._rbuf, while it is viewed below.
+            self._rbuf += data
+            data, self._rbuf = self._rbuf, bytearray()
+
+        # Messages are decoded in place, so that byte arrays in them are
+        # copied once, out of the received data.
+        view = memoryview(data)
+        pos = 0
+        while True:
+            n = message_length(view[pos:])
+            if not n or len(data) - pos < n:
+                break
+            try:
+                message = decode_message(view[pos:pos + n], self._fds)
+            except Exception as e:
+                logger.error("Could not decode D-Bus message: {0}".format(e))
+                metrics.DROPPED.inc(("malformed",))
+                message = None
+            pos += n
+            if message is not None:
+                self._dispatch(message)
+            if self._sock is None:
+                return
+        if pos < len(data):
+            if isinstance(data, bytearray):
+                view.release()
+                del data[:pos]
+                self._rbuf = data
+            else:
+                self._rbuf += view[pos:]
+
+    def _connection_lost(self, exc):
+        if exc is not None:
+            logger.error("D-Bus connection lost: {0}".format(exc))
+        self.disconnect()
+
+    def _dispatch(self, message: Message):
+        if message.type in (METHOD_RETURN, ERROR):
+            future = self._calls.get(message.reply_serial)
+            if future is not None and not future.done():
+                future.set_result(message)
+                return
+            # The caller was cancelled or timed out.
+            metrics.DROPPED.inc(("late_reply",))
+        # Nobody takes ownership of descriptors passed with anything else.
+        for fd in message.unix_fds:
+            os.close(fd)
+        if message.type == SIGNAL:
+            for callback, rule, _ in list(self._matches.values()):
+                if _rule_matches(rule, message, self._owners):
+                    try:
+                        callback(message)
+                    except Exception as e:
+                        logger.exception(
+                            "Signal handler failed on {0}: {1}".format(
+                                message.member, e
+                            )
+                        )
+        elif message.type == METHOD_CALL:
+            self._handle_call(message)
+
+    # Exported objects
+
+    def _handle_call(self, message: Message):
+        try:
+            signature, body = self._invoke(message)
+            reply = Message(
+                METHOD_RETURN,
+                signature=signature,
+                body=body,
+                reply_serial=message.serial,
+                destination=message.sender,
+            )
+        except Exception as e:
+            if isinstance(e, BleakDBusError):
+                name, text = e.dbus_error, e.dbus_message
+            else:
+                name, text = "org.freedesktop.DBus.Error.Failed", str(e)
+            reply = Message(
+                ERROR,
+                signature="s",
+                body=[text],
+                error_name=name,
+                reply_serial=message.serial,
+                destination=message.sender,
+            )
+        if not message.flags & NO_REPLY_EXPECTED:
+            self._send_message(reply)
+
+    def _invoke(self, message: Message) -> tuple:
+        if message.interface == PEER_INTERFACE and message.member == "Ping":
+            return "", []
+        obj = self._exports.get(message.path)
+        if obj is None:
+            raise BleakDBusError(
+                "org.freedesktop.DBus.Error.UnknownObject",
+                "{0} is not exported".format(message.path),
+            )
+        member = message.member
+        if message.interface == defs.OBJECT_MANAGER_INTERFACE:
+            if member == "GetManagedObjects":
+                return "a{oa{sa{sv}}}", [self._managed_objects(obj.path)]
+        elif message.interface == defs.PROPERTIES_INTERFACE:
+            props = obj.get_properties() if message.body[0] == obj.interface else {}
+            if member == "GetAll":
+                return "a{sv}", [props]
+            if member == "Get" and message.body[1] in props:
+                return "v", [props[message.body[1]]]
+            if member == "Get":
+                raise BleakDBusError(
+                    "org.freedesktop.DBus.Error.UnknownProperty", message.body[1]
+                )
+        elif message.interface in (None, obj.interface) and member in obj.methods:
+            _, returns, name = obj.methods[member]
+            result = getattr(obj, name)(*message.body)
+            if not returns:
+                return "", []
+            return returns, [result] if len(split_signature(returns)) == 1 else result
+        raise BleakDBusError(
+            "org.freedesktop.DBus.Error.UnknownMethod",
+            "{0}.{1} is not implemented".format(message.interface, member),
+        )
+
+    def _managed_objects(self, root: str) -> dict:
+        prefix = root.rstrip("/") + "/"
+        return {
+            path: {obj.interface: obj.get_properties()}
+            for path, obj in self._exports.items()
+            if path.startswith(prefix) and obj.interface is not None
+        }
+
+
+def _to_txdbus(value):
+    # txdbus guesses the signature of variants from the Python types, so
+    # values with explicit signatures become its wrapper types.
+    if isinstance(value, Variant):
+        return _typed_to_txdbus(value.signature, value.value)
+    if isinstance(value, dict):
+        return {k: _to_txdbus(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_txdbus(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_to_txdbus(v) for v in value)
+    if isinstance(value, (bytes, memoryview)):
+        return bytearray(value)
+    return value
+
+
+def _typed_to_txdbus(signature: str, value):
+    from txdbus import marshal
+
+    if signature in marshal.variantClassMap:
+        return marshal.variantClassMap[signature](value)
+    if signature == "ay":
+        return bytearray(value)
+    if signature.startswith("a{"):
+        key_sig, value_sig = split_signature(signature[2:-1])
+        return {
+            _typed_to_txdbus(key_sig, k): _typed_to_txdbus(value_sig, v)
+            for k, v in value.items()
+        }
+    if signature.startswith("a"):
+        return [_typed_to_txdbus(signature[1:], v) for v in value]
+    if signature.startswith("("):
+        return tuple(
+            _typed_to_txdbus(t, v)
+            for t, v in zip(split_signature(signature[1:-1]), value)
+        )
+    return _to_txdbus(value)
+
+
+@lru_cache(maxsize=1)
+def _txdbus_object_class():
+    from txdbus import interface, objects
+
+    class TxDBusServiceObject(objects.DBusObject):
+        def __init__(self, obj):
+            super(TxDBusServiceObject, self).__init__(obj.path)
+            self._obj = obj
+            self._interface = None
+            if obj.interface is not None:
+                self._interface = interface.DBusInterface(
+                    obj.interface,
+                    *[
+                        interface.Method(name, arguments=args, returns=returns)
+                        for name, (args, returns, _) in obj.methods.items()
+                    ]
+                )
+
+        def getInterfaces(self):
+            for i in super(TxDBusServiceObject, self).getInterfaces():
+                yield i
+            if self._interface is not None:
+                yield self._interface
+
+        def getAllProperties(self, interfaceName):
+            if interfaceName != self._obj.interface:
+                return {}
+            return _to_txdbus(self._obj.get_properties())
+
+        def executeMethod(self, interfaceObj, methodName, methodArguments, sender):
+            if interfaceObj.name == defs.PROPERTIES_INTERFACE:
+                if methodName == "GetAll":
+                    return self.getAllProperties(methodArguments[0])
+                if methodName == "Get":
+                    return self.getAllProperties(methodArguments[0])[
+                        methodArguments[1]
+                    ]
+                raise NotImplementedError
+            _, _, name = self._obj.methods[methodName]
+            return _to_txdbus(getattr(self._obj, name)(*(methodArguments or [])))
+
+    return TxDBusServiceObject
+
+
+class TxDBusMessageBus(BaseMessageBus):
+    """A D-Bus connection through txdbus on a Twisted reactor."""
+
+    def __init__(self, loop: AbstractEventLoop = None):
+        super(TxDBusMessageBus, self).__init__(loop)
+        self._reactor = None
+        self._conn = None
+
+    async def connect(self, address: str = None) -> "TxDBusMessageBus":
+        from twisted.internet.asyncioreactor import AsyncioSelectorReactor
+        from txdbus import client
+
+        self._reactor = AsyncioSelectorReactor(self.loop)
+        self._conn = await client.connect(self._reactor, address or "system").asFuture(
+            self.loop
+        )
+        self.unique_name = self._conn.busName
+        return self
+
+    def disconnect(self) -> None:
+        from twisted.internet.error import ReactorNotRunning
+
+        if self._conn is None:
+            return
+        try:
+            self._conn.disconnect()
+        finally:
+            try:
+                self._reactor.stop()
+            except ReactorNotRunning:
+                pass
+            self._conn = None
+            self._reactor = None
+
+    async def call(
+        self,
+        path: str,
+        member: str,
+        interface: str,
+        destination: str = defs.BLUEZ_SERVICE,
+        signature: str = "",
+        body=(),
+        return_signature: str = None,
+    ) -> Any:
+        from txdbus.error import RemoteError
+
+        kwargs = {}
+        if return_signature is not None:
+            kwargs["returnSignature"] = return_signature
+        if self.flight is not None:
+            self.flight.record(flightrecorder.CALL, member, path)
+        start = time.perf_counter()
+        error = True
+        metrics.DBUS_CALLS_IN_FLIGHT.inc()
+        try:
+            result = await self._conn.callRemote(
+                path,
+                member,
+                interface=interface,
+                destination=destination,
+                signature=signature or None,
+                body=[_to_txdbus(v) for v in body],
+                **kwargs
+            ).asFuture(self.loop)
+            error = False
+        except RemoteError as e:
+            raise BleakDBusError(e.errName, e.message)
+        finally:
+            metrics.DBUS_CALLS_IN_FLIGHT.dec()
+            if self._recording():
+                self._record(member, start, error)
+        # txdbus decodes byte arrays into lists of ints.
+        return bytes(result) if return_signature == "ay" else result
+
+    async def add_match(self, callback: Callable, **rule) -> int:
+        return await self._conn.addMatch(
+            callback,
+            interface=rule.get("interface"),
+            member=rule.get("member"),
+            path=rule.get("path"),
+            path_namespace=rule.get("path_namespace"),
+            sender=rule.get("sender"),
+            arg=[(0, rule["arg0"])] if rule.get("arg0") else None,
+            arg_path=[(0, rule["arg0path"])] if rule.get("arg0path") else None,
+            arg0namespace=rule.get("arg0namespace"),
+        ).asFuture(self.loop)
+
+    async def remove_match(self, rule_id: int) -> None:
+        await self._conn.delMatch(rule_id).asFuture(self.loop)
+
+    def export(self, obj: ServiceObject) -> None:
+        self._conn.exportObject(_txdbus_object_class()(obj))
+
+    def unexport(self, path: str) -> None:
+        self._conn.unexportObject(path)
+
+
+_TRANSPORTS = {"asyncio": AsyncioMessageBus, "txdbus": TxDBusMessageBus}
+
+
+async def connect_system_bus(
+    loop: AbstractEventLoop = None, transport: str = None
+) -> BaseMessageBus:
+    """Connect to the system bus.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        transport (str): ``"asyncio"`` or ``"txdbus"``. Defaults to the
+            ``BLEAK_DBUS_TRANSPORT`` environment variable, or ``"asyncio"``.
+
+    Returns:
+        The connected bus.
+
+    """
+    transport = transport or os.environ.get("BLEAK_DBUS_TRANSPORT", "asyncio")
+    try:
+        cls = _TRANSPORTS[transport.lower()]
+    except KeyError:
+        raise BleakError("Unknown D-Bus transport {0!r}".format(transport))
+    return await cls(loop).connect()
@@ -2,30 +2,31 @@
 import logging
 import asyncio
 import os
-import re
-import subprocess
 import uuid
 from asyncio import Future
 from functools import wraps, partial
 from typing import Callable, Any, Union
 
 from bleak.backends.service import BleakGATTServiceCollection
-from bleak.exc import BleakError
+from bleak.exc import BleakDBusError, BleakError
+from bleak.backends import metrics
 from bleak.backends.client import BaseBleakClient
+from bleak.backends.flightrecorder import SIGNAL, STATE
+from bleak.backends.trace import TRACER
 from bleak.backends.bluezdbus import defs, signals, utils
-from bleak.backends.bluezdbus.discovery import discover
+from bleak.backends.bluezdbus.bus import connect_system_bus
+from bleak.backends.bluezdbus.session import ScanPolicy, get_scan_session
 from bleak.backends.bluezdbus.utils import get_device_object_path, get_managed_objects
 from bleak.backends.bluezdbus.service import BleakGATTServiceBlueZDBus
 from bleak.backends.bluezdbus.characteristic import BleakGATTCharacteristicBlueZDBus
 from bleak.backends.bluezdbus.descriptor import BleakGATTDescriptorBlueZDBus
 
-from twisted.internet.asyncioreactor import AsyncioSelectorReactor
-from twisted.internet.error import ReactorNotRunning
-from txdbus.client import connect as txdbus_connect
-from txdbus.error import RemoteError
-
 logger = logging.getLogger(__name__)
 
+_GET_MANAGED_OBJECTS = dict(
+    path="/", member="GetManagedObjects", interface=defs.OBJECT_MANAGER_INTERFACE
+)
+
 
 class BleakClientBlueZDBus(BaseBleakClient):
     """A native Linux Bleak Client
@@ -38,6 +39,10 @@ class BleakClientBlueZDBus(BaseBleakClient):
 
     Keyword Args:
         timeout (float): Timeout for required ``discover`` call. Defaults to 2.0.
+        scan_policy (ScanPolicy or str): How to treat scanning on the same
+            adapter while connecting. Defaults to ``ScanPolicy.LATENCY``, which
+            pauses it until the connection attempt is done. Use
+            ``ScanPolicy.COVERAGE`` to keep scanning.
 
     """
 
@@ -45,24 +50,23 @@ class BleakClientBlueZDBus(BaseBleakClient):
         super(BleakClientBlueZDBus, self).__init__(address, loop, **kwargs)
         self.device = kwargs.get("device") if kwargs.get("device") else "hci0"
         self.address = address
+        self._scan_policy = ScanPolicy(kwargs.get("scan_policy", ScanPolicy.LATENCY))
 
-        # Backend specific, TXDBus objects and data
+        # Backend specific, D-Bus objects and data
         self._device_path = None
         self._bus = None
-        self._reactor = None
         self._rules = {}
         self._subscriptions = list()
 
         self._disconnected_callback = None
+        self._counted_connected = False
 
         self._char_path_to_uuid = {}
 
         # We need to know BlueZ version since battery level characteristic
-        # are stored in a separate DBus interface in the BlueZ >= 5.48.
-        p = subprocess.Popen(["bluetoothctl", "--version"], stdout=subprocess.PIPE)
-        out, _ = p.communicate()
-        s = re.search(b"(\\d+).(\\d+)", out.strip(b"'"))
-        self._bluez_version = tuple(map(int, s.groups()))
+        # are stored in a separate DBus interface in the BlueZ >= 5.48. It is
+        # probed once per process, on the first connect.
+        self._bluez_version = None
 
     # Connectivity methods
 
@@ -98,26 +102,110 @@ class BleakClientBlueZDBus(BaseBleakClient):
         """Connect to the specified GATT server.
 
         Keyword Args:
-            timeout (float): Timeout for required ``discover`` call. Defaults to 2.0.
+            timeout (float): Timeout for the discovery that is run if BlueZ
+                does not know the device yet. Defaults to 2.0.
 
         Returns:
             Boolean representing connection status.
 
         """
-
-        # A Discover must have been run before connecting to any devices. Do a quick one here
-        # to ensure that it has been done.
         timeout = kwargs.get("timeout", self._timeout)
-        await discover(timeout=timeout, device=self.device, loop=self.loop)
+        labels = (self.device,)
+        metrics.CONNECT_ATTEMPTS.inc(labels)
+        try:
+            await self._connect_device(timeout)
+        except BaseException as e:
+            metrics.CONNECT_FAILURES.inc((self.device, type(e).__name__))
+            raise
+        metrics.CONNECT_SUCCESSES.inc(labels)
+        self._set_counted_connected(True)
+        return True
 
-        self._reactor = AsyncioSelectorReactor(self.loop)
+    async def _connect_device(self, timeout: float) -> None:
+        """Open the bus, find the device and connect to it."""
+        self._bluez_version = await utils.get_bluez_version()
 
         # Create system bus
-        self._bus = await txdbus_connect(self._reactor, busAddress="system").asFuture(
-            self.loop
-        )
-        # TODO: Handle path errors from txdbus/dbus
-        self._device_path = get_device_object_path(self.device, self.address)
+        self._bus = await connect_system_bus(self.loop)
+        try:
+            self._bus.stats = self._stats
+            self._bus.stats_device = self.address
+            self._bus.flight = self.flight_recorder
+            # TODO: Handle path errors from dbus
+            self._device_path = get_device_object_path(self.device, self.address)
+
+            # The device must be known to BlueZ before connecting to it.
+            await self._find_device(timeout)
+
+            session = get_scan_session(self.loop, self.device)
+            if self._scan_policy is ScanPolicy.LATENCY:
+                await session.pause()
+            try:
+                await self._connect()
+            finally:
+                if self._scan_policy is ScanPolicy.LATENCY:
+                    try:
+                        await session.resume()
+                    except Exception as e:
+                        logger.error("Could not resume scanning: {0}".format(e))
+        except BaseException:
+            # Do not leak the connection on failed attempts.
+            self._bus.disconnect()
+            self._bus = None
+            raise
+
+    def _set_counted_connected(self, connected: bool) -> None:
+        # Keeps bleak_connections in step, whichever of disconnect() and the
+        # Connected property change notices the disconnection first.
+        if connected != self._counted_connected:
+            self._counted_connected = connected
+            metrics.CONNECTIONS.inc((self.device,), 1 if connected else -1)
+            if self.flight_recorder is not None:
+                self.flight_recorder.record(
+                    STATE, "connected" if connected else "disconnected"
+                )
+
+    async def _find_device(self, timeout: float) -> None:
+        """Make sure BlueZ has an object for the device, discovering it if needed.
+
+        Discovery runs on the shared scan session of the adapter, even while
+        other connection attempts pause it, and stops as soon as the device
+        shows up.
+
+        Raises:
+            BleakError: If the device is not found within ``timeout`` seconds.
+
+        """
+        try:
+            await self._get_device_properties()
+            return
+        except BleakDBusError:
+            pass
+
+        found = self.loop.create_future()
+
+        def _detection_callback(message):
+            if message.member == "InterfacesAdded":
+                path = message.body[0]
+            else:
+                path = message.path
+            if path == self._device_path and not found.done():
+                found.set_result(True)
+
+        session = get_scan_session(self.loop, self.device)
+        objects = await session.attach(self, _detection_callback, lookup=True)
+        try:
+            if self._device_path not in objects:
+                await asyncio.wait_for(found, timeout)
+        except asyncio.TimeoutError:
+            raise BleakError(
+                "Device with address {0} was not found.".format(self.address)
+            )
+        finally:
+            await session.detach(self)
+
+    async def _connect(self) -> None:
+        """Connect to the device and resolve its services."""
 
         def _services_resolved_callback(message):
             iface, changed, invalidated = message.body
@@ -128,24 +216,33 @@ class BleakClientBlueZDBus(BaseBleakClient):
                 logger.info("Services resolved.")
                 self.services_resolved = True
 
-        rule_id = await signals.listen_properties_changed(
-            self._bus, self.loop, _services_resolved_callback
+        rule_ids = await signals.add_match_rules(
+            self._bus,
+            _services_resolved_callback,
+            signals.device_match_rules(self._device_path, characteristics=False),
         )
 
         logger.debug(
             "Connecting to BLE device @ {0} with {1}".format(self.address, self.device)
         )
         try:
-            await self._bus.callRemote(
+            await self._bus.call(
                 self._device_path,
                 "Connect",
-                interface="org.bluez.Device1",
-                destination="org.bluez",
-            ).asFuture(self.loop)
-        except RemoteError as e:
+                "org.bluez.Device1",
+            )
+        except BleakDBusError as e:
             raise BleakError(str(e))
 
-        if await self.is_connected():
+        # The connection state and the GATT objects in one round trip; the
+        # objects are only used if the services are resolved already.
+        properties, objs = await self._bus.call_many(
+            [
+                self._get_all_call(self._device_path, defs.DEVICE_INTERFACE),
+                _GET_MANAGED_OBJECTS,
+            ]
+        )
+        if properties.get("Connected"):
             logger.debug("Connection successful.")
         else:
             raise BleakError(
@@ -153,24 +250,28 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
 
         # Get all services. This means making the actual connection.
-        await self.get_services()
-        properties = await self._get_device_properties()
-        if not properties.get("Connected"):
-            raise BleakError("Connection failed!")
-
-        await self._bus.delMatch(rule_id).asFuture(self.loop)
-        self._rules["PropChanged"] = await signals.listen_properties_changed(
-            self._bus, self.loop, self._properties_changed_callback
+        if properties.get("ServicesResolved"):
+            prefix = self._device_path + "/service"
+            self._build_services(
+                {p: i for p, i in objs.items() if p.startswith(prefix)}
+            )
+        else:
+            await self.get_services()
+            properties = await self._get_device_properties()
+            if not properties.get("Connected"):
+                raise BleakError("Connection failed!")
+
+        await signals.remove_match_rules(self._bus, rule_ids)
+        self._rules["PropChanged"] = await signals.add_match_rules(
+            self._bus,
+            self._properties_changed_callback,
+            signals.device_match_rules(self._device_path),
         )
-        return True
 
     async def _cleanup(self) -> None:
-        for rule_name, rule_id in self._rules.items():
-            logger.debug("Removing rule {0}, ID: {1}".format(rule_name, rule_id))
-            try:
-                await self._bus.delMatch(rule_id).asFuture(self.loop)
-            except Exception as e:
-                logger.error("Could not remove rule {0} ({1}): {2}".format(rule_id, rule_name, e))
+        for rule_name, rule_ids in self._rules.items():
+            logger.debug("Removing rules {0}, IDs: {1}".format(rule_name, rule_ids))
+            await signals.remove_match_rules(self._bus, rule_ids)
         self._rules = {}
 
         for _uuid in list(self._subscriptions):
@@ -194,33 +295,26 @@ class BleakClientBlueZDBus(BaseBleakClient):
 
         # Try to disconnect the actual device/peripheral
         try:
-            await self._bus.callRemote(
+            await self._bus.call(
                 self._device_path,
                 "Disconnect",
-                interface=defs.DEVICE_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
-            ).asFuture(self.loop)
+                defs.DEVICE_INTERFACE,
+            )
         except Exception as e:
             logger.error("Attempt to disconnect device failed: {0}".format(e))
 
         # See if it has been disconnected.
         is_disconnected = not await self.is_connected()
+        if is_disconnected:
+            self._set_counted_connected(False)
 
         # Try to disconnect the System Bus.
         try:
             self._bus.disconnect()
         except Exception as e:
             logger.error("Attempt to disconnect system bus failed: {0}".format(e))
-
-        # Stop the Twisted reactor holding the connection to the DBus system.
-        try:
-            self._reactor.stop()
-        except Exception as e:
-            # I think Bleak will always end up here, but I want to call stop just in case...
-            logger.debug("Attempt to stop Twisted reactor failed: {0}".format(e))
         finally:
             self._bus = None
-            self._reactor = None
 
         return is_disconnected
 
@@ -232,15 +326,14 @@ class BleakClientBlueZDBus(BaseBleakClient):
 
         """
         # TODO: Listen to connected property changes.
-        return await self._bus.callRemote(
+        return await self._bus.call(
             self._device_path,
             "Get",
-            interface=defs.PROPERTIES_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
+            defs.PROPERTIES_INTERFACE,
             signature="ss",
             body=[defs.DEVICE_INTERFACE, "Connected"],
-            returnSignature="v",
-        ).asFuture(self.loop)
+            return_signature="v",
+        )
 
     # GATT services methods
 
@@ -273,7 +366,16 @@ class BleakClientBlueZDBus(BaseBleakClient):
         objs = await get_managed_objects(
             self._bus, self.loop, self._device_path + "/service"
         )
+        return self._build_services(objs)
+
+    def _build_services(self, objs: dict) -> BleakGATTServiceCollection:
+        """Fill the service collection from the GATT objects of the device.
 
+        Args:
+            objs (dict): Object paths and interfaces of the GATT objects, as
+                returned by ``GetManagedObjects``.
+
+        """
         # There is no guarantee that services are listed before characteristics
         # Managed Objects dict.
         # Need multiple iterations to construct the Service Collection
@@ -313,6 +415,8 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
 
         self._services_resolved = True
+        if self.flight_recorder is not None:
+            self.flight_recorder.record(STATE, "services_resolved")
         return self.services
 
     # IO methods
@@ -331,33 +435,39 @@ class BleakClientBlueZDBus(BaseBleakClient):
         if not characteristic:
             # Special handling for BlueZ >= 5.48, where Battery Service (0000180f-0000-1000-8000-00805f9b34fb:)
             # has been moved to interface org.bluez.Battery1 instead of as a regular service.
-            if _uuid == "00002a19-0000-1000-8000-00805f9b34fb" and (
-                self._bluez_version[0] == 5 and self._bluez_version[1] >= 48
-            ):
+            if _uuid == "00002a19-0000-1000-8000-00805f9b34fb" and self._bluez_at_least(48):
                 props = await self._get_device_properties(
                     interface=defs.BATTERY_INTERFACE
                 )
                 # Simulate regular characteristics read to be consistent over all platforms.
                 value = bytearray([props.get("Percentage", "")])
-                logger.debug(
-                    "Read Battery Level {0} | {1}: {2}".format(
-                        _uuid, self._device_path, value
+                if TRACER.enabled:
+                    TRACER.emit(
+                        "gatt.read",
+                        self.address,
+                        lambda: {
+                            "uuid": _uuid,
+                            "path": self._device_path,
+                            "value": value,
+                        },
                     )
-                )
                 return value
-            if str(_uuid) == '00002a00-0000-1000-8000-00805f9b34fb' and (
-                self._bluez_version[0] == 5 and self._bluez_version[1] >= 48
-            ):
+            if str(_uuid) == '00002a00-0000-1000-8000-00805f9b34fb' and self._bluez_at_least(48):
                 props = await self._get_device_properties(
                     interface=defs.DEVICE_INTERFACE
                 )
                 # Simulate regular characteristics read to be consistent over all platforms.
                 value = bytearray(props.get("Name", "").encode('ascii'))
-                logger.debug(
-                    "Read Device Name {0} | {1}: {2}".format(
-                        _uuid, self._device_path, value
+                if TRACER.enabled:
+                    TRACER.emit(
+                        "gatt.read",
+                        self.address,
+                        lambda: {
+                            "uuid": _uuid,
+                            "path": self._device_path,
+                            "value": value,
+                        },
                     )
-                )
                 return value
 
             raise BleakError(
@@ -365,22 +475,22 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
 
         value = bytearray(
-            await self._bus.callRemote(
+            await self._bus.call(
                 characteristic.path,
                 "ReadValue",
-                interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
+                defs.GATT_CHARACTERISTIC_INTERFACE,
                 signature="a{sv}",
                 body=[{}],
-                returnSignature="ay",
-            ).asFuture(self.loop)
+                return_signature="ay",
+            )
         )
 
-        logger.debug(
-            "Read Characteristic {0} | {1}: {2}".format(
-                _uuid, characteristic.path, value
+        if TRACER.enabled:
+            TRACER.emit(
+                "gatt.read",
+                self.address,
+                lambda: {"uuid": _uuid, "path": characteristic.path, "value": value},
             )
-        )
         return value
 
     async def read_gatt_descriptor(self, handle: int, **kwargs) -> bytearray:
@@ -398,20 +508,22 @@ class BleakClientBlueZDBus(BaseBleakClient):
             raise BleakError("Descriptor with handle {0} was not found!".format(handle))
 
         value = bytearray(
-            await self._bus.callRemote(
+            await self._bus.call(
                 descriptor.path,
                 "ReadValue",
-                interface=defs.GATT_DESCRIPTOR_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
+                defs.GATT_DESCRIPTOR_INTERFACE,
                 signature="a{sv}",
                 body=[{}],
-                returnSignature="ay",
-            ).asFuture(self.loop)
+                return_signature="ay",
+            )
         )
 
-        logger.debug(
-            "Read Descriptor {0} | {1}: {2}".format(handle, descriptor.path, value)
-        )
+        if TRACER.enabled:
+            TRACER.emit(
+                "gatt.read",
+                self.address,
+                lambda: {"handle": handle, "path": descriptor.path, "value": value},
+            )
         return value
 
     async def write_gatt_char(
@@ -430,7 +542,7 @@ class BleakClientBlueZDBus(BaseBleakClient):
 
         Args:
             _uuid (str or UUID): The uuid of the characteristics to write to.
-            data (bytes or bytearray): The data to send.
+            data (bytes, bytearray or memoryview): The data to send.
             response (bool): If write-with-response operation should be done. Defaults to `False`.
 
         """
@@ -460,67 +572,71 @@ class BleakClientBlueZDBus(BaseBleakClient):
             )
 
         # See docstring for details about this handling.
-        if not response and self._bluez_version[0] == 5 and self._bluez_version[1] < 46:
+        if not response and self._bluez_older_than(46):
             raise BleakError("Write without response requires at least BlueZ 5.46")
-        if response or (self._bluez_version[0] == 5 and self._bluez_version[1] > 50):
+        if response or self._bluez_at_least(51):
             # TODO: Add OnValueUpdated handler for response=True?
-            await self._bus.callRemote(
+            await self._bus.call(
                 characteristic.path,
                 "WriteValue",
-                interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
+                defs.GATT_CHARACTERISTIC_INTERFACE,
                 signature="aya{sv}",
                 body=[data, {"type": "request" if response else "command"}],
-                returnSignature="",
-            ).asFuture(self.loop)
+                return_signature="",
+            )
         else:
             # Older versions of BlueZ don't have the "type" option, so we have
             # to write the hard way. This isn't the most efficient way of doing
             # things, but it works.
-            fd, _ = await self._bus.callRemote(
+            fd, _ = await self._bus.call(
                 characteristic.path,
                 "AcquireWrite",
-                interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-                destination=defs.BLUEZ_SERVICE,
+                defs.GATT_CHARACTERISTIC_INTERFACE,
                 signature="a{sv}",
                 body=[{}],
-                returnSignature="hq",
-            ).asFuture(self.loop)
+                return_signature="hq",
+            )
             os.write(fd, data)
             os.close(fd)
 
-        logger.debug(
-            "Write Characteristic {0} | {1}: {2}".format(
-                _uuid, characteristic.path, data
+        if TRACER.enabled:
+            TRACER.emit(
+                "gatt.write",
+                self.address,
+                lambda: {
+                    "uuid": _uuid,
+                    "path": characteristic.path,
+                    "value": data,
+                    "response": response,
+                },
             )
-        )
 
     async def write_gatt_descriptor(self, handle: int, data: bytearray) -> None:
         """Perform a write operation on the specified GATT descriptor.
 
         Args:
             handle (int): The handle of the descriptor to read from.
-            data (bytes or bytearray): The data to send.
+            data (bytes, bytearray or memoryview): The data to send.
 
         """
         descriptor = self.services.get_descriptor(handle)
         if not descriptor:
             raise BleakError("Descriptor with handle {0} was not found!".format(handle))
-        await self._bus.callRemote(
+        await self._bus.call(
             descriptor.path,
             'WriteValue',
-            interface=defs.GATT_DESCRIPTOR_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
+            defs.GATT_DESCRIPTOR_INTERFACE,
             signature='aya{sv}',
             body=[data, {'type': 'command'}],
-            returnSignature='',
-        ).asFuture(self.loop)
+            return_signature='',
+        )
 
-        logger.debug(
-            "Write Descriptor {0} | {1}: {2}".format(
-                handle, descriptor.path, data
+        if TRACER.enabled:
+            TRACER.emit(
+                "gatt.write",
+                self.address,
+                lambda: {"handle": handle, "path": descriptor.path, "value": data},
             )
-        )
 
     async def start_notify(
         self, _uuid: Union[str, uuid.UUID], callback: Callable[[str, Any], Any], **kwargs
@@ -553,9 +669,7 @@ class BleakClientBlueZDBus(BaseBleakClient):
             # The org.bluez.Battery1 on the other hand does not provide a notification method, so here we cannot
             # provide this functionality...
             # See https://kernel.googlesource.com/pub/scm/bluetooth/bluez/+/refs/tags/5.48/doc/battery-api.txt
-            if str(_uuid) == "00002a19-0000-1000-8000-00805f9b34fb" and (
-                self._bluez_version[0] == 5 and self._bluez_version[1] >= 48
-            ):
+            if str(_uuid) == "00002a19-0000-1000-8000-00805f9b34fb" and self._bluez_at_least(48):
                 raise BleakError(
                     "Notifications on Battery Level Char ({0}) is not "
                     "possible in BlueZ >= 5.48. Use regular read instead.".format(_uuid)
@@ -563,15 +677,14 @@ class BleakClientBlueZDBus(BaseBleakClient):
             raise BleakError(
                 "Characteristic with UUID {0} could not be found!".format(_uuid)
             )
-        await self._bus.callRemote(
+        await self._bus.call(
             characteristic.path,
             "StartNotify",
-            interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
+            defs.GATT_CHARACTERISTIC_INTERFACE,
             signature="",
             body=[],
-            returnSignature="",
-        ).asFuture(self.loop)
+            return_signature="",
+        )
 
         if _wrap:
             self._notification_callbacks[
@@ -598,15 +711,14 @@ class BleakClientBlueZDBus(BaseBleakClient):
         characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
             raise BleakError("Characteristic {0} was not found!".format(_uuid))
-        await self._bus.callRemote(
+        await self._bus.call(
             characteristic.path,
             "StopNotify",
-            interface=defs.GATT_CHARACTERISTIC_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
+            defs.GATT_CHARACTERISTIC_INTERFACE,
             signature="",
             body=[],
-            returnSignature="",
-        ).asFuture(self.loop)
+            return_signature="",
+        )
         self._notification_callbacks.pop(characteristic.path, None)
 
         self._subscriptions.remove(str(_uuid))
@@ -628,17 +740,84 @@ class BleakClientBlueZDBus(BaseBleakClient):
         characteristic = self.services.get_characteristic(str(_uuid))
         if not characteristic:
             raise BleakError("Characteristic {0} was not found!".format(_uuid))
-        out = await self._bus.callRemote(
+        out = await self._bus.call(
             characteristic.path,
             "GetAll",
-            interface=defs.PROPERTIES_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
+            defs.PROPERTIES_INTERFACE,
             signature="s",
             body=[defs.GATT_CHARACTERISTIC_INTERFACE],
-            returnSignature="a{sv}",
-        ).asFuture(self.loop)
+            return_signature="a{sv}",
+        )
         return out
 
+    async def device_snapshot(self) -> dict:
+        """Get the state of the device, in one batch of D-Bus calls.
+
+        Returns:
+            Dict with the ``org.bluez.Device1`` properties under ``"device"``,
+            the ``org.bluez.Battery1`` properties under ``"battery"``, empty
+            if the device has no battery service, and a summary of the GATT
+            objects under ``"services"``: the UUIDs of the characteristics of
+            each service, mapped to their flags, by service UUID.
+
+        """
+        device, battery, objs = await self._bus.call_many(
+            [
+                self._get_all_call(self._device_path, defs.DEVICE_INTERFACE),
+                self._get_all_call(self._device_path, defs.BATTERY_INTERFACE),
+                _GET_MANAGED_OBJECTS,
+            ],
+            return_exceptions=True,
+        )
+        for result in (device, objs):
+            if isinstance(result, Exception):
+                raise result
+        if isinstance(battery, BleakDBusError) and battery.dbus_error in (
+            "org.freedesktop.DBus.Error.InvalidArgs",
+            "org.freedesktop.DBus.Error.UnknownInterface",
+        ):
+            # BlueZ reports an interface the object lacks as invalid arguments.
+            battery = {}
+        elif isinstance(battery, Exception):
+            raise battery
+
+        services = {}
+        uuids = {}
+        prefix = self._device_path + "/"
+        for path, interfaces in sorted(objs.items()):
+            if not path.startswith(prefix):
+                continue
+            if defs.GATT_SERVICE_INTERFACE in interfaces:
+                uuids[path] = interfaces[defs.GATT_SERVICE_INTERFACE]["UUID"]
+                services.setdefault(uuids[path], {})
+            elif defs.GATT_CHARACTERISTIC_INTERFACE in interfaces:
+                char = interfaces[defs.GATT_CHARACTERISTIC_INTERFACE]
+                service = uuids.get(char.get("Service"))
+                if service is not None:
+                    services[service][char["UUID"]] = list(char.get("Flags", []))
+        return {"device": device, "battery": battery, "services": services}
+
+    def _bluez_at_least(self, minor: int) -> bool:
+        """Whether BlueZ is 5.``minor`` or newer. ``False`` until the first connect."""
+        version = self._bluez_version
+        return version is not None and version[0] == 5 and version[1] >= minor
+
+    def _bluez_older_than(self, minor: int) -> bool:
+        """Whether BlueZ is older than 5.``minor``. ``False`` until the first connect."""
+        version = self._bluez_version
+        return version is not None and version[0] == 5 and version[1] < minor
+
+    @staticmethod
+    def _get_all_call(path: str, interface: str) -> dict:
+        return dict(
+            path=path,
+            member="GetAll",
+            interface=defs.PROPERTIES_INTERFACE,
+            signature="s",
+            body=[interface],
+            return_signature="a{sv}",
+        )
+
     async def _get_device_properties(self, interface=defs.DEVICE_INTERFACE) -> dict:
         """Get properties of the connected device.
 
@@ -649,15 +828,7 @@ class BleakClientBlueZDBus(BaseBleakClient):
             (dict) The properties.
 
         """
-        return await self._bus.callRemote(
-            self._device_path,
-            "GetAll",
-            interface=defs.PROPERTIES_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
-            signature="s",
-            body=[interface],
-            returnSignature="a{sv}",
-        ).asFuture(self.loop)
+        return await self._bus.call(**self._get_all_call(self._device_path, interface))
 
     # Internal Callbacks
 
@@ -674,22 +845,43 @@ class BleakClientBlueZDBus(BaseBleakClient):
 
         """
 
-        logger.debug(
-            "DBUS: path: {}, domain: {}, body: {}".format(
-                message.path, message.body[0], message.body[1]
+        if self.flight_recorder is not None:
+            self.flight_recorder.record(SIGNAL, message.member, message.path)
+        if TRACER.enabled:
+            TRACER.emit(
+                "dbus.properties_changed",
+                self.address,
+                lambda: {
+                    "path": message.path,
+                    "interface": message.body[0],
+                    "changed": message.body[1],
+                },
             )
-        )
 
         if message.body[0] == defs.GATT_CHARACTERISTIC_INTERFACE:
             if message.path in self._notification_callbacks:
-                logger.info(
-                    "GATT Char Properties Changed: {0} | {1}".format(
-                        message.path, message.body[1:]
+                if TRACER.enabled:
+                    TRACER.emit(
+                        "gatt.notify",
+                        self.address,
+                        lambda: {
+                            "uuid": self._char_path_to_uuid.get(message.path),
+                            "path": message.path,
+                            "value": message.body[1].get("Value"),
+                        },
                     )
-                )
-                self._notification_callbacks[message.path](
-                    message.path, message.body[1]
-                )
+                value = message.body[1].get("Value")
+                if value is not None:
+                    labels = (self._char_path_to_uuid.get(message.path, message.path),)
+                    metrics.NOTIFICATIONS.inc(labels)
+                    metrics.NOTIFICATION_BYTES.inc(labels, len(value))
+                try:
+                    self._notification_callbacks[message.path](
+                        message.path, message.body[1]
+                    )
+                except Exception:
+                    metrics.DROPPED.inc(("callback_error",))
+                    raise
         elif message.body[0] == defs.DEVICE_INTERFACE:
             device_path = "/org/bluez/%s/dev_%s" % (
                 self.device,
@@ -702,6 +894,7 @@ class BleakClientBlueZDBus(BaseBleakClient):
                     and not message_body_map["Connected"]
                 ):
                     logger.debug("Device {} disconnected.".format(self.address))
+                    self._set_counted_connected(False)
 
                     task = self.loop.create_task(self._cleanup())
                     if self._disconnected_callback is not None:
@@ -712,7 +905,8 @@ def _data_notification_wrapper(func, char_map):
     @wraps(func)
     def args_parser(sender, data):
         if "Value" in data:
-            # Do a conversion from {'Value': [...]} to bytearray.
+            # The value is decoded as bytes; hand out a bytearray, as the
+            # other backends do.
             return func(char_map.get(sender, sender), bytearray(data.get("Value")))
 
     return args_parser
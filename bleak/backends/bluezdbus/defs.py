@@ -9,6 +9,8 @@ BLUEZ_SERVICE = "org.bluez"
 ADAPTER_INTERFACE = "org.bluez.Adapter1"
 DEVICE_INTERFACE = "org.bluez.Device1"
 BATTERY_INTERFACE = "org.bluez.Battery1"
+ADVERTISEMENT_MONITOR_INTERFACE = "org.bluez.AdvertisementMonitor1"
+ADVERTISEMENT_MONITOR_MANAGER_INTERFACE = "org.bluez.AdvertisementMonitorManager1"
 
 # GATT interfaces
 GATT_MANAGER_INTERFACE = "org.bluez.GattManager1"
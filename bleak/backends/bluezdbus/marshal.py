@@ -0,0 +1,639 @@
+# -*- coding: utf-8 -*-
+"""
+D-Bus wire format marshalling for the asyncio message bus.
+
+Signatures are compiled once into chains of reader and writer closures, so
+marshalling a value costs no signature parsing. The types bleak exchanges
+most with BlueZ have hand written fast paths: byte arrays (``ay``) are read
+as one slice into ``bytes`` and written straight from any bytes-like object,
+and property dictionaries (``a{sv}``) skip the generic dictionary code.
+
+Structures are unmarshalled into lists, and method call results follow the
+txdbus conventions, so that both transports give the same values.
+
+"""
+import struct
+from functools import lru_cache
+from typing import Any, Callable, List, Tuple
+
+from bleak.exc import BleakError
+
+# Message types
+METHOD_CALL = 1
+METHOD_RETURN = 2
+ERROR = 3
+SIGNAL = 4
+
+# Message flags
+NO_REPLY_EXPECTED = 0x01
+NO_AUTO_START = 0x02
+
+# Header field codes
+_PATH = 1
+_INTERFACE = 2
+_MEMBER = 3
+_ERROR_NAME = 4
+_REPLY_SERIAL = 5
+_DESTINATION = 6
+_SENDER = 7
+_SIGNATURE = 8
+_UNIX_FDS = 9
+
+_HEADER_FIELDS = (
+    (_PATH, "path", "o"),
+    (_INTERFACE, "interface", "s"),
+    (_MEMBER, "member", "s"),
+    (_ERROR_NAME, "error_name", "s"),
+    (_REPLY_SERIAL, "reply_serial", "u"),
+    (_DESTINATION, "destination", "s"),
+    (_SENDER, "sender", "s"),
+    (_SIGNATURE, "signature", "g"),
+)
+_FIELD_NAMES = {code: name for code, name, _ in _HEADER_FIELDS}
+
+_ENDIAN = {ord("l"): "<", ord("B"): ">"}
+
+# Basic types: struct format and alignment
+_BASIC = {
+    "y": "B",
+    "b": "I",
+    "n": "h",
+    "q": "H",
+    "i": "i",
+    "u": "I",
+    "x": "q",
+    "t": "Q",
+    "d": "d",
+    "h": "I",
+}
+_ALIGNMENT = {
+    "y": 1,
+    "b": 4,
+    "n": 2,
+    "q": 2,
+    "i": 4,
+    "u": 4,
+    "x": 8,
+    "t": 8,
+    "d": 8,
+    "h": 4,
+    "s": 4,
+    "o": 4,
+    "g": 1,
+    "v": 1,
+    "a": 4,
+    "(": 8,
+    "{": 8,
+}
+
+
+class Variant(object):
+    """A value with an explicit D-Bus signature, for marshalling variants.
+
+    Plain Python values in variants get the signature of their type, e.g.
+    ``"i"`` for ``int``; wrap values that need another one, e.g.
+    ``Variant("n", -60)`` for an ``int16``.
+
+    Args:
+        signature (str): The signature of the value.
+        value: The value.
+
+    """
+
+    __slots__ = ("signature", "value")
+
+    def __init__(self, signature: str, value: Any):
+        self.signature = signature
+        self.value = value
+
+    def __repr__(self):
+        return "Variant({0!r}, {1!r})".format(self.signature, self.value)
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Variant)
+            and self.signature == other.signature
+            and self.value == other.value
+        )
+
+
+class Message(object):
+    """A D-Bus message.
+
+    Attributes follow the header fields of the specification. ``body`` is
+    the list of unmarshalled arguments and ``unix_fds`` the file descriptors
+    received with the message.
+
+    """
+
+    __slots__ = (
+        "type",
+        "flags",
+        "serial",
+        "reply_serial",
+        "path",
+        "interface",
+        "member",
+        "error_name",
+        "destination",
+        "sender",
+        "signature",
+        "body",
+        "unix_fds",
+    )
+
+    def __init__(
+        self,
+        type: int,
+        path: str = None,
+        interface: str = None,
+        member: str = None,
+        signature: str = "",
+        body=(),
+        destination: str = None,
+        flags: int = 0,
+        reply_serial: int = None,
+        error_name: str = None,
+        sender: str = None,
+        serial: int = 0,
+        unix_fds=(),
+    ):
+        self.type = type
+        self.flags = flags
+        self.serial = serial
+        self.reply_serial = reply_serial
+        self.path = path
+        self.interface = interface
+        self.member = member
+        self.error_name = error_name
+        self.destination = destination
+        self.sender = sender
+        self.signature = signature
+        self.body = list(body)
+        self.unix_fds = list(unix_fds)
+
+    def __repr__(self):
+        return "<Message type={0} {1} {2}.{3} ({4})>".format(
+            self.type, self.path, self.interface, self.member, self.signature
+        )
+
+
+# Signatures
+
+
+def split_signature(signature: str) -> List[str]:
+    """Split a signature into its single complete types."""
+    types = []
+    i = 0
+    while i < len(signature):
+        j = _complete_type_end(signature, i)
+        types.append(signature[i:j])
+        i = j
+    return types
+
+
+def _complete_type_end(signature: str, i: int) -> int:
+    c = signature[i]
+    if c == "a":
+        return _complete_type_end(signature, i + 1)
+    if c in "({":
+        close = ")" if c == "(" else "}"
+        depth = 0
+        for j in range(i, len(signature)):
+            if signature[j] == c:
+                depth += 1
+            elif signature[j] == close:
+                depth -= 1
+                if depth == 0:
+                    return j + 1
+        raise BleakError("Invalid D-Bus signature {0!r}".format(signature))
+    if c in _BASIC or c in "sogv":
+        return i + 1
+    raise BleakError("Invalid D-Bus signature {0!r}".format(signature))
+
+
+def signature_of(value) -> str:
+    """Guess the signature of a Python value, as txdbus does.
+
+    :py:class:`Variant` values carry their own signature.
+    """
+    if isinstance(value, Variant):
+        return value.signature
+    if isinstance(value, bool):
+        return "b"
+    if isinstance(value, int):
+        return "i"
+    if isinstance(value, float):
+        return "d"
+    if isinstance(value, str):
+        return "s"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "ay"
+    if isinstance(value, tuple):
+        return "(" + "".join(signature_of(v) for v in value) + ")"
+    if isinstance(value, list):
+        if not value:
+            return "av"
+        sigs = set(signature_of(v) for v in value)
+        return "a" + sigs.pop() if len(sigs) == 1 else "av"
+    if isinstance(value, dict):
+        if not value:
+            return "a{sv}"
+        key = signature_of(next(iter(value)))
+        sigs = set(signature_of(v) for v in value.values())
+        return "a{" + key + (sigs.pop() if len(sigs) == 1 else "v") + "}"
+    raise BleakError("Cannot marshal {0!r} to D-Bus".format(value))
+
+
+# Readers: read(buf, pos) -> (value, pos)
+
+
+def _pad(pos: int, alignment: int) -> int:
+    return pos + (-pos % alignment)
+
+
+@lru_cache(maxsize=256)
+def _reader(signature: str, endian: str) -> Callable:
+    c = signature[0]
+    if c in _BASIC:
+        s = struct.Struct(endian + _BASIC[c])
+        size = s.size
+        unpack_from = s.unpack_from
+        if c == "b":
+
+            def read_bool(buf, pos):
+                pos += -pos % 4
+                return unpack_from(buf, pos)[0] != 0, pos + 4
+
+            return read_bool
+
+        if size == 1:
+
+            def read_byte(buf, pos):
+                return buf[pos], pos + 1
+
+            return read_byte
+
+        def read_basic(buf, pos):
+            pos += -pos % size
+            return unpack_from(buf, pos)[0], pos + size
+
+        return read_basic
+
+    u32 = struct.Struct(endian + "I").unpack_from
+
+    if c in "so":
+
+        def read_string(buf, pos):
+            pos += -pos % 4
+            n = u32(buf, pos)[0]
+            pos += 4
+            return str(buf[pos:pos + n], "utf-8"), pos + n + 1
+
+        return read_string
+
+    if c == "g":
+
+        def read_signature(buf, pos):
+            n = buf[pos]
+            return str(buf[pos + 1:pos + 1 + n], "ascii"), pos + n + 2
+
+        return read_signature
+
+    if c == "v":
+
+        def read_variant(buf, pos):
+            n = buf[pos]
+            sig = str(buf[pos + 1:pos + 1 + n], "ascii")
+            return _reader(sig, endian)(buf, pos + n + 2)
+
+        return read_variant
+
+    if c == "(":
+        fields = [_reader(t, endian) for t in split_signature(signature[1:-1])]
+
+        def read_struct(buf, pos):
+            pos += -pos % 8
+            value = []
+            for read in fields:
+                v, pos = read(buf, pos)
+                value.append(v)
+            return value, pos
+
+        return read_struct
+
+    # Arrays
+    element = signature[1:]
+    if element == "y":
+
+        def read_bytes(buf, pos):
+            pos += -pos % 4
+            n = u32(buf, pos)[0]
+            pos += 4
+            return bytes(buf[pos:pos + n]), pos + n
+
+        return read_bytes
+
+    if element == "{sv}":
+
+        def read_properties(buf, pos):
+            pos += -pos % 4
+            n = u32(buf, pos)[0]
+            pos += 4
+            pos += -pos % 8
+            end = pos + n
+            value = {}
+            while pos < end:
+                pos += -pos % 8
+                k = u32(buf, pos)[0]
+                key = str(buf[pos + 4:pos + 4 + k], "utf-8")
+                pos += k + 5
+                k = buf[pos]
+                sig = str(buf[pos + 1:pos + 1 + k], "ascii")
+                value[key], pos = _reader(sig, endian)(buf, pos + k + 2)
+            return value, pos
+
+        return read_properties
+
+    if element[0] == "{":
+        key_sig, value_sig = split_signature(element[1:-1])
+        read_key = _reader(key_sig, endian)
+        read_value = _reader(value_sig, endian)
+
+        def read_dict(buf, pos):
+            pos += -pos % 4
+            n = u32(buf, pos)[0]
+            pos += 4
+            pos += -pos % 8
+            end = pos + n
+            value = {}
+            while pos < end:
+                pos += -pos % 8
+                k, pos = read_key(buf, pos)
+                value[k], pos = read_value(buf, pos)
+            return value, pos
+
+        return read_dict
+
+    read_element = _reader(element, endian)
+    alignment = _ALIGNMENT[element[0]]
+
+    def read_array(buf, pos):
+        pos += -pos % 4
+        n = u32(buf, pos)[0]
+        pos += 4
+        pos += -pos % alignment
+        end = pos + n
+        value = []
+        while pos < end:
+            v, pos = read_element(buf, pos)
+            value.append(v)
+        return value, pos
+
+    return read_array
+
+
+def unmarshal(signature: str, buf: bytes, pos: int = 0, endian: str = "<") -> Tuple[list, int]:
+    """Unmarshal the values of a signature.
+
+    Args:
+        signature (str): The signature of the values.
+        buf (bytes): The data, aligned on an 8 byte boundary.
+        pos (int): Where to start reading.
+        endian (str): ``"<"`` or ``">"``.
+
+    Returns:
+        ``(values, end)``, with the list of values and the position after them.
+
+    """
+    values = []
+    for t in split_signature(signature):
+        v, pos = _reader(t, endian)(buf, pos)
+        values.append(v)
+    return values, pos
+
+
+# Writers: write(buf, value), appending to a bytearray
+
+
+def _align(buf: bytearray, alignment: int) -> None:
+    n = -len(buf) % alignment
+    if n:
+        buf.extend(b"\0" * n)
+
+
+@lru_cache(maxsize=256)
+def _writer(signature: str) -> Callable:
+    c = signature[0]
+    if c in _BASIC:
+        s = struct.Struct("<" + _BASIC[c])
+        size = s.size
+        pack = s.pack
+
+        def write_basic(buf, value):
+            if isinstance(value, Variant):
+                value = value.value
+            _align(buf, size)
+            buf += pack(value)
+
+        return write_basic
+
+    u32 = struct.Struct("<I")
+
+    if c in "so":
+
+        def write_string(buf, value):
+            if isinstance(value, Variant):
+                value = value.value
+            data = value.encode("utf-8")
+            _align(buf, 4)
+            buf += u32.pack(len(data))
+            buf += data
+            buf.append(0)
+
+        return write_string
+
+    if c == "g":
+
+        def write_signature(buf, value):
+            data = value.encode("ascii")
+            buf.append(len(data))
+            buf += data
+            buf.append(0)
+
+        return write_signature
+
+    if c == "v":
+        write_signature = _writer("g")
+
+        def write_variant(buf, value):
+            sig = signature_of(value)
+            write_signature(buf, sig)
+            _writer(sig)(buf, value.value if isinstance(value, Variant) else value)
+
+        return write_variant
+
+    if c == "(":
+        fields = [_writer(t) for t in split_signature(signature[1:-1])]
+
+        def write_struct(buf, value):
+            if isinstance(value, Variant):
+                value = value.value
+            _align(buf, 8)
+            for write, v in zip(fields, value):
+                write(buf, v)
+
+        return write_struct
+
+    element = signature[1:]
+    if element == "y":
+
+        def write_bytes(buf, value):
+            if isinstance(value, Variant):
+                value = value.value
+            if isinstance(value, memoryview):
+                value = value.cast("B") if value.format != "B" else value
+            elif not isinstance(value, (bytes, bytearray)):
+                value = bytes(value)
+            _align(buf, 4)
+            buf += u32.pack(len(value))
+            buf += value
+
+        return write_bytes
+
+    if element[0] == "{":
+        key_sig, value_sig = split_signature(element[1:-1])
+        write_key = _writer(key_sig)
+        write_value = _writer(value_sig)
+
+        def write_dict(buf, value):
+            if isinstance(value, Variant):
+                value = value.value
+            _align(buf, 4)
+            at = len(buf)
+            buf += b"\0\0\0\0"
+            _align(buf, 8)
+            start = len(buf)
+            for k, v in value.items():
+                _align(buf, 8)
+                write_key(buf, k)
+                write_value(buf, v)
+            u32.pack_into(buf, at, len(buf) - start)
+
+        return write_dict
+
+    write_element = _writer(element)
+    alignment = _ALIGNMENT[element[0]]
+
+    def write_array(buf, value):
+        if isinstance(value, Variant):
+            value = value.value
+        _align(buf, 4)
+        at = len(buf)
+        buf += b"\0\0\0\0"
+        _align(buf, alignment)
+        start = len(buf)
+        for v in value:
+            write_element(buf, v)
+        u32.pack_into(buf, at, len(buf) - start)
+
+    return write_array
+
+
+def marshal(signature: str, values, buf: bytearray = None) -> bytearray:
+    """Marshal values in little endian byte order.
+
+    Args:
+        signature (str): The signature of the values.
+        values (list): The values, one per complete type of the signature.
+        buf (bytearray): Buffer to append to, starting at an 8 byte boundary.
+
+    Returns:
+        The buffer.
+
+    """
+    if buf is None:
+        buf = bytearray()
+    types = split_signature(signature)
+    if len(types) != len(values):
+        raise BleakError(
+            "Signature {0!r} does not match {1} values".format(signature, len(values))
+        )
+    for t, v in zip(types, values):
+        _writer(t)(buf, v)
+    return buf
+
+
+# Messages
+
+_HEADER = struct.Struct("<BBBBII")
+
+
+def encode_message(message: Message) -> bytes:
+    """Marshal a message, with ``message.serial`` set."""
+    body = marshal(message.signature, message.body) if message.signature else b""
+    fields = []
+    for code, name, sig in _HEADER_FIELDS:
+        value = getattr(message, name)
+        if value:
+            fields.append((code, Variant(sig, value)))
+    if message.unix_fds:
+        fields.append((_UNIX_FDS, Variant("u", len(message.unix_fds))))
+    buf = bytearray(
+        _HEADER.pack(ord("l"), message.type, message.flags, 1, len(body), message.serial)
+    )
+    _writer("a(yv)")(buf, fields)
+    _align(buf, 8)
+    buf += body
+    return bytes(buf)
+
+
+def message_length(buf) -> int:
+    """Get the total length of the message at the start of ``buf``.
+
+    Returns:
+        The length in bytes, or 0 if ``buf`` holds less than the fixed part
+        of the header.
+
+    """
+    if len(buf) < 16:
+        return 0
+    endian = _ENDIAN.get(buf[0])
+    if endian is None:
+        raise BleakError("Invalid D-Bus message endianness {0!r}".format(buf[0]))
+    body_length, _, fields_length = struct.unpack_from(endian + "III", buf, 4)
+    return _pad(16 + fields_length, 8) + body_length
+
+
+def decode_message(buf: bytes, unix_fds: list = None) -> Message:
+    """Unmarshal a complete message.
+
+    Args:
+        buf (bytes or memoryview): The message, as delimited by
+            :py:func:`message_length`. Byte arrays in the message are
+            copied out of it as ``bytes``, in one slice each.
+        unix_fds (list): File descriptors received on the connection and not
+            claimed yet. Those belonging to the message are taken off the
+            front.
+
+    Returns:
+        The :py:class:`Message`. Arguments of type ``h`` are indices into
+        its ``unix_fds``.
+
+    """
+    endian = _ENDIAN[buf[0]]
+    mtype, flags = buf[1], buf[2]
+    serial = struct.unpack_from(endian + "I", buf, 8)[0]
+    fields, pos = _reader("a(yv)", endian)(buf, 12)
+    message = Message(mtype, flags=flags, serial=serial)
+    for code, value in fields:
+        name = _FIELD_NAMES.get(code)
+        if name is not None:
+            setattr(message, name, value)
+        elif code == _UNIX_FDS and unix_fds:
+            message.unix_fds = unix_fds[:value]
+            del unix_fds[:value]
+    if message.signature:
+        # The body starts on an 8 byte boundary, so it can be read in place.
+        message.body, _ = unmarshal(message.signature, buf, _pad(pos, 8), endian)
+    return message
@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Advertisement monitors for passive scanning on BlueZ.
+
+BlueZ 5.56 and later can offload advertisement filtering to the controller:
+an application exports ``org.bluez.AdvertisementMonitor1`` objects carrying
+"or" patterns and registers them with ``AdvertisementMonitorManager1`` on the
+adapter. BlueZ then scans passively and only reports devices matching one of
+the patterns, through ``DeviceFound`` and ``DeviceLost`` calls on the monitor.
+
+The manager interface is experimental in some BlueZ releases and requires
+``bluetoothd`` to run with ``--experimental``.
+
+"""
+import itertools
+import logging
+from typing import Callable, Iterable, List, Optional
+
+from bleak.exc import BleakError
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.bus import ServiceObject
+from bleak.backends.bluezdbus.marshal import Variant
+from bleak.uuids import normalize_uuid_str
+
+logger = logging.getLogger(__name__)
+
+_BASE_UUID = "-0000-1000-8000-00805f9b34fb"
+_MAX_CONTENT = 31
+
+# Unique object paths for the monitors exported by this process.
+_paths = itertools.count()
+
+AD_TYPE_UUID16_INCOMPLETE = 0x02
+AD_TYPE_UUID16_COMPLETE = 0x03
+AD_TYPE_UUID128_INCOMPLETE = 0x06
+AD_TYPE_UUID128_COMPLETE = 0x07
+AD_TYPE_SERVICE_DATA16 = 0x16
+AD_TYPE_SERVICE_DATA128 = 0x21
+AD_TYPE_MANUFACTURER_DATA = 0xFF
+
+
+class OrPattern(object):
+    """A pattern of an advertisement monitor of type ``or_patterns``.
+
+    An advertisement matches if one of its AD structures of type
+    ``ad_type`` holds ``content`` at byte offset ``start``.
+
+    Args:
+        start (int): Offset into the data of the AD structure.
+        ad_type (int): The AD type, e.g. ``0xFF`` for manufacturer data.
+        content (bytes): The bytes to match, at most 31 of them.
+
+    """
+
+    __slots__ = ("start", "ad_type", "content")
+
+    def __init__(self, start: int, ad_type: int, content: bytes):
+        content = bytes(content)
+        if not 0 < len(content) <= _MAX_CONTENT:
+            raise BleakError(
+                "Pattern content must be between 1 and {0} bytes.".format(_MAX_CONTENT)
+            )
+        if not 0 <= start < _MAX_CONTENT or not 0 <= ad_type <= 0xFF:
+            raise BleakError("Invalid pattern start or AD type.")
+        self.start = start
+        self.ad_type = ad_type
+        self.content = content
+
+    def __repr__(self):
+        return "OrPattern({0}, 0x{1:02x}, {2!r})".format(
+            self.start, self.ad_type, self.content
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, OrPattern) and (
+            self.start, self.ad_type, self.content
+        ) == (other.start, other.ad_type, other.content)
+
+    def __hash__(self):
+        return hash((self.start, self.ad_type, self.content))
+
+
+def _uuid_bytes(uuid: str) -> Optional[bytes]:
+    # UUIDs are little endian over the air; 16-bit UUIDs are sent short.
+    uuid = normalize_uuid_str(uuid)
+    if uuid.startswith("0000") and uuid.endswith(_BASE_UUID):
+        return int(uuid[4:8], 16).to_bytes(2, "little")
+    return bytes.fromhex(uuid.replace("-", ""))[::-1]
+
+
+def _with_prefix(key: bytes, pattern) -> bytes:
+    # Patterns only match at one offset, so just an exact-match prefix of a
+    # data pattern starting right after the key can be folded in.
+    if pattern is not None and pattern.offset == 0 and pattern.key_length:
+        key += pattern.key
+    return key[:_MAX_CONTENT]
+
+
+def patterns_from_rules(rules) -> List[OrPattern]:
+    """Derive advertisement monitor patterns from advertisement rules.
+
+    The patterns let through at least every advertisement that one of the
+    rules matches, so that the rules can be applied to what BlueZ reports.
+    Company identifiers and service data UUIDs can be expressed. Service
+    UUIDs cannot: a pattern matches at a fixed offset of an AD structure,
+    while a service UUID may be anywhere in its list of UUIDs.
+
+    Args:
+        rules (iterable of AdvertisementRule): The rules.
+
+    Returns:
+        List of :py:class:`OrPattern`, without duplicates.
+
+    Raises:
+        BleakError: If a rule has neither a company identifier nor a service
+            data UUID, as no pattern could then let through everything it
+            matches. Give the patterns explicitly for such rules.
+
+    """
+    patterns = []
+    for rule in rules:
+        if rule.company_id is not None:
+            found = [
+                OrPattern(
+                    0,
+                    AD_TYPE_MANUFACTURER_DATA,
+                    _with_prefix(
+                        rule.company_id.to_bytes(2, "little"), rule.manufacturer_data
+                    ),
+                )
+            ]
+        elif rule.service_data_uuid is not None:
+            key = _uuid_bytes(rule.service_data_uuid)
+            found = [
+                OrPattern(
+                    0,
+                    AD_TYPE_SERVICE_DATA16 if len(key) == 2 else AD_TYPE_SERVICE_DATA128,
+                    _with_prefix(key, rule.service_data),
+                )
+            ]
+        else:
+            raise BleakError(
+                "{0!r} has no company_id or service_data_uuid to derive a "
+                "monitor pattern from. Pass or_patterns instead.".format(rule)
+            )
+        for pattern in found:
+            if pattern not in patterns:
+                patterns.append(pattern)
+    return patterns
+
+
+def _as_pattern(pattern) -> OrPattern:
+    if isinstance(pattern, OrPattern):
+        return pattern
+    return OrPattern(*pattern)
+
+
+class AdvertisementMonitor(ServiceObject):
+    """An exported ``org.bluez.AdvertisementMonitor1`` object.
+
+    Args:
+        path (str): The object path to export the monitor at.
+        patterns (iterable of OrPattern or tuple): The patterns, as
+            :py:class:`OrPattern` or ``(start, ad_type, content)`` tuples.
+        on_found (callable): Called with the object path of a device when
+            BlueZ starts reporting it.
+        on_lost (callable): Called with the object path of a device when
+            BlueZ stops reporting it.
+
+    Keyword Args:
+        rssi_low_threshold (int): RSSI in dBm below which a device is lost.
+        rssi_high_threshold (int): RSSI in dBm above which a device is found.
+        rssi_low_timeout (int): Seconds below ``rssi_low_threshold`` before
+            a device is lost.
+        rssi_high_timeout (int): Seconds above ``rssi_high_threshold`` before
+            a device is found.
+        rssi_sampling_period (int): How often BlueZ reports advertisements of
+            found devices, in units of 100 ms. 0 reports all of them, 255
+            only the first one.
+
+    """
+
+    interface = defs.ADVERTISEMENT_MONITOR_INTERFACE
+    methods = {
+        "Release": ("", "", "dbus_release"),
+        "Activate": ("", "", "dbus_activate"),
+        "DeviceFound": ("o", "", "dbus_device_found"),
+        "DeviceLost": ("o", "", "dbus_device_lost"),
+    }
+
+    def __init__(
+        self,
+        path: str,
+        patterns: Iterable,
+        on_found: Callable[[str], None],
+        on_lost: Callable[[str], None],
+        **kwargs
+    ):
+        super(AdvertisementMonitor, self).__init__(path)
+        self.patterns = [_as_pattern(p) for p in patterns]
+        if not self.patterns:
+            raise BleakError("An advertisement monitor needs at least one pattern.")
+        self.active = False
+        self._on_found = on_found
+        self._on_lost = on_lost
+        self._rssi = []
+        for key, name, signature in (
+            ("rssi_low_threshold", "RSSILowThreshold", "n"),
+            ("rssi_high_threshold", "RSSIHighThreshold", "n"),
+            ("rssi_low_timeout", "RSSILowTimeout", "q"),
+            ("rssi_high_timeout", "RSSIHighTimeout", "q"),
+            ("rssi_sampling_period", "RSSISamplingPeriod", "q"),
+        ):
+            if kwargs.get(key) is not None:
+                self._rssi.append((name, Variant(signature, kwargs[key])))
+
+    def get_properties(self):
+        props = {
+            "Type": Variant("s", "or_patterns"),
+            "Patterns": Variant(
+                "a(yyay)", [(p.start, p.ad_type, p.content) for p in self.patterns]
+            ),
+        }
+        props.update(self._rssi)
+        return props
+
+    def dbus_release(self):
+        logger.debug("Advertisement monitor {0} released".format(self.path))
+        self.active = False
+
+    def dbus_activate(self):
+        logger.debug("Advertisement monitor {0} activated".format(self.path))
+        self.active = True
+
+    def dbus_device_found(self, device):
+        self._on_found(device)
+
+    def dbus_device_lost(self, device):
+        self._on_lost(device)
+
+
+class _MonitorApplication(ServiceObject):
+    # The root of the monitors; the bus answers GetManagedObjects on it.
+    pass
+
+
+class MonitorRegistration(object):
+    """An advertisement monitor exported on a bus and registered with BlueZ.
+
+    Args:
+        bus (BaseMessageBus): The connection to export the monitor on.
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        adapter_path (str): Object path of the adapter.
+        monitor_args: Arguments of :py:class:`AdvertisementMonitor`, but for
+            the path.
+
+    """
+
+    def __init__(self, bus, loop, adapter_path: str, *monitor_args, **monitor_kwargs):
+        self.bus = bus
+        self.loop = loop
+        self.adapter_path = adapter_path
+        self.path = "/org/bleak/monitor{0}".format(next(_paths))
+        self.monitor = AdvertisementMonitor(
+            self.path + "/0", *monitor_args, **monitor_kwargs
+        )
+        self._registered = False
+
+    async def register(self) -> None:
+        """Export the monitor and register it with the adapter."""
+        self.bus.export(_MonitorApplication(self.path))
+        self.bus.export(self.monitor)
+        try:
+            await self.bus.call(
+                self.adapter_path,
+                "RegisterMonitor",
+                defs.ADVERTISEMENT_MONITOR_MANAGER_INTERFACE,
+                signature="o",
+                body=[self.path],
+            )
+        except Exception as e:
+            self._unexport()
+            raise BleakError("Could not register advertisement monitor: {0}".format(e))
+        self._registered = True
+
+    async def unregister(self) -> None:
+        """Unregister the monitor and remove it from the bus."""
+        if self._registered:
+            self._registered = False
+            try:
+                await self.bus.call(
+                    self.adapter_path,
+                    "UnregisterMonitor",
+                    defs.ADVERTISEMENT_MONITOR_MANAGER_INTERFACE,
+                    signature="o",
+                    body=[self.path],
+                )
+            except Exception as e:
+                logger.warning(
+                    "Could not unregister advertisement monitor: {0}".format(e)
+                )
+        self._unexport()
+
+    def _unexport(self):
+        for path in (self.monitor.path, self.path):
+            try:
+                self.bus.unexport(path)
+            except Exception:
+                pass
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""
+BlueZ scanner running discovery on several adapters at once.
+
+"""
+import asyncio
+import logging
+import time
+from asyncio.events import AbstractEventLoop
+from functools import partial
+from typing import Dict, List, Optional
+
+from bleak.exc import BleakError
+from bleak.backends.device import BLEDevice
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.pruner import DevicePruner
+from bleak.backends.bluezdbus.scanner import (
+    _ADVERTISEMENT_PROPS,
+    BleakScannerBlueZDBus,
+    _advertisement_from_device,
+    _bytes_values,
+    _device_info,
+)
+from bleak.backends.bluezdbus.session import _filter_on_device, get_scan_session
+
+logger = logging.getLogger(__name__)
+
+
+class Sighting(object):
+    """The latest sighting of a device on one adapter.
+
+    Attributes:
+        path (str): The D-Bus object path of the device on the adapter.
+        rssi (int): The latest signal strength in dBm, or ``None``.
+        last_seen (float): :py:func:`time.monotonic` time of the latest
+            signal concerning the device on the adapter.
+
+    """
+
+    __slots__ = ("path", "rssi", "last_seen")
+
+    def __init__(self, path: str, rssi: Optional[int], last_seen: float):
+        self.path = path
+        self.rssi = rssi
+        self.last_seen = last_seen
+
+    def __repr__(self):
+        return "Sighting({0!r}, rssi={1}, last_seen={2})".format(
+            self.path, self.rssi, self.last_seen
+        )
+
+
+class _FusedDevice(object):
+    __slots__ = ("props", "sightings")
+
+    def __init__(self):
+        self.props = {}
+        # adapter -> Sighting
+        self.sightings = {}
+
+    def expire(self, deadline: float) -> None:
+        # Sightings older than the deadline are dropped, except the latest.
+        if len(self.sightings) > 1:
+            fresh = {a: s for a, s in self.sightings.items() if s.last_seen >= deadline}
+            if not fresh:
+                adapter = max(self.sightings, key=lambda a: self.sightings[a].last_seen)
+                fresh = {adapter: self.sightings[adapter]}
+            self.sightings = fresh
+
+    def best(self) -> Sighting:
+        return max(
+            self.sightings.values(),
+            key=lambda s: s.rssi if s.rssi is not None else -1000,
+        )
+
+
+class BleakMultiAdapterScannerBlueZDBus(BleakScannerBlueZDBus):
+    """A Linux BLE Scanner merging discovery on several adapters into one table.
+
+    The scanner attaches to the shared scan session of each adapter and keys
+    its devices on their address, so a device seen by several adapters is
+    reported once, with the best RSSI over all adapters. The latest RSSI and
+    time of the latest sighting on each adapter are available through
+    :py:meth:`get_sightings` and in the ``sightings`` key of the
+    :py:attr:`bleak.backends.device.BLEDevice.details` dict. Sightings older
+    than ``sighting_max_age`` are dropped, so that an adapter which stopped
+    hearing a device no longer provides its RSSI.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+
+    Keyword Args:
+        adapters (list of str): Bluetooth devices to use for discovery.
+            Defaults to ``["hci0"]``.
+        sighting_max_age (float): Seconds a sighting on one adapter counts
+            towards the best RSSI of a device seen on several. Defaults to
+            ``max_age``, or to 30 seconds without it.
+
+    All other keyword arguments are the same as for
+    :py:class:`bleak.backends.bluezdbus.scanner.BleakScannerBlueZDBus`, except
+    that passive scanning is not supported. With ``prune_ttl``, stale device
+    objects are removed on every adapter.
+
+    """
+
+    def __init__(self, loop: AbstractEventLoop = None, **kwargs):
+        super(BleakMultiAdapterScannerBlueZDBus, self).__init__(loop, **kwargs)
+        if self._passive:
+            raise BleakError(
+                "Passive scanning is not supported on several adapters at once"
+            )
+        self._adapters = list(kwargs.get("adapters", ["hci0"]))
+        self._sighting_max_age = kwargs.get(
+            "sighting_max_age", self._max_age if self._max_age is not None else 30.0
+        )
+        # adapter -> ScanSession
+        self._sessions = {}
+        self._pruners = []
+
+    async def start(self):
+        # Registered before attaching, since an adapter may deliver signals
+        # while the others are still attaching.
+        self._sessions = {a: get_scan_session(self.loop, a) for a in self._adapters}
+        results = await asyncio.gather(
+            *[
+                s.attach(self, partial(self.parse_msg, a), self._filters)
+                for a, s in self._sessions.items()
+            ],
+            return_exceptions=True
+        )
+
+        self._cached_devices.clear()
+        errors = []
+        for (adapter, session), result in zip(list(self._sessions.items()), results):
+            if isinstance(result, Exception):
+                errors.append(result)
+                del self._sessions[adapter]
+                continue
+            for path, props in _filter_on_device(result):
+                if path.startswith(session.adapter_prefix):
+                    self._cached_devices[path] = props
+
+        if errors:
+            await self.stop()
+            raise errors[0]
+
+        if self._max_age is not None:
+            self._prune_task = self.loop.create_task(self._prune_devices())
+
+        if self._prune_ttl is not None:
+            for adapter in self._adapters:
+                pruner = DevicePruner(self.loop, adapter, self._prune_ttl)
+                self._pruners.append(pruner)
+                await pruner.start()
+
+    async def stop(self):
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            self._prune_task = None
+
+        pruners, self._pruners = self._pruners, []
+        await asyncio.gather(*[p.stop() for p in pruners])
+
+        sessions, self._sessions = self._sessions, {}
+        await asyncio.gather(*[s.detach(self) for s in sessions.values()])
+
+    async def get_discovered_devices(self) -> List[BLEDevice]:
+        self._prune()
+
+        discovered_devices = []
+        for address, entry in self._devices.items():
+            best = entry.best()
+            if not self._accepts(best.path, entry.props):
+                continue
+            discovered_devices.append(_device_from_entry(address, entry))
+        return discovered_devices
+
+    def get_sightings(self, address: str) -> Dict[str, Sighting]:
+        """Get the latest sighting of a device on each adapter.
+
+        Args:
+            address (str): The address of the device.
+
+        Returns:
+            Dict of adapter name to :py:class:`Sighting`. Empty if the device
+            is not known.
+
+        """
+        entry = self._devices.get(address.upper())
+        if entry is None:
+            return {}
+        entry.expire(time.monotonic() - self._sighting_max_age)
+        return dict(entry.sightings)
+
+    # Helper methods
+
+    def _prune(self):
+        super(BleakMultiAdapterScannerBlueZDBus, self)._prune()
+        deadline = time.monotonic() - self._sighting_max_age
+        for entry in self._devices.values():
+            entry.expire(deadline)
+
+    def _device_evicted(self, address, entry):
+        for sighting in entry.sightings.values():
+            self._cached_devices[sighting.path] = entry.props
+        self._device_lost(_device_from_entry(address, entry))
+
+    def parse_msg(self, adapter, message):
+        if message.member == "InterfacesAdded":
+            path = message.body[0]
+            changed = message.body[1].get(defs.DEVICE_INTERFACE)
+            if changed is None:
+                return
+        elif message.member == "PropertiesChanged":
+            iface, changed, invalidated = message.body
+            if iface != defs.DEVICE_INTERFACE:
+                return
+            path = message.path
+        else:
+            if self._callback is not None:
+                self._callback(message)
+            return
+
+        if not path.startswith(self._sessions[adapter].adapter_prefix):
+            return
+
+        # Object paths end with dev_XX_XX_XX_XX_XX_XX on all adapters.
+        address = path[-17:].replace("_", ":")
+        entry = self._devices.get(address)
+        if entry is None:
+            entry = _FusedDevice()
+            cached = self._cached_devices.pop(path, None)
+            if cached:
+                entry.props.update(cached)
+        entry.props.update(changed)
+
+        now = time.monotonic()
+        rssi = changed.get("RSSI")
+        sighting = entry.sightings.get(adapter)
+        if sighting is None:
+            entry.sightings[adapter] = Sighting(
+                path, rssi if rssi is not None else entry.props.get("RSSI"), now
+            )
+        else:
+            if rssi is not None:
+                sighting.rssi = rssi
+            sighting.last_seen = now
+        entry.expire(now - self._sighting_max_age)
+        self._devices[address] = entry
+
+        if not self._accepts(path, entry.props):
+            return
+
+        if self._advertisement_listeners and not _ADVERTISEMENT_PROPS.isdisjoint(
+            changed
+        ):
+            device = _device_from_entry(address, entry)
+            self._notify_listeners(
+                device, _advertisement_from_device(device, entry.props, message)
+            )
+
+        if self._callback is not None:
+            self._callback(message)
+
+
+def _entry_details(best, props, sightings):
+    props = dict(props)
+    props["RSSI"] = best.rssi
+    return {"path": best.path, "props": props, "sightings": sightings}
+
+
+def _device_from_entry(address, entry) -> BLEDevice:
+    best = entry.best()
+    props = entry.props
+    name, _, _, _ = _device_info(best.path, props)
+    return BLEDevice(
+        address,
+        name,
+        rssi=best.rssi,
+        details_factory=partial(
+            _entry_details, best, props, dict(entry.sightings)
+        ),
+        uuids=props.get("UUIDs", []),
+        manufacturer_data=_bytes_values(props.get("ManufacturerData")),
+        service_data=_bytes_values(props.get("ServiceData")),
+        tx_power=props.get("TxPower"),
+        address_type=props.get("AddressType"),
+    )
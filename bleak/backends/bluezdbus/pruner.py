@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Removal of stale device objects from BlueZ.
+
+bluetoothd keeps a ``Device1`` object for every device it has ever seen,
+until it is removed explicitly. On long-running hosts the object tree grows
+without bound, and so does the reply to every ``GetManagedObjects`` call.
+A :py:class:`DevicePruner` watches the signals of an adapter and calls
+``Adapter1.RemoveDevice`` for device objects that have been silent for a
+while and are neither paired, trusted nor connected.
+
+"""
+import asyncio
+import logging
+import time
+from asyncio.events import AbstractEventLoop
+from typing import Callable, List, Optional
+
+from bleak.backends.cache import DeviceCache
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.session import _filter_on_device, get_scan_session
+
+logger = logging.getLogger(__name__)
+
+# Device1 properties that keep a device object from being removed.
+_KEEP_PROPS = ("Paired", "Trusted", "Connected")
+
+
+def _flags(props: dict) -> dict:
+    return {k: props[k] for k in _KEEP_PROPS if k in props}
+
+
+class DevicePruner(object):
+    """Removes device objects that BlueZ has not reported for a while.
+
+    A device object counts as seen whenever it is added or one of its
+    properties changes, e.g. on every advertisement while scanning. Objects
+    present when the pruner starts count as seen at that time.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        device (str): The Bluetooth adapter, e.g. ``"hci0"``.
+        ttl (float): Seconds a device object may go unseen before it is
+            removed. Defaults to one hour.
+        interval (float): Seconds between checks. Defaults to a quarter of
+            ``ttl``.
+        clock (callable): Function returning the current time in seconds.
+            Defaults to :py:func:`time.monotonic`.
+
+    """
+
+    def __init__(
+        self,
+        loop: AbstractEventLoop = None,
+        device: str = "hci0",
+        ttl: float = 3600.0,
+        interval: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.loop = loop if loop else asyncio.get_event_loop()
+        self.device = device
+        self.ttl = ttl
+        self.interval = interval if interval is not None else max(ttl / 4.0, 1.0)
+        self.removed = 0
+        self._session = None
+        self._task = None
+        # device object path -> Paired, Trusted and Connected properties
+        self._devices = DeviceCache(ttl, clock=clock)
+
+    def __len__(self):
+        return len(self._devices)
+
+    async def start(self) -> None:
+        """Start watching the adapter and removing stale device objects."""
+        self._session = get_scan_session(self.loop, self.device)
+        objects = await self._session.attach(self, self._on_signal, discovery=False)
+        prefix = self._session.adapter_prefix
+        for path, props in _filter_on_device(objects):
+            if path.startswith(prefix):
+                self._devices[path] = _flags(props)
+        self._task = self.loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop removing device objects."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._session is not None:
+            await self._session.detach(self)
+            self._session = None
+        self._devices.clear()
+
+    async def prune(self) -> List[str]:
+        """Remove the device objects that have not been seen for ``ttl`` seconds.
+
+        Nothing is removed while the scan session of the adapter is paused
+        for a connection attempt.
+
+        Returns:
+            List of the object paths of the removed devices.
+
+        """
+        removed = []
+        if self._session is None or self._session.is_paused:
+            return removed
+        for path, flags in self._devices.prune():
+            if any(flags.values()):
+                # Check again once another ttl has passed.
+                self._devices[path] = flags
+                continue
+            try:
+                await self._session.bus.call(
+                    self._session.adapter_path,
+                    "RemoveDevice",
+                    defs.ADAPTER_INTERFACE,
+                    signature="o",
+                    body=[path],
+                )
+            except Exception as e:
+                logger.warning("Could not remove {0}: {1}".format(path, e))
+                continue
+            removed.append(path)
+        self.removed += len(removed)
+        if removed:
+            logger.debug("Removed {0} stale device objects".format(len(removed)))
+        return removed
+
+    # Helper methods
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.prune()
+            except Exception as e:
+                logger.error("Pruning device objects failed: {0}".format(e))
+
+    def _on_signal(self, message):
+        if message.member == "InterfacesAdded":
+            path, interfaces = message.body
+            props = interfaces.get(defs.DEVICE_INTERFACE)
+            if props is not None and path.startswith(self._session.adapter_prefix):
+                self._devices[path] = _flags(props)
+        elif message.member == "PropertiesChanged":
+            iface, changed, _ = message.body
+            path = message.path
+            if iface == defs.DEVICE_INTERFACE and path.startswith(
+                self._session.adapter_prefix
+            ):
+                flags = self._devices.get(path)
+                self._devices[path] = {**flags, **_flags(changed)} if flags else _flags(
+                    changed
+                )
+        elif message.member == "InterfacesRemoved":
+            path, interfaces = message.body
+            if defs.DEVICE_INTERFACE in interfaces:
+                self._devices.pop(path)
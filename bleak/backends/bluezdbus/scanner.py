@@ -1,46 +1,30 @@
 import logging
 import asyncio
 import pathlib
+import time
 import uuid
 from asyncio.events import AbstractEventLoop
-from functools import wraps
+from functools import partial, wraps
 from typing import Callable, Any, Union, List
 
 
 from bleak.backends.scanner import BaseBleakScanner
-from bleak.backends.device import BLEDevice
+from bleak.backends.cache import DeviceCache
+from bleak.backends.device import AdvertisementData, BLEDevice
+from bleak.backends.flightrecorder import SIGNAL
+from bleak.backends.trace import TRACER
+from bleak.exc import BleakError
 from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.monitor import MonitorRegistration, patterns_from_rules
+from bleak.backends.bluezdbus.pruner import DevicePruner
+from bleak.backends.bluezdbus.session import _filter_on_device, get_scan_session
 from bleak.backends.bluezdbus.utils import validate_mac_address
-
-from txdbus import client
-from twisted.internet.asyncioreactor import AsyncioSelectorReactor
-from twisted.internet.error import ReactorNotRunning
+from bleak.uuids import normalize_uuid_str
 
 logger = logging.getLogger(__name__)
 _here = pathlib.Path(__file__).parent
 
 
-def _filter_on_adapter(objs, pattern="hci0"):
-    for path, interfaces in objs.items():
-        adapter = interfaces.get("org.bluez.Adapter1")
-        if adapter is None:
-            continue
-
-        if not pattern or pattern == adapter["Address"] or path.endswith(pattern):
-            return path, interfaces
-
-    raise Exception("Bluetooth adapter not found")
-
-
-def _filter_on_device(objs):
-    for path, interfaces in objs.items():
-        device = interfaces.get("org.bluez.Device1")
-        if device is None:
-            continue
-
-        yield path, device
-
-
 def _device_info(path, props):
     try:
         name = props.get("Name", props.get("Alias", path.split("/")[-1]))
@@ -59,6 +43,76 @@ def _device_info(path, props):
         return None, None, None, None
 
 
+def _device_summary(path, props):
+    name, address, rssi, path = _device_info(path, props)
+    return {"name": name, "address": address, "rssi": rssi, "path": path}
+
+
+def _signal_info(message):
+    return {
+        "member": message.member,
+        "interface": message.interface,
+        "path": message.path,
+        "body": message.body,
+    }
+
+
+def _matches_props(matcher, path, props):
+    _, address, _, _ = _device_info(path, props)
+    return matcher.matches(
+        address,
+        props.get("Name"),
+        props.get("RSSI"),
+        props.get("ManufacturerData"),
+        props.get("ServiceData"),
+        props.get("UUIDs"),
+    )
+
+
+# Device1 properties that change when an advertisement is received.
+_ADVERTISEMENT_PROPS = frozenset(
+    ("RSSI", "ManufacturerData", "ServiceData", "UUIDs", "TxPower", "Name")
+)
+
+
+def _bytes_values(data):
+    # Values are bytes already, unless decoded into lists of ints by the
+    # txdbus transport.
+    if not data:
+        return {}
+    return {k: bytes(v) for k, v in data.items()}
+
+
+def _device_from_props(path, props):
+    name, address, _, path = _device_info(path, props)
+    if address is None:
+        return None
+    return BLEDevice(
+        address,
+        name,
+        {"path": path, "props": props},
+        rssi=props.get("RSSI"),
+        uuids=props.get("UUIDs", []),
+        manufacturer_data=_bytes_values(props.get("ManufacturerData")),
+        service_data=_bytes_values(props.get("ServiceData")),
+        tx_power=props.get("TxPower"),
+        address_type=props.get("AddressType"),
+    )
+
+
+def _advertisement_from_device(device, props, message):
+    return AdvertisementData(
+        local_name=props.get("Name"),
+        rssi=device.rssi,
+        manufacturer_data=device.manufacturer_data,
+        service_data=device.service_data,
+        service_uuids=device.uuids,
+        tx_power=device.tx_power,
+        timestamp=time.monotonic(),
+        platform_data=message,
+    )
+
+
 class BleakScannerBlueZDBus(BaseBleakScanner):
     """The native Linux Bleak BLE Scanner.
 
@@ -66,116 +120,153 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
         loop (asyncio.events.AbstractEventLoop): The event loop to use.
 
     Keyword Args:
+        device (str): Bluetooth device to use for discovery.
+        filters (dict): A dict of filters to be applied on discovery.
+        rules (list of AdvertisementRule): Declarative rules that
+            advertisements must match before the detection callback is called.
+        max_age (float): Seconds a device may go without being seen before
+            it is forgotten and the device lost callback is called. Defaults
+            to ``None``, i.e. devices are never forgotten.
+        max_devices (int): Maximum number of devices to keep track of. The
+            least recently seen device is forgotten when the limit is hit.
+            Defaults to ``None``, i.e. no limit.
+        scanning_mode (str): Set to ``"passive"`` to scan passively through
+            an advertisement monitor instead of running discovery. Requires
+            BlueZ 5.56 or later, possibly with experimental features enabled.
+        or_patterns (list of OrPattern or tuple): The patterns of the
+            advertisement monitor in passive mode, see
+            :py:class:`bleak.backends.bluezdbus.monitor.OrPattern`. Defaults
+            to patterns derived from ``rules``.
+        rssi_low_threshold, rssi_high_threshold, rssi_low_timeout,
+        rssi_high_timeout, rssi_sampling_period (int): RSSI parameters of the
+            advertisement monitor in passive mode, see
+            :py:class:`bleak.backends.bluezdbus.monitor.AdvertisementMonitor`.
+        prune_ttl (float): Remove device objects that BlueZ has not reported
+            for this many seconds and that are neither paired, trusted nor
+            connected, while the scanner runs. See
+            :py:class:`bleak.backends.bluezdbus.pruner.DevicePruner`. Defaults
+            to ``None``, i.e. device objects are left alone.
 
     """
     def __init__(self, loop: AbstractEventLoop = None, **kwargs):
         super(BleakScannerBlueZDBus, self).__init__(loop, **kwargs)
 
         self._device = kwargs.get("device", "hci0")
-        self._reactor = None
-        self._bus = None
-
-        self._cached_devices = {}
-        self._devices = {}
-        self._rules = list()
+        self._session = None
+
+        # Devices that have not been seen for ``max_age`` seconds, or that
+        # fall outside the ``max_devices`` most recently seen, are evicted.
+        self._max_age = kwargs.get("max_age")
+        self._max_devices = kwargs.get("max_devices")
+        self._cached_devices = DeviceCache(self._max_age, self._max_devices)
+        self._devices = DeviceCache(
+            self._max_age, self._max_devices, on_evict=self._device_evicted
+        )
+        self._prune_task = None
 
         # Discovery filters
-        self._filters = kwargs.get("filters", {})
-        self._filters["Transport"] = "le"
+        self._set_filters(kwargs.get("filters", {}))
 
         self._adapter_path = None
-        self._interface = None
 
         self._callback = None
 
+        # Passive scanning through an advertisement monitor
+        self._passive = kwargs.get("scanning_mode", "active").lower() == "passive"
+        self._or_patterns = kwargs.get("or_patterns")
+        self._monitor_kwargs = {
+            k: kwargs[k]
+            for k in (
+                "rssi_low_threshold",
+                "rssi_high_threshold",
+                "rssi_low_timeout",
+                "rssi_high_timeout",
+                "rssi_sampling_period",
+            )
+            if k in kwargs
+        }
+        self._monitor = None
+        # Object paths of the devices the monitor has reported as found
+        self._found = set()
+
+        self._prune_ttl = kwargs.get("prune_ttl")
+        self._pruner = None
+
     async def start(self):
-        self._reactor = AsyncioSelectorReactor(self.loop)
-        self._bus = await client.connect(self._reactor, "system").asFuture(self.loop)
-
-        # Add signal listeners
-        self._rules.append(
-            await self._bus.addMatch(
-                self.parse_msg,
-                interface="org.freedesktop.DBus.ObjectManager",
-                member="InterfacesAdded",
-            ).asFuture(self.loop)
+        patterns = None
+        if self._passive:
+            patterns = self._or_patterns
+            if patterns is None:
+                if self._matcher is None:
+                    raise BleakError(
+                        "Passive scanning requires or_patterns or rules to "
+                        "derive them from."
+                    )
+                patterns = patterns_from_rules(self._matcher.rules)
+
+        self._session = get_scan_session(self.loop, self._device)
+        objects = await self._session.attach(
+            self, self.parse_msg, self._filters, discovery=not self._passive
         )
+        self._adapter_path = self._session.adapter_path
+
+        if self._passive:
+            self._found.clear()
+            self._monitor = MonitorRegistration(
+                self._session.bus,
+                self.loop,
+                self._adapter_path,
+                patterns,
+                self._monitor_found,
+                self._monitor_lost,
+                **self._monitor_kwargs
+            )
+            try:
+                await self._monitor.register()
+            except Exception:
+                self._monitor = None
+                await self._session.detach(self)
+                self._session = None
+                raise
 
-        self._rules.append(
-            await self._bus.addMatch(
-                self.parse_msg,
-                interface="org.freedesktop.DBus.ObjectManager",
-                member="InterfacesRemoved",
-            ).asFuture(self.loop)
-        )
+        # Get cached device properties
+        self._cached_devices.clear()
+        for path, props in _filter_on_device(objects):
+            if path.startswith(self._session.adapter_prefix):
+                self._cached_devices[path] = props
 
-        self._rules.append(
-            await self._bus.addMatch(
-                self.parse_msg,
-                interface="org.freedesktop.DBus.Properties",
-                member="PropertiesChanged",
-            ).asFuture(self.loop)
-        )
+        if self._max_age is not None:
+            self._prune_task = self.loop.create_task(self._prune_devices())
 
-        # Find the HCI device to use for scanning and get cached device properties
-        objects = await self._bus.callRemote(
-            "/",
-            "GetManagedObjects",
-            interface=defs.OBJECT_MANAGER_INTERFACE,
-            destination=defs.BLUEZ_SERVICE,
-        ).asFuture(self.loop)
-        self._adapter_path, self._interface = _filter_on_adapter(objects, self._device)
-        self._cached_devices = dict(_filter_on_device(objects))
-
-        # Apply the filters
-        await self._bus.callRemote(
-            self._adapter_path,
-            "SetDiscoveryFilter",
-            interface="org.bluez.Adapter1",
-            destination="org.bluez",
-            signature="a{sv}",
-            body=[self._filters],
-        ).asFuture(self.loop)
-
-        # Start scanning
-        await self._bus.callRemote(
-            self._adapter_path,
-            "StartDiscovery",
-            interface="org.bluez.Adapter1",
-            destination="org.bluez",
-        ).asFuture(self.loop)
+        if self._prune_ttl is not None:
+            self._pruner = DevicePruner(self.loop, self._device, self._prune_ttl)
+            await self._pruner.start()
 
     async def stop(self):
-        await self._bus.callRemote(
-            self._adapter_path,
-            "StopDiscovery",
-            interface="org.bluez.Adapter1",
-            destination="org.bluez",
-        ).asFuture(self.loop)
-
-        for rule in self._rules:
-            await self._bus.delMatch(rule).asFuture(self.loop)
-        self._rules.clear()
-
-        # Try to disconnect the System Bus.
-        try:
-            self._bus.disconnect()
-        except Exception as e:
-            logger.error("Attempt to disconnect system bus failed: {0}".format(e))
-
-        try:
-            self._reactor.stop()
-        except ReactorNotRunning:
-            pass
-
-        self._bus = None
-        self._reactor = None
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            self._prune_task = None
+
+        if self._pruner is not None:
+            await self._pruner.stop()
+            self._pruner = None
+
+        if self._monitor is not None:
+            await self._monitor.unregister()
+            self._monitor = None
+            self._found.clear()
+
+        await self._session.detach(self)
+        self._session = None
 
     async def set_scanning_filter(self, **kwargs):
-        self._filters = kwargs.get("filters", {})
-        self._filters["Transport"] = "le"
+        self._set_filters(kwargs.get("filters", {}))
+        if "rules" in kwargs:
+            self.set_advertisement_rules(kwargs["rules"])
 
     async def get_discovered_devices(self) -> List[BLEDevice]:
+        self._prune()
+
         # Reduce output.
         discovered_devices = []
         for path, props in self._devices.items():
@@ -184,20 +275,11 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
                     "Disregarding %s since no properties could be obtained." % path
                 )
                 continue
-            name, address, _, path = _device_info(path, props)
-            if address is None:
+            if not self._accepts(path, props):
                 continue
-            uuids = props.get("UUIDs", [])
-            manufacturer_data = props.get("ManufacturerData", {})
-            discovered_devices.append(
-                BLEDevice(
-                    address,
-                    name,
-                    {"path": path, "props": props},
-                    uuids=uuids,
-                    manufacturer_data=manufacturer_data,
-                )
-            )
+            device = _device_from_props(path, props)
+            if device is not None:
+                discovered_devices.append(device)
         return discovered_devices
 
     def register_detection_callback(self, callback: Callable):
@@ -213,13 +295,91 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
 
     # Helper methods
 
+    def _set_filters(self, filters):
+        self._filters = filters
+        self._filters["Transport"] = "le"
+        self._filter_uuids = frozenset(
+            normalize_uuid_str(u) for u in filters.get("UUIDs", ())
+        )
+
+    def _accepts(self, path, props) -> bool:
+        # Several scanners can share one discovery session, with a discovery
+        # filter that lets through what any of them asked for, so each scanner
+        # applies its own discovery filter as well.
+        if self._filter_uuids and self._filter_uuids.isdisjoint(
+            props.get("UUIDs", ())
+        ):
+            return False
+        rssi = self._filters.get("RSSI")
+        if rssi is not None and props.get("RSSI", rssi - 1) < rssi:
+            return False
+        return self._matcher is None or _matches_props(self._matcher, path, props)
+
+    def _prune(self):
+        self._devices.prune()
+        self._cached_devices.prune()
+
+    async def _prune_devices(self):
+        interval = max(self._max_age / 4.0, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            self._prune()
+
+    def _device_evicted(self, path, props):
+        # Keep the properties in the (equally bounded) cache, so that the
+        # device is restored in full if it shows up again shortly.
+        self._cached_devices[path] = props
+        if props:
+            device = _device_from_props(path, props)
+            if device is not None:
+                self._device_lost(device)
+
+    def _monitor_found(self, path):
+        if not path.startswith(self._session.adapter_prefix):
+            return
+        self._found.add(path)
+        props = {
+            **self._devices.get(path, {}),
+            **(self._cached_devices.pop(path, None) or {}),
+        }
+        self._devices[path] = props
+        if not self._advertisement_listeners or not self._accepts(path, props):
+            return
+        device = _device_from_props(path, props)
+        if device is not None:
+            self._notify_listeners(
+                device, _advertisement_from_device(device, props, None)
+            )
+
+    def _monitor_lost(self, path):
+        self._found.discard(path)
+        props = self._devices.pop(path, None)
+        if props is not None:
+            self._device_evicted(path, props)
+
+    def _cache_unfound(self, path, changed) -> bool:
+        # In passive mode, properties of devices the monitor has not reported
+        # are only cached until it does.
+        if not self._passive or path in self._found:
+            return False
+        cached = self._cached_devices.get(path)
+        self._cached_devices[path] = {**cached, **changed} if cached else changed
+        return True
+
     def parse_msg(self, message):
+        if self.flight_recorder is not None:
+            self.flight_recorder.record(SIGNAL, message.member, message.path)
         if message.member == "InterfacesAdded":
             msg_path = message.body[0]
+            if not msg_path.startswith(self._session.adapter_prefix):
+                return
             try:
                 device_interface = message.body[1].get("org.bluez.Device1", {})
             except Exception as e:
                 raise e
+            changed = device_interface
+            if self._cache_unfound(msg_path, changed):
+                return
             self._devices[msg_path] = (
                 {**self._devices[msg_path], **device_interface}
                 if msg_path in self._devices
@@ -231,12 +391,16 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
                 return
 
             msg_path = message.path
+            if not msg_path.startswith(self._session.adapter_prefix):
+                return
+            if self._cache_unfound(msg_path, changed):
+                return
             # the PropertiesChanged signal only sends changed properties, so we
             # need to get remaining properties from cached_devices. However, we
             # don't want to add all cached_devices to the devices dict since
             # they may not actually be nearby or powered on.
             if msg_path not in self._devices and msg_path in self._cached_devices:
-                self._devices[msg_path] = self._cached_devices[msg_path]
+                self._devices[msg_path] = self._cached_devices.pop(msg_path)
             self._devices[msg_path] = (
                 {**self._devices[msg_path], **changed} if msg_path in self._devices else changed
             )
@@ -244,25 +408,38 @@ class BleakScannerBlueZDBus(BaseBleakScanner):
             message.member == "InterfacesRemoved"
             and message.body[1][0] == defs.BATTERY_INTERFACE
         ):
-            logger.info(
-                "{0}, {1} ({2}): {3}".format(
-                    message.member, message.interface, message.path, message.body
-                )
-            )
+            if TRACER.enabled:
+                TRACER.emit("scan.signal", self._device, partial(_signal_info, message))
             return
         else:
             msg_path = message.path
-            logger.info(
-                "{0}, {1} ({2}): {3}".format(
-                    message.member, message.interface, message.path, message.body
-                )
-            )
+            changed = ()
+            if TRACER.enabled:
+                TRACER.emit("scan.signal", self._device, partial(_signal_info, message))
 
-        logger.info(
-            "{0}, {1} ({2} dBm), Object Path: {3}".format(
-                *_device_info(msg_path, self._devices.get(msg_path))
+        if msg_path in self._devices and not self._accepts(
+            msg_path, self._devices[msg_path]
+        ):
+            return
+
+        if TRACER.enabled:
+            TRACER.emit(
+                "scan.device",
+                self._device,
+                partial(_device_summary, msg_path, self._devices.get(msg_path)),
             )
-        )
+
+        if (
+            self._advertisement_listeners
+            and msg_path in self._devices
+            and not _ADVERTISEMENT_PROPS.isdisjoint(changed)
+        ):
+            props = self._devices[msg_path]
+            device = _device_from_props(msg_path, props)
+            if device is not None:
+                self._notify_listeners(
+                    device, _advertisement_from_device(device, props, message)
+                )
 
         if self._callback is not None:
             self._callback(message)
@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+Shared, reference counted discovery sessions on BlueZ adapters.
+
+BlueZ keeps one discovery session per D-Bus connection and adapter, so two
+scanners with connections of their own will happily stop each other's
+discovery. Instead, all scanners and ``discover`` calls on an adapter attach
+to the same :py:class:`ScanSession`, which owns the bus connection, the signal
+match rules and the discovery, and which only stops discovering when the last
+consumer detaches.
+
+Connection attempts on the adapter can pause the session, see
+:py:class:`ScanPolicy`. Consumers attached to look up a device for a
+connection attempt keep discovery running while the session is paused.
+
+"""
+import asyncio
+import enum
+import logging
+import re
+from typing import Callable
+
+from bleak.exc import BleakError
+from bleak.backends import metrics
+from bleak.backends.bluezdbus import defs, signals
+from bleak.backends.bluezdbus.bus import connect_system_bus
+
+logger = logging.getLogger(__name__)
+
+_ADAPTER_NAME = re.compile(r"^hci[0-9]+$")
+
+# (event loop, adapter) -> ScanSession, pruned of closed event loops
+_sessions = {}
+
+
+def _filter_on_adapter(objs, pattern="hci0"):
+    for path, interfaces in objs.items():
+        adapter = interfaces.get("org.bluez.Adapter1")
+        if adapter is None:
+            continue
+
+        if not pattern or pattern == adapter["Address"] or path.endswith(pattern):
+            return path, interfaces
+
+    raise BleakError("Bluetooth adapter not found")
+
+
+def _filter_on_device(objs):
+    for path, interfaces in objs.items():
+        device = interfaces.get("org.bluez.Device1")
+        if device is None:
+            continue
+
+        yield path, device
+
+
+class ScanPolicy(enum.Enum):
+    """How a connection attempt treats shared scanning on the same adapter.
+
+    ``LATENCY`` pauses discovery on the adapter for the duration of the
+    connection attempt, which shortens connection establishment and improves
+    the success rate on most controllers. ``COVERAGE`` keeps discovering, at
+    the cost of slower connections.
+    """
+
+    LATENCY = "latency"
+    COVERAGE = "coverage"
+
+
+def merge_discovery_filters(filters) -> dict:
+    """Merge the discovery filters of several consumers into one.
+
+    BlueZ only allows one discovery filter per D-Bus connection, so the filter
+    set on a shared session must let through everything that any of its
+    consumers asked for. Consumers apply their own filters to what they
+    receive.
+
+    Args:
+        filters (list of dict): The ``SetDiscoveryFilter`` parameters of each
+            consumer.
+
+    Returns:
+        The merged ``SetDiscoveryFilter`` parameters.
+
+    """
+    filters = list(filters)
+    merged = {"Transport": "le"}
+    if not filters:
+        return merged
+
+    if all("UUIDs" in f for f in filters):
+        uuids = set()
+        for f in filters:
+            uuids.update(f["UUIDs"])
+        merged["UUIDs"] = sorted(uuids)
+    if all("RSSI" in f for f in filters):
+        merged["RSSI"] = min(f["RSSI"] for f in filters)
+    elif all("Pathloss" in f for f in filters):
+        merged["Pathloss"] = max(f["Pathloss"] for f in filters)
+    duplicates = [f.get("DuplicateData") for f in filters]
+    if all(d is False for d in duplicates):
+        merged["DuplicateData"] = False
+    elif any(duplicates):
+        merged["DuplicateData"] = True
+
+    # Any other parameter is only kept if all consumers agree on it.
+    for key, value in filters[0].items():
+        if key in merged or key in ("UUIDs", "RSSI", "Pathloss", "DuplicateData"):
+            continue
+        if all(key in f and f[key] == value for f in filters[1:]):
+            merged[key] = value
+    return merged
+
+
+class ScanSession(object):
+    """A discovery session on one adapter, shared by any number of consumers.
+
+    Use :py:func:`get_scan_session` to get the session of an adapter rather
+    than creating one directly.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        device (str): The Bluetooth adapter, e.g. ``"hci0"``.
+
+    """
+
+    def __init__(self, loop, device="hci0"):
+        self.loop = loop
+        self.device = device
+        self.adapter_path = None
+        self.adapter_prefix = None
+
+        self._bus = None
+        self._rules = list()
+        self._lock = None
+        self._discovering = False
+        self._filter = None
+        self._pauses = 0
+
+        # consumer -> (callback, discovery filters, wants discovery, lookup)
+        self._consumers = {}
+
+    def __len__(self):
+        return len(self._consumers)
+
+    @property
+    def bus(self):
+        """The D-Bus connection of the session, or ``None`` if not attached"""
+        return self._bus
+
+    @property
+    def is_discovering(self) -> bool:
+        """If the session has discovery running on the adapter"""
+        return self._discovering
+
+    @property
+    def is_paused(self) -> bool:
+        """If discovery is paused for a connection attempt"""
+        return self._pauses > 0
+
+    async def attach(
+        self,
+        consumer,
+        callback: Callable,
+        filters: dict = None,
+        discovery: bool = True,
+        lookup: bool = False,
+    ) -> dict:
+        """Attach a consumer and start discovery if it is the first one.
+
+        Args:
+            consumer: Any hashable object identifying the consumer.
+            callback: Function called with every signal message received.
+            filters (dict): ``SetDiscoveryFilter`` parameters of the consumer.
+            discovery (bool): If the consumer needs discovery to run. Consumers
+                that only listen to signals, e.g. passive scanners, set this
+                to ``False``.
+            lookup (bool): If the consumer looks up a device to connect to.
+                Discovery runs for such consumers even while the session is
+                paused, since other connection attempts cannot proceed
+                without it.
+
+        Returns:
+            The result of a ``GetManagedObjects`` call made when attaching.
+
+        """
+        async with self._get_lock():
+            if not self._consumers:
+                objects = await self._open()
+            else:
+                objects = await self._get_managed_objects()
+            self._consumers[consumer] = (
+                callback,
+                dict(filters or {}),
+                discovery,
+                lookup,
+            )
+            if not discovery:
+                return objects
+            try:
+                await self._apply_filters()
+                await self._update_discovery()
+            except Exception:
+                await self._detach(consumer)
+                raise
+            return objects
+
+    async def detach(self, consumer) -> None:
+        """Detach a consumer, and stop discovery if it was the last one.
+
+        Args:
+            consumer: The object given when attaching.
+
+        """
+        async with self._get_lock():
+            await self._detach(consumer)
+
+    async def pause(self) -> None:
+        """Pause discovery, e.g. for the duration of a connection attempt.
+
+        Pauses nest; discovery is resumed when every :py:meth:`pause` has
+        been matched by a :py:meth:`resume`. Consumers attaching while the
+        session is paused do not start discovery until then, unless they
+        attach to look up a device.
+
+        """
+        async with self._get_lock():
+            self._pauses += 1
+            if self._bus is not None:
+                await self._update_discovery()
+
+    async def resume(self) -> None:
+        """Resume discovery paused by :py:meth:`pause`.
+
+        Raises:
+            BleakError: If the session is not paused.
+
+        """
+        async with self._get_lock():
+            if not self._pauses:
+                raise BleakError("Scan session is not paused")
+            self._pauses -= 1
+            if self._bus is not None:
+                await self._update_discovery()
+
+    async def _detach(self, consumer):
+        if self._consumers.pop(consumer, None) is None:
+            return
+        if self._consumers:
+            if self._wants_discovery():
+                await self._apply_filters()
+            await self._update_discovery()
+            return
+
+        try:
+            await self._stop_discovery()
+        finally:
+            await self._close()
+
+    # Helper methods
+
+    def _wants_discovery(self) -> bool:
+        return any(
+            discovery and (lookup or not self._pauses)
+            for _, _, discovery, lookup in self._consumers.values()
+        )
+
+    async def _update_discovery(self):
+        if self._wants_discovery():
+            await self._start_discovery()
+        else:
+            await self._stop_discovery()
+
+    def _get_lock(self):
+        # Created lazily, so that it binds to the running event loop.
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _open(self) -> dict:
+        self._bus = await connect_system_bus(self.loop)
+        self._bus.stats_device = self.device
+        try:
+            # The rules are scoped to the adapter, so its path is needed
+            # first; it is only looked up if not given by name.
+            if _ADAPTER_NAME.match(self.device):
+                adapter_path = "/org/bluez/" + self.device
+            else:
+                adapter_path, _ = _filter_on_adapter(
+                    await self._get_managed_objects(), self.device
+                )
+            self._rules = await signals.add_match_rules(
+                self._bus, self._dispatch, signals.adapter_match_rules(adapter_path)
+            )
+
+            # Get cached device properties, and check that the adapter exists.
+            objects = await self._get_managed_objects()
+            self.adapter_path, _ = _filter_on_adapter(objects, self.device)
+            self.adapter_prefix = self.adapter_path + "/"
+        except Exception:
+            await self._close()
+            raise
+        return objects
+
+    async def _close(self):
+        await signals.remove_match_rules(self._bus, self._rules)
+        self._rules = []
+
+        # Try to disconnect the System Bus.
+        try:
+            self._bus.disconnect()
+        except Exception as e:
+            logger.error("Attempt to disconnect system bus failed: {0}".format(e))
+
+        self._bus = None
+        self._filter = None
+        self._discovering = False
+
+    async def _get_managed_objects(self) -> dict:
+        return await self._bus.call(
+            "/",
+            "GetManagedObjects",
+            defs.OBJECT_MANAGER_INTERFACE,
+        )
+
+    async def _apply_filters(self):
+        merged = merge_discovery_filters(
+            f for _, f, discovery, _ in self._consumers.values() if discovery
+        )
+        if merged == self._filter:
+            return
+        await self._bus.call(
+            self.adapter_path,
+            "SetDiscoveryFilter",
+            defs.ADAPTER_INTERFACE,
+            signature="a{sv}",
+            body=[merged],
+        )
+        self._filter = merged
+
+    async def _start_discovery(self):
+        if self._discovering:
+            return
+        await self._bus.call(
+            self.adapter_path,
+            "StartDiscovery",
+            defs.ADAPTER_INTERFACE,
+        )
+        self._discovering = True
+
+    async def _stop_discovery(self):
+        if not self._discovering:
+            return
+        self._discovering = False
+        await self._bus.call(
+            self.adapter_path,
+            "StopDiscovery",
+            defs.ADAPTER_INTERFACE,
+        )
+
+    def _dispatch(self, message):
+        if message.member == "PropertiesChanged":
+            if message.body[0] == defs.DEVICE_INTERFACE and "RSSI" in message.body[1]:
+                metrics.count_advertisements(self.device)
+        elif message.member == "InterfacesAdded":
+            if defs.DEVICE_INTERFACE in message.body[1]:
+                metrics.count_advertisements(self.device)
+        for callback, _, _, _ in list(self._consumers.values()):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.exception(
+                    "Scan session consumer failed on {0}: {1}".format(
+                        message.member, e
+                    )
+                )
+
+
+def get_scan_session(loop, device="hci0") -> ScanSession:
+    """Get the shared scan session of an adapter, creating it if needed.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+        device (str): The Bluetooth adapter, e.g. ``"hci0"``.
+
+    Returns:
+        The :py:class:`ScanSession` of the adapter on this event loop.
+
+    """
+    # Sessions of closed event loops are dropped, along with the loop.
+    for key in [k for k in _sessions if k[0].is_closed()]:
+        del _sessions[key]
+    session = _sessions.get((loop, device))
+    if session is None:
+        session = _sessions[(loop, device)] = ScanSession(loop, device)
+    return session
@@ -1,63 +1,208 @@
 # -*- coding: utf-8 -*-
+"""
+D-Bus signal subscriptions of the BlueZ backend.
 
-from bleak.backends.bluezdbus.defs import PROPERTIES_INTERFACE, OBJECT_MANAGER_INTERFACE
+All match rules are defined here. They are as narrow as BlueZ's object tree
+allows, so that the bus daemon drops the signals of other services, adapters
+and devices instead of forwarding them to be discarded in Python.
+
+"""
+import logging
+import warnings
+
+from bleak.backends.bluezdbus.defs import (
+    BLUEZ_SERVICE,
+    DEVICE_INTERFACE,
+    GATT_CHARACTERISTIC_INTERFACE,
+    OBJECT_MANAGER_INTERFACE,
+    PROPERTIES_INTERFACE,
+)
+
+logger = logging.getLogger(__name__)
 
 
 def listen_properties_changed(bus, loop, callback):
-    """Create a future for a PropertiesChanged signal listener.
+    """Create an awaitable for a PropertiesChanged signal listener.
+
+    Matches the property changes of all BlueZ objects. Deprecated: use
+    :py:func:`device_match_rules` or :py:func:`adapter_match_rules` with
+    :py:func:`add_match_rules` instead.
 
     Args:
-        bus: The system bus object to use.
-        loop: The asyncio loop to use for adding the future to.
+        bus (BaseMessageBus): The system bus object to use.
+        loop: The asyncio loop, kept for backwards compatibility.
         callback: The callback function to run when signal is received.
 
     Returns:
         Integer rule id.
 
     """
-    return bus.addMatch(
+    warnings.warn(
+        "listen_properties_changed() is deprecated, use add_match_rules() with "
+        "device_match_rules() or adapter_match_rules() instead",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    return bus.add_match(
         callback,
+        sender=BLUEZ_SERVICE,
         interface=PROPERTIES_INTERFACE,
         member="PropertiesChanged",
-        path_namespace="/org/bluez"
-    ).asFuture(loop)
+        path_namespace="/org/bluez",
+    )
 
 
 def listen_interfaces_added(bus, loop, callback):
-    """Create a future for a InterfacesAdded signal listener.
+    """Create an awaitable for an InterfacesAdded signal listener.
 
     Args:
-        bus: The system bus object to use.
-        loop: The asyncio loop to use for adding the future to.
+        bus (BaseMessageBus): The system bus object to use.
+        loop: The asyncio loop, kept for backwards compatibility.
         callback: The callback function to run when signal is received.
 
     Returns:
         Integer rule id.
 
     """
-    return bus.addMatch(
+    return bus.add_match(
         callback,
+        sender=BLUEZ_SERVICE,
         interface=OBJECT_MANAGER_INTERFACE,
         member="InterfacesAdded",
-        path_namespace="/org/bluez"
-    ).asFuture(loop)
+        path="/",
+        arg0path="/org/bluez/",
+    )
 
 
 def listen_interfaces_removed(bus, loop, callback):
-    """Create a future for a InterfacesAdded signal listener.
+    """Create an awaitable for an InterfacesRemoved signal listener.
 
     Args:
-        bus: The system bus object to use.
-        loop: The asyncio loop to use for adding the future to.
+        bus (BaseMessageBus): The system bus object to use.
+        loop: The asyncio loop, kept for backwards compatibility.
         callback: The callback function to run when signal is received.
 
     Returns:
         Integer rule id.
 
     """
-    return bus.addMatch(
+    return bus.add_match(
         callback,
+        sender=BLUEZ_SERVICE,
         interface=OBJECT_MANAGER_INTERFACE,
         member="InterfacesRemoved",
-        path_namespace="/org/bluez"
-    ).asFuture(loop)
+        path="/",
+        arg0path="/org/bluez/",
+    )
+
+
+def adapter_match_rules(adapter_path):
+    """The match rules for the device objects of an adapter.
+
+    ``InterfacesAdded`` and ``InterfacesRemoved`` are emitted on the root of
+    BlueZ's object tree, so they are scoped by their first argument, the
+    object path. ``PropertiesChanged`` is scoped by the object path and by
+    its first argument, the interface name, so that the bus daemon only
+    forwards property changes of ``Device1`` objects of the adapter.
+
+    Args:
+        adapter_path (str): Object path of the adapter, e.g. ``"/org/bluez/hci0"``.
+
+    Returns:
+        List of match rules, as keyword arguments of ``add_match``.
+
+    """
+    return [
+        dict(
+            sender=BLUEZ_SERVICE,
+            interface=OBJECT_MANAGER_INTERFACE,
+            member="InterfacesAdded",
+            path="/",
+            arg0path=adapter_path + "/",
+        ),
+        dict(
+            sender=BLUEZ_SERVICE,
+            interface=OBJECT_MANAGER_INTERFACE,
+            member="InterfacesRemoved",
+            path="/",
+            arg0path=adapter_path + "/",
+        ),
+        dict(
+            sender=BLUEZ_SERVICE,
+            interface=PROPERTIES_INTERFACE,
+            member="PropertiesChanged",
+            path_namespace=adapter_path,
+            arg0=DEVICE_INTERFACE,
+        ),
+    ]
+
+
+def device_match_rules(device_path, characteristics=True):
+    """The match rules for a connected device.
+
+    Covers property changes of the ``Device1`` object itself and of the
+    ``GattCharacteristic1`` objects below it, i.e. notifications.
+
+    Args:
+        device_path (str): Object path of the device.
+        characteristics (bool): Include the rule for the characteristics.
+
+    Returns:
+        List of match rules, as keyword arguments of ``add_match``.
+
+    """
+    rules = [
+        dict(
+            sender=BLUEZ_SERVICE,
+            interface=PROPERTIES_INTERFACE,
+            member="PropertiesChanged",
+            path=device_path,
+            arg0=DEVICE_INTERFACE,
+        )
+    ]
+    if characteristics:
+        rules.append(
+            dict(
+                sender=BLUEZ_SERVICE,
+                interface=PROPERTIES_INTERFACE,
+                member="PropertiesChanged",
+                path_namespace=device_path,
+                arg0=GATT_CHARACTERISTIC_INTERFACE,
+            )
+        )
+    return rules
+
+
+async def add_match_rules(bus, callback, rules):
+    """Add a set of match rules, all or none of them.
+
+    Args:
+        bus (BaseMessageBus): The bus to add the rules on.
+        callback: The callback function to run when a signal is received.
+        rules (list): Match rules, e.g. from :py:func:`adapter_match_rules`.
+
+    Returns:
+        List of rule ids, for :py:func:`remove_match_rules`.
+
+    """
+    rule_ids = []
+    try:
+        for rule in rules:
+            rule_ids.append(await bus.add_match(callback, **rule))
+    except Exception:
+        await remove_match_rules(bus, rule_ids)
+        raise
+    return rule_ids
+
+
+async def remove_match_rules(bus, rule_ids):
+    """Remove match rules added by :py:func:`add_match_rules`.
+
+    Failures are logged, so that one stale rule does not keep the others.
+
+    """
+    for rule_id in rule_ids:
+        try:
+            await bus.remove_match(rule_id)
+        except Exception as e:
+            logger.error("Could not remove rule {0}: {1}".format(rule_id, e))
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import re
+import weakref
 
 from bleak.uuids import uuidstr_to_str
 
@@ -9,6 +11,11 @@ from bleak.exc import BleakError
 _mac_address_regex = re.compile("^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$")
 _hci_device_regex = re.compile("^hci(\\d+)$")
 
+# The BlueZ version, probed once per process.
+_bluez_version = None
+# The probes still running, per event loop, as futures only work on their own.
+_bluez_probes = weakref.WeakKeyDictionary()
+
 
 def validate_mac_address(address):
     return _mac_address_regex.match(address) is not None
@@ -68,13 +75,68 @@ def get_gatt_service_path(hci_device, address, service_id):
     return base + "{0}/service{1:02d}".format(base, service_id)
 
 
+def parse_bluez_version(out: bytes) -> tuple:
+    """Parse the output of ``bluetoothctl --version`` into ``(major, minor)``."""
+    s = re.search(b"(\\d+)\\.(\\d+)", out.strip(b"'"))
+    if not s:
+        raise BleakError("Could not determine BlueZ version: {0}".format(out))
+    return tuple(map(int, s.groups()))
+
+
+async def _probe_bluez_version() -> tuple:
+    try:
+        p = await asyncio.create_subprocess_exec(
+            "bluetoothctl", "--version", stdout=asyncio.subprocess.PIPE
+        )
+        out, _ = await p.communicate()
+    except OSError as e:
+        raise BleakError("Could not determine BlueZ version: {0}".format(e))
+    version = parse_bluez_version(out)
+    if not (version[0] == 5 and version[1] >= 43):
+        raise BleakError(
+            "Bleak requires BlueZ >= 5.43. Found version {0} installed.".format(out)
+        )
+    return version
+
+
+async def get_bluez_version() -> tuple:
+    """Get the version of the installed BlueZ as ``(major, minor)``.
+
+    BlueZ does not publish its version on D-Bus, so it is asked from
+    ``bluetoothctl``, without blocking the event loop and only until it
+    succeeds once; later calls, and concurrent calls on the same event
+    loop, share the result.
+
+    Raises:
+        BleakError: If the version could not be determined or is older
+            than 5.43.
+
+    """
+    if _bluez_version is not None:
+        return _bluez_version
+    loop = asyncio.get_event_loop()
+    probe = _bluez_probes.get(loop)
+    if probe is None:
+        probe = _bluez_probes[loop] = asyncio.ensure_future(
+            _probe_bluez_version(), loop=loop
+        )
+        probe.add_done_callback(_probe_done)
+    return await asyncio.shield(probe)
+
+
+def _probe_done(probe):
+    global _bluez_version
+    for loop, p in list(_bluez_probes.items()):
+        if p is probe:
+            del _bluez_probes[loop]
+    if not probe.cancelled() and probe.exception() is None:
+        _bluez_version = probe.result()
+
+
 async def get_managed_objects(bus, loop, object_path_filter=None):
-    objects = await bus.callRemote(
-        "/",
-        "GetManagedObjects",
-        interface="org.freedesktop.DBus.ObjectManager",
-        destination="org.bluez",
-    ).asFuture(loop)
+    objects = await bus.call(
+        "/", "GetManagedObjects", "org.freedesktop.DBus.ObjectManager"
+    )
     if object_path_filter:
         return dict(
             filter(lambda i: i[0].startswith(object_path_filter), objects.items())
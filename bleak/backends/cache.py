@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Bounded device table used by scanners to age out devices that are no longer seen.
+
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional, Tuple
+
+
+class DeviceCache(object):
+    """A mapping of devices kept in least recently seen order.
+
+    Every assignment counts as a sighting and moves the entry to the back.
+    Entries that have not been seen for ``max_age`` seconds are removed by
+    :py:meth:`prune`, and the least recently seen entry is removed as soon as
+    the table would grow beyond ``max_size``. Both operations only ever look
+    at the front of the table, so they cost O(1) per evicted entry.
+
+    Args:
+        max_age (float): Seconds an entry may go without being seen before
+            it is evicted. Defaults to ``None``, i.e. no age limit.
+        max_size (int): Maximum number of entries. Defaults to ``None``,
+            i.e. no size limit.
+        on_evict (callable): Optional function called with ``(key, value)``
+            for every evicted entry.
+        clock (callable): Function returning the current time in seconds.
+            Defaults to :py:func:`time.monotonic`.
+
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        max_size: Optional[int] = None,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_age = max_age
+        self.max_size = max_size
+        self.on_evict = on_evict
+        self._clock = clock
+        # key -> [value, last seen]
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __getitem__(self, key):
+        return self._entries[key][0]
+
+    def __setitem__(self, key, value):
+        entry = self._entries.get(key)
+        if entry is None:
+            self._entries[key] = [value, self._clock()]
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._evict(*self._entries.popitem(last=False))
+        else:
+            entry[0] = value
+            entry[1] = self._clock()
+            self._entries.move_to_end(key)
+
+    def __delitem__(self, key):
+        del self._entries[key]
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        return default if entry is None else entry[0]
+
+    def pop(self, key, default=None):
+        entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def keys(self):
+        return self._entries.keys()
+
+    def values(self):
+        return [entry[0] for entry in self._entries.values()]
+
+    def items(self):
+        return [(key, entry[0]) for key, entry in self._entries.items()]
+
+    def clear(self):
+        self._entries.clear()
+
+    def touch(self, key) -> None:
+        """Mark an entry as seen now without changing its value."""
+        entry = self._entries[key]
+        entry[1] = self._clock()
+        self._entries.move_to_end(key)
+
+    def last_seen(self, key) -> Optional[float]:
+        """Get the time an entry was last seen, or ``None`` if it is not present."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def seen_since(self, since: float) -> List[Tuple[Hashable, Any]]:
+        """Get the entries seen at or after a point in time, most recent first.
+
+        Only the entries returned are visited.
+
+        Args:
+            since (float): The point in time, on the cache clock.
+
+        Returns:
+            List of ``(key, value)`` pairs.
+
+        """
+        found = []
+        for key in reversed(self._entries):
+            entry = self._entries[key]
+            if entry[1] < since:
+                break
+            found.append((key, entry[0]))
+        return found
+
+    def prune(self, now: Optional[float] = None) -> List[Tuple[Hashable, Any]]:
+        """Evict all entries that have not been seen for ``max_age`` seconds.
+
+        Args:
+            now (float): The current time. Defaults to the cache clock.
+
+        Returns:
+            List of the evicted ``(key, value)`` pairs.
+
+        """
+        evicted = []
+        if self.max_age is None:
+            return evicted
+        deadline = (self._clock() if now is None else now) - self.max_age
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry[1] > deadline:
+                break
+            del self._entries[key]
+            evicted.append((key, entry[0]))
+            self._evict(key, entry)
+        return evicted
+
+    def _evict(self, key, entry):
+        if self.on_evict is not None:
+            self.on_evict(key, entry[0])
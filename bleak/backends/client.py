@@ -10,15 +10,39 @@ import asyncio
 import uuid
 from typing import Callable, Any, Union
 
+from bleak.backends.flightrecorder import FlightRecorder
 from bleak.backends.service import BleakGATTServiceCollection
+from bleak.backends.stats import LatencyStats, TimedABCMeta
 
 
-class BaseBleakClient(abc.ABC):
+class BaseBleakClient(metaclass=TimedABCMeta):
     """The Client Interface for Bleak Backend implementations to implement.
 
     The documentation of this interface should thus be safe to use as a reference for your implementation.
+
+    The latencies of the connection, service and I/O methods of every
+    implementation are recorded per device, see :py:meth:`stats`. Pass
+    ``stats=False`` to turn this off.
+
+    The last 1024 operations, D-Bus calls, signals and state changes are
+    kept in :py:attr:`flight_recorder`, see
+    :py:mod:`bleak.backends.flightrecorder`. Pass ``flight_recorder=N`` to
+    keep N events instead, or ``flight_recorder=0`` to turn this off.
     """
 
+    _timed_category = "client"
+    _timed_operations = (
+        "connect",
+        "disconnect",
+        "get_services",
+        "read_gatt_char",
+        "read_gatt_descriptor",
+        "write_gatt_char",
+        "write_gatt_descriptor",
+        "start_notify",
+        "stop_notify",
+    )
+
     def __init__(self, address, loop=None, **kwargs):
         self.address = address
         self.loop = loop if loop else asyncio.get_event_loop()
@@ -29,6 +53,9 @@ class BaseBleakClient(abc.ABC):
         self._notification_callbacks = {}
 
         self._timeout = kwargs.get("timeout", 2.0)
+        self._stats = LatencyStats() if kwargs.get("stats", True) else None
+        size = kwargs.get("flight_recorder", 1024)
+        self.flight_recorder = FlightRecorder(size) if size else None
 
     def __str__(self):
         return "{0}, {1}".format(self.__class__.__name__, self.address)
@@ -47,6 +74,19 @@ class BaseBleakClient(abc.ABC):
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.disconnect()
 
+    def stats(self) -> LatencyStats:
+        """Get the latency histograms of the operations of this client.
+
+        Call ``reset()`` on the returned object to start over.
+
+        Returns:
+            A :py:class:`bleak.backends.stats.LatencyStats`, with histograms
+            keyed on operation name and the address of the device, or
+            ``None`` if created with ``stats=False``.
+
+        """
+        return self._stats
+
     # Connectivity methods
 
     @abc.abstractmethod
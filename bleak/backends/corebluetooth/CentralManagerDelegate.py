@@ -26,6 +26,7 @@ from Foundation import (
 
 from bleak.backends.corebluetooth.PeripheralDelegate import PeripheralDelegate
 from bleak.backends.corebluetooth.device import BLEDeviceCoreBluetooth
+from bleak.backends.trace import TRACER
 
 
 logger = logging.getLogger(__name__)
@@ -196,11 +197,20 @@ class CentralManagerDelegate(NSObject):
             device = BLEDeviceCoreBluetooth(address, name, details)
             self.devices[uuid_string] = device
 
-        device._rssi = float(RSSI)
+        device.rssi = int(RSSI)
         device._update(advertisementData)
 
-        logger.debug("Discovered device {}: {} @ RSSI: {} (kCBAdvData {})".format(
-                uuid_string, device.name, RSSI, advertisementData.keys()))
+        if TRACER.enabled:
+            TRACER.emit(
+                "scan.device",
+                None,
+                lambda: {
+                    "address": uuid_string,
+                    "name": device.name,
+                    "rssi": device.rssi,
+                    "advertisement_data": list(advertisementData.keys()),
+                },
+            )
 
     def centralManager_didConnectPeripheral_(self, central, peripheral):
         logger.debug(
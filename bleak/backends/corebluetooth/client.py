@@ -21,6 +21,7 @@ from bleak.backends.corebluetooth.descriptor import BleakGATTDescriptorCoreBluet
 from bleak.backends.corebluetooth.discovery import discover
 from bleak.backends.corebluetooth.service import BleakGATTServiceCoreBluetooth
 from bleak.backends.service import BleakGATTServiceCollection
+from bleak.backends.trace import TRACER
 from bleak.exc import BleakError
 
 logger = logging.getLogger(__name__)
@@ -172,7 +173,10 @@ class BleakClientCoreBluetooth(BaseBleakClient):
             characteristic.obj, use_cached=use_cached
         )
         value = bytearray(output)
-        logger.debug("Read Characteristic {0} : {1}".format(_uuid, value))
+        if TRACER.enabled:
+            TRACER.emit(
+                "gatt.read", self.address, lambda: {"uuid": _uuid, "value": value}
+            )
         return value
 
     async def read_gatt_descriptor(
@@ -201,7 +205,10 @@ class BleakClientCoreBluetooth(BaseBleakClient):
             value = bytearray(output.encode("utf-8"))
         else:  # _NSInlineData
             value = bytearray(output)  # value.getBytes_length_(None, len(value))
-        logger.debug("Read Descriptor {0} : {1}".format(handle, value))
+        if TRACER.enabled:
+            TRACER.emit(
+                "gatt.read", self.address, lambda: {"handle": handle, "value": value}
+            )
         return value
 
     async def write_gatt_char(
@@ -227,7 +234,10 @@ class BleakClientCoreBluetooth(BaseBleakClient):
             CBCharacteristicWriteWithResponse if response else CBCharacteristicWriteWithoutResponse
         )
         if success:
-            logger.debug("Write Characteristic {0} : {1}".format(_uuid, data))
+            if TRACER.enabled:
+                TRACER.emit(
+                    "gatt.write", self.address, lambda: {"uuid": _uuid, "value": data}
+                )
         else:
             raise BleakError(
                 "Could not write value {0} to characteristic {1}: {2}".format(
@@ -252,7 +262,10 @@ class BleakClientCoreBluetooth(BaseBleakClient):
             descriptor.obj, value
         )
         if success:
-            logger.debug("Write Descriptor {0} : {1}".format(handle, data))
+            if TRACER.enabled:
+                TRACER.emit(
+                    "gatt.write", self.address, lambda: {"handle": handle, "value": data}
+                )
         else:
             raise BleakError(
                 "Could not write value {0} to descriptor {1}: {2}".format(
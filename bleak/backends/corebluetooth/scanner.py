@@ -83,11 +83,11 @@ class BleakScannerCoreBluetooth(BaseBleakScanner):
                 for u in advertisementData.get("kCBAdvDataServiceUUIDs", [])
             ]
 
-            found.append(
-                BLEDevice(
-                    address, name, details, uuids=uuids, manufacturer_data=manufacturer_data
-                )
+            device = BLEDevice(
+                address, name, details, uuids=uuids, manufacturer_data=manufacturer_data
             )
+            if self._matches_device(device):
+                found.append(device)
 
         return found
 
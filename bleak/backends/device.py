@@ -6,13 +6,47 @@ Wrapper class for Bluetooth LE servers returned from calling
 Created on 2018-04-23 by hbldh <henrik.blidh@nedomkull.com>
 
 """
+from typing import Any, Dict, List, Optional
+
 from ._manufacturers import MANUFACTURERS
 
 
+def _rssi_from_details(details) -> Optional[int]:
+    # Fallback for devices created without an explicit RSSI.
+    if isinstance(details, dict) and "props" in details:
+        rssi = details["props"].get("RSSI")
+    elif hasattr(details, "RawSignalStrengthInDBm"):
+        rssi = details.RawSignalStrengthInDBm
+    elif hasattr(details, "Properties"):
+        rssi = None
+        for p in details.Properties:
+            if p.Key == "System.Devices.Aep.SignalStrength":
+                rssi = p.Value
+                break
+    else:
+        rssi = None
+    return int(rssi) if rssi is not None else None
+
+
 class BLEDevice(object):
     """A simple wrapper class representing a BLE server detected during
     a `discover` call.
 
+    All advertised data is parsed once, when the device is created, into
+    plain attributes:
+
+    - ``address``, ``address_type`` (``"public"``, ``"random"`` or ``None``
+      if the backend does not report it) and ``name``.
+    - ``rssi``, the signal strength in dBm, or ``None``.
+    - ``uuids``, a list of advertised service UUID strings.
+    - ``manufacturer_data``, a dict of company identifier to ``bytes``.
+    - ``service_data``, a dict of service UUID string to ``bytes``.
+    - ``tx_power``, the advertised transmit power level in dBm, or ``None``.
+
+    The ``details`` attribute holds the backend specific object, which
+    backends may provide lazily through the ``details_factory`` keyword
+    argument:
+
     - When using Windows backend, `details` attribute is a
       `Windows.Devices.Bluetooth.Advertisement.BluetoothLEAdvertisement` object, unless
       it is created with the Windows.Devices.Enumeration discovery method, then is is a
@@ -23,34 +57,134 @@ class BLEDevice(object):
     - When using macOS backend, `details` attribute will be a CBPeripheral object
     """
 
-    def __init__(self, address, name, details=None, **kwargs):
+    __slots__ = (
+        "address",
+        "address_type",
+        "name",
+        "rssi",
+        "uuids",
+        "manufacturer_data",
+        "service_data",
+        "tx_power",
+        "_details",
+        "_details_factory",
+        "_extra",
+    )
+
+    def __init__(self, address, name, details=None, rssi=None, **kwargs):
         self.address = address
         self.name = name if name else "Unknown"
-        self.details = details
-        self.metadata = kwargs
+        self._details = details
+        self._details_factory = kwargs.pop("details_factory", None)
+        self.address_type = kwargs.pop("address_type", None)
+        self.uuids = kwargs.pop("uuids", None) or []
+        self.manufacturer_data = kwargs.pop("manufacturer_data", None) or {}
+        self.service_data = kwargs.pop("service_data", None) or {}
+        self.tx_power = kwargs.pop("tx_power", None)
+        self._extra = kwargs
+        if rssi is None and details is not None:
+            rssi = _rssi_from_details(details)
+        self.rssi = int(rssi) if rssi is not None else None
+
+    @property
+    def details(self):
+        """The backend specific object of the device"""
+        if self._details is None and self._details_factory is not None:
+            self._details = self._details_factory()
+            self._details_factory = None
+        return self._details
+
+    @details.setter
+    def details(self, value):
+        self._details = value
+        self._details_factory = None
 
     @property
-    def rssi(self):
-        """Get the signal strength in dBm"""
-        if isinstance(self.details, dict) and "props" in self.details:
-            rssi = self.details["props"].get("RSSI", 0)  # Should not be set to 0...
-        elif hasattr(self.details, "RawSignalStrengthInDBm"):
-            rssi = self.details.RawSignalStrengthInDBm
-        elif hasattr(self.details, "Properties"):
-            rssi = {p.Key: p.Value for p in self.details.Properties}['System.Devices.Aep.SignalStrength']
-        else:
-            rssi = None
-        return int(rssi) if rssi is not None else None
+    def metadata(self) -> dict:
+        """The advertised data as a dict, with keys ``uuids`` and
+        ``manufacturer_data``, as well as ``service_data`` and ``tx_power``
+        when advertised.
+
+        Kept for backwards compatibility; prefer the attributes.
+        """
+        metadata = {"uuids": self.uuids, "manufacturer_data": self.manufacturer_data}
+        if self.service_data:
+            metadata["service_data"] = self.service_data
+        if self.tx_power is not None:
+            metadata["tx_power"] = self.tx_power
+        metadata.update(self._extra)
+        return metadata
 
     def __str__(self):
-        if self.name == "Unknown":
-            if "manufacturer_data" in self.metadata:
-                ks = list(self.metadata["manufacturer_data"].keys())
-                if len(ks):
-                    mf = MANUFACTURERS.get(ks[0], MANUFACTURERS.get(0xffff))
-                    value = self.metadata["manufacturer_data"].get(
-                        ks[0], MANUFACTURERS.get(0xffff)
-                    )
-                    # TODO: Evaluate how to interpret the value of the company identifier...
-                    return "{0}: {1} ({2})".format(self.address, mf, value)
+        if self.name == "Unknown" and self.manufacturer_data:
+            ks = list(self.manufacturer_data.keys())
+            mf = MANUFACTURERS.get(ks[0], MANUFACTURERS.get(0xffff))
+            value = self.manufacturer_data.get(ks[0], MANUFACTURERS.get(0xffff))
+            # TODO: Evaluate how to interpret the value of the company identifier...
+            return "{0}: {1} ({2})".format(self.address, mf, value)
         return "{0}: {1}".format(self.address, self.name)
+
+    def __repr__(self):
+        return "BLEDevice({0}, {1}, rssi={2})".format(
+            self.address, self.name, self.rssi
+        )
+
+
+class AdvertisementData(object):
+    """The data of one received advertisement, parsed once by the backend.
+
+    Attributes:
+        local_name (str): The advertised local name, or ``None``.
+        rssi (int): The signal strength in dBm, or ``None``.
+        manufacturer_data (dict): Company identifier to ``bytes``.
+        service_data (dict): Service UUID string to ``bytes``.
+        service_uuids (list): Advertised service UUID strings.
+        tx_power (int): The advertised transmit power level in dBm, or ``None``.
+        timestamp (float): :py:func:`time.monotonic` time of reception.
+        platform_data: The backend specific object the data was parsed from.
+
+    """
+
+    __slots__ = (
+        "local_name",
+        "rssi",
+        "manufacturer_data",
+        "service_data",
+        "service_uuids",
+        "tx_power",
+        "timestamp",
+        "platform_data",
+    )
+
+    def __init__(
+        self,
+        local_name: Optional[str] = None,
+        rssi: Optional[int] = None,
+        manufacturer_data: Optional[Dict[int, bytes]] = None,
+        service_data: Optional[Dict[str, bytes]] = None,
+        service_uuids: Optional[List[str]] = None,
+        tx_power: Optional[int] = None,
+        timestamp: Optional[float] = None,
+        platform_data: Any = None,
+    ):
+        self.local_name = local_name
+        self.rssi = rssi
+        self.manufacturer_data = manufacturer_data or {}
+        self.service_data = service_data or {}
+        self.service_uuids = service_uuids or []
+        self.tx_power = tx_power
+        self.timestamp = timestamp
+        self.platform_data = platform_data
+
+    def __repr__(self):
+        return (
+            "AdvertisementData(local_name={0!r}, rssi={1}, manufacturer_data={2!r}, "
+            "service_data={3!r}, service_uuids={4!r}, tx_power={5})".format(
+                self.local_name,
+                self.rssi,
+                self.manufacturer_data,
+                self.service_data,
+                self.service_uuids,
+                self.tx_power,
+            )
+        )
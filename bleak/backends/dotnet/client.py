@@ -14,6 +14,7 @@ from typing import Callable, Any, Union
 
 from bleak.exc import BleakError, BleakDotNetTaskError
 from bleak.backends.client import BaseBleakClient
+from bleak.backends.trace import TRACER
 from bleak.backends.dotnet.discovery import discover
 from bleak.backends.dotnet.utils import (
     wrap_Task,
@@ -310,7 +311,10 @@ class BleakClientDotNet(BaseBleakClient):
             output = Array.CreateInstance(Byte, reader.UnconsumedBufferLength)
             reader.ReadBytes(output)
             value = bytearray(output)
-            logger.debug("Read Characteristic {0} : {1}".format(_uuid, value))
+            if TRACER.enabled:
+                TRACER.emit(
+                    "gatt.read", self.address, lambda: {"uuid": _uuid, "value": value}
+                )
         else:
             raise BleakError(
                 "Could not read characteristic value for {0}: {1}".format(
@@ -353,7 +357,10 @@ class BleakClientDotNet(BaseBleakClient):
             output = Array.CreateInstance(Byte, reader.UnconsumedBufferLength)
             reader.ReadBytes(output)
             value = bytearray(output)
-            logger.debug("Read Descriptor {0} : {1}".format(handle, value))
+            if TRACER.enabled:
+                TRACER.emit(
+                    "gatt.read", self.address, lambda: {"handle": handle, "value": value}
+                )
         else:
             raise BleakError(
                 "Could not read Descriptor value for {0}: {1}".format(
@@ -395,7 +402,10 @@ class BleakClientDotNet(BaseBleakClient):
             loop=self.loop,
         )
         if write_result.Status == GattCommunicationStatus.Success:
-            logger.debug("Write Characteristic {0} : {1}".format(_uuid, data))
+            if TRACER.enabled:
+                TRACER.emit(
+                    "gatt.write", self.address, lambda: {"uuid": _uuid, "value": data}
+                )
         else:
             raise BleakError(
                 "Could not write value {0} to characteristic {1}: {2}".format(
@@ -425,7 +435,10 @@ class BleakClientDotNet(BaseBleakClient):
             loop=self.loop,
         )
         if write_result.Status == GattCommunicationStatus.Success:
-            logger.debug("Write Descriptor {0} : {1}".format(handle, data))
+            if TRACER.enabled:
+                TRACER.emit(
+                    "gatt.write", self.address, lambda: {"handle": handle, "value": data}
+                )
         else:
             raise BleakError(
                 "Could not write value {0} to descriptor {1}: {2}".format(
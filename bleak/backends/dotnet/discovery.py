@@ -117,6 +117,7 @@ async def discover(
                 bdaddr,
                 local_name,
                 d,
+                rssi=d.RawSignalStrengthInDBm,
                 uuids=uuids,
                 manufacturer_data=data,
             )
@@ -237,7 +238,12 @@ async def discover_by_enumeration(
     for d in devices.values():
         properties = {p.Key: p.Value for p in d.Properties}
         found.append(
-            BLEDevice(properties["System.Devices.Aep.DeviceAddress"], d.Name, d, uuids=[], manufacturer_data=b'')
+            BLEDevice(
+                properties["System.Devices.Aep.DeviceAddress"],
+                d.Name,
+                d,
+                rssi=properties.get("System.Devices.Aep.SignalStrength"),
+            )
         )
 
     return found
@@ -1,14 +1,16 @@
 import logging
 import asyncio
 import pathlib
+import time
 import uuid
 from asyncio.events import AbstractEventLoop
 from functools import wraps
 from typing import Callable, Any, Union, List
 
-from bleak.backends.device import BLEDevice
+from bleak.backends.device import AdvertisementData, BLEDevice
 from bleak.exc import BleakError, BleakDotNetTaskError
 from bleak.backends.scanner import BaseBleakScanner
+from bleak.backends.trace import TRACER
 
 # Import of Bleak CLR->UWP Bridge. It is not needed here, but it enables loading of Windows.Devices
 from BleakBridge import Bridge
@@ -56,6 +58,8 @@ class BleakScannerDotNet(BaseBleakScanner):
         AdvertisementFilter (Windows.Devices.Bluetooth.Advertisement.BluetoothLEAdvertisementFilter): A
           BluetoothLEAdvertisementFilter object used for configuration of Bluetooth LE
           advertisement filtering that uses payload section-based filtering.
+        rules (list of AdvertisementRule): Declarative rules that
+          advertisements must match before the detection callback is called.
 
     """
 
@@ -78,13 +82,33 @@ class BleakScannerDotNet(BaseBleakScanner):
 
     def AdvertisementWatcher_Received(self, sender, e):
         if sender == self.watcher:
-            logger.debug("Received {0}.".format(_format_event_args(e)))
+            device = None
+            if self._matcher is not None or self._advertisement_listeners:
+                device = self.parse_eventargs(e)
+                if not self._matches_device(device):
+                    return
+            if TRACER.enabled:
+                TRACER.emit(
+                    "scan.device", None, lambda: {"event": _format_event_args(e)}
+                )
             if e.AdvertisementType == BluetoothLEAdvertisementType.ScanResponse:
                 if e.BluetoothAddress not in self._scan_responses:
                     self._scan_responses[e.BluetoothAddress] = e
             else:
                 if e.BluetoothAddress not in self._devices:
                     self._devices[e.BluetoothAddress] = e
+            if self._advertisement_listeners:
+                self._notify_listeners(
+                    device,
+                    AdvertisementData(
+                        local_name=e.Advertisement.LocalName or None,
+                        rssi=device.rssi,
+                        manufacturer_data=device.manufacturer_data,
+                        service_uuids=device.uuids,
+                        timestamp=time.monotonic(),
+                        platform_data=e,
+                    ),
+                )
         if self._callback is not None:
             self._callback(sender, e)
 
@@ -127,6 +151,8 @@ class BleakScannerDotNet(BaseBleakScanner):
         if "AdvertisementFilter" in kwargs:
             # TODO: Handle AdvertisementFilter parameters
             self._advertisement_filter = kwargs["AdvertisementFilter"]
+        if "rules" in kwargs:
+            self.set_advertisement_rules(kwargs["rules"])
 
     async def get_discovered_devices(self) -> List[BLEDevice]:
         found = []
@@ -158,7 +184,12 @@ class BleakScannerDotNet(BaseBleakScanner):
             data[m.CompanyId] = bytes(b)
         local_name = event_args.Advertisement.LocalName
         return BLEDevice(
-            bdaddr, local_name, event_args, uuids=uuids, manufacturer_data=data
+            bdaddr,
+            local_name,
+            event_args,
+            rssi=event_args.RawSignalStrengthInDBm,
+            uuids=uuids,
+            manufacturer_data=data,
         )
 
     def register_detection_callback(self, callback: Callable):
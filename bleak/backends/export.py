@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Streaming export of received advertisements to columnar files.
+
+An :py:class:`AdvertisementSink` collects advertisements into column buffers
+of at most ``batch_size`` rows and writes every full batch to the current
+file, so memory use does not grow with the length of the scan. Files are
+rolled over after a number of rows, bytes or seconds.
+
+Every row holds the address of the device, the wall clock time of
+reception, the RSSI, and one manufacturer data entry as company identifier
+and payload bytes. Advertisements without manufacturer data give one row
+with an empty company identifier and payload.
+
+Supported formats are CSV, with the payload hex encoded, and, if `pyarrow
+<https://arrow.apache.org/docs/python/>`_ is installed, Arrow IPC and
+Parquet.
+
+.. code-block:: python
+
+    sink = AdvertisementSink("scan-{index:04d}.parquet", max_age=3600.0)
+    sink.attach(scanner)
+    ...
+    sink.close()
+
+"""
+import csv
+import os
+import time
+from typing import Callable, Optional
+
+from bleak.exc import BleakError
+from bleak.backends.device import AdvertisementData, BLEDevice
+
+COLUMNS = ("address", "timestamp", "rssi", "company_id", "payload")
+
+_FORMATS = {
+    ".csv": "csv",
+    ".arrow": "arrow",
+    ".ipc": "arrow",
+    ".feather": "arrow",
+    ".parquet": "parquet",
+}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise BleakError("The Arrow and Parquet formats require pyarrow.")
+    return pyarrow
+
+
+class _CsvWriter(object):
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, columns):
+        address, timestamp, rssi, company_id, payload = columns
+        self._writer.writerows(
+            zip(
+                address,
+                ("{0:.6f}".format(t) for t in timestamp),
+                ("" if r is None else r for r in rssi),
+                ("" if c is None else c for c in company_id),
+                (p.hex() for p in payload),
+            )
+        )
+        self._file.flush()
+
+    def size(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _ArrowWriter(object):
+    def __init__(self, path, parquet=False):
+        pa = self._pa = _import_pyarrow()
+        self._path = path
+        self._schema = pa.schema(
+            [
+                ("address", pa.string()),
+                ("timestamp", pa.float64()),
+                ("rssi", pa.int16()),
+                ("company_id", pa.uint16()),
+                ("payload", pa.binary()),
+            ]
+        )
+        if parquet:
+            import pyarrow.parquet as pq
+
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def write(self, columns):
+        pa = self._pa
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(c, type=f.type) for c, f in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_batch(batch)
+
+    def size(self):
+        return os.path.getsize(self._path)
+
+    def close(self):
+        self._writer.close()
+
+
+class AdvertisementSink(object):
+    """Writes advertisements to files in columnar batches.
+
+    Args:
+        path (str): Path of the files to write. It may contain the
+            ``{index}`` and ``{time}`` placeholders, replaced by the number of
+            the file and the wall clock time of its first row in whole
+            seconds. If it contains neither, ``-{index}`` is inserted before
+            the extension.
+        format (str): ``"csv"``, ``"arrow"`` or ``"parquet"``. Defaults to
+            the one matching the extension of ``path``.
+        batch_size (int): Rows buffered before writing them out. Defaults
+            to 4096.
+        max_rows (int): Rows per file before rolling over. Defaults to
+            ``None``, i.e. no limit.
+        max_bytes (int): Size in bytes a file may reach before rolling over,
+            checked after each batch. Defaults to ``None``, i.e. no limit.
+        max_age (float): Seconds after its first row a file is rolled over.
+            Defaults to ``None``, i.e. no limit.
+        clock (callable): Function returning the wall clock time in seconds.
+            Defaults to :py:func:`time.time`.
+
+    """
+
+    def __init__(
+        self,
+        path: str,
+        format: Optional[str] = None,
+        batch_size: int = 4096,
+        max_rows: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        root, ext = os.path.splitext(path)
+        if format is None:
+            format = _FORMATS.get(ext.lower())
+            if format is None:
+                raise BleakError("Unknown export format for {0}".format(path))
+        if format not in ("csv", "arrow", "parquet"):
+            raise BleakError("Unknown export format {0}".format(format))
+        if format != "csv":
+            _import_pyarrow()
+        if "{index" not in path and "{time" not in path:
+            path = root + "-{index}" + ext
+
+        self.format = format
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.files = []
+        self._path = path
+        self._clock = clock
+        self._columns = tuple([] for _ in COLUMNS)
+        self._writer = None
+        self._opened = None
+        self._rows = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def attach(self, scanner) -> None:
+        """Write the advertisements received by a scanner.
+
+        Args:
+            scanner (BaseBleakScanner): The scanner to listen to.
+
+        """
+        scanner.add_advertisement_listener(self.update)
+
+    def detach(self, scanner) -> None:
+        """Stop listening to a scanner given to :py:meth:`attach`."""
+        scanner.remove_advertisement_listener(self.update)
+
+    def update(
+        self, device: BLEDevice, advertisement_data: AdvertisementData = None
+    ) -> None:
+        """Add an advertisement.
+
+        Can be used as an advertisement listener on a scanner.
+        """
+        if advertisement_data is not None:
+            rssi = advertisement_data.rssi
+            manufacturer_data = advertisement_data.manufacturer_data
+        else:
+            rssi = device.rssi
+            manufacturer_data = device.manufacturer_data
+        now = self._clock()
+        if not manufacturer_data:
+            self.append(device.address, now, rssi, None, b"")
+        for company_id, payload in manufacturer_data.items():
+            self.append(device.address, now, rssi, company_id, payload)
+
+    def append(
+        self,
+        address: str,
+        timestamp: float,
+        rssi: Optional[int],
+        company_id: Optional[int],
+        payload: bytes,
+    ) -> None:
+        """Add a row, writing out the buffered batch if it is full."""
+        if self._opened is None:
+            # The age of a file counts from its first row, not its first write.
+            self._opened = self._clock()
+        address_, timestamp_, rssi_, company_id_, payload_ = self._columns
+        address_.append(address)
+        timestamp_.append(timestamp)
+        rssi_.append(rssi)
+        company_id_.append(company_id)
+        payload_.append(bytes(payload))
+        if len(address_) >= self.batch_size or (
+            self.max_age is not None
+            and timestamp - self._opened >= self.max_age
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write out the buffered rows."""
+        columns = self._columns
+        while columns[0]:
+            if self._writer is None:
+                self._open()
+            n = len(columns[0])
+            if self.max_rows is not None:
+                n = min(n, self.max_rows - self._rows)
+            self._writer.write([c[:n] for c in columns])
+            for c in columns:
+                del c[:n]
+            self._rows += n
+            if self._should_roll_over():
+                self._close()
+
+    def close(self) -> None:
+        """Write out the buffered rows and close the current file."""
+        self.flush()
+        self._close()
+
+    # Helper methods
+
+    def _open(self):
+        if self._opened is None:
+            self._opened = self._clock()
+        path = self._path.format(index=len(self.files), time=int(self._opened))
+        if self.format == "csv":
+            self._writer = _CsvWriter(path)
+        else:
+            self._writer = _ArrowWriter(path, parquet=self.format == "parquet")
+        self.files.append(path)
+        self._rows = 0
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._opened = None
+
+    def _should_roll_over(self) -> bool:
+        if self.max_rows is not None and self._rows >= self.max_rows:
+            return True
+        if self.max_bytes is not None and self._writer.size() >= self.max_bytes:
+            return True
+        return self.max_age is not None and self._clock() - self._opened >= self.max_age
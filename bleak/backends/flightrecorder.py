@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+"""
+A flight recorder of the recent history of a client or scanner.
+
+A :py:class:`FlightRecorder` keeps the last ``size`` events in one
+preallocated ``bytearray``, as fixed-size binary records: a timestamp, the
+kind of event, the ids of up to two interned strings and a 32 bit value.
+Recording an event packs one record in place, without allocating, so it can
+stay on at rates where debug logging cannot. The history is decoded only
+when it is dumped, on demand or when an operation fails.
+
+Clients and scanners record their operations, the D-Bus method calls they
+make, the signals they receive and their state changes into the recorder in
+their ``flight_recorder`` attribute.
+
+"""
+import logging
+import struct
+import time
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+SIGNAL = 1  #: A signal was received; detail is its object path.
+CALL = 2  #: A method call was issued; detail is its object path.
+REPLY = 3  #: A method call returned; value is its duration in microseconds.
+ERROR = 4  #: A method call failed; value is its duration in microseconds.
+STATE = 5  #: The state changed to ``name``.
+BEGIN = 6  #: An operation started.
+END = 7  #: An operation ended; value is 1 if it failed.
+
+KIND_NAMES = {
+    SIGNAL: "signal",
+    CALL: "call",
+    REPLY: "reply",
+    ERROR: "error",
+    STATE: "state",
+    BEGIN: "begin",
+    END: "end",
+}
+
+# timestamp, kind, name id, detail id, value
+_RECORD = struct.Struct("<dBxHHI")
+# Interned strings are capped, so that unbounded details, e.g. the object
+# paths of every device seen by a scanner, cannot grow the table forever.
+_MAX_STRINGS = 0xFFFF
+_OVERFLOW = _MAX_STRINGS
+_NONE = 0
+
+
+class FlightRecorder(object):
+    """A ring buffer of binary event records.
+
+    Args:
+        size (int): Number of events to keep.
+        clock (callable): Function returning the current time in seconds.
+            Defaults to :py:func:`time.monotonic`.
+
+    Attributes:
+        dump_on_error: If set, the history is dumped when an operation of
+            the owner fails: ``True`` logs it at ``ERROR`` level, a function
+            is called with the text of the dump.
+
+    """
+
+    __slots__ = (
+        "size",
+        "dump_on_error",
+        "_clock",
+        "_buffer",
+        "_next",
+        "_count",
+        "_ids",
+        "_strings",
+    )
+
+    def __init__(self, size: int = 1024, clock: Callable[[], float] = time.monotonic):
+        if size <= 0:
+            raise ValueError("size must be positive")
+        self.size = size
+        self.dump_on_error = False
+        self._clock = clock
+        self._buffer = bytearray(size * _RECORD.size)
+        self._next = 0
+        self._count = 0
+        # Id 0 stands for no string.
+        self._ids = {}
+        self._strings = [None]
+
+    def __len__(self):
+        return self._count
+
+    def _intern(self, string: Optional[str]) -> int:
+        if string is None:
+            return _NONE
+        i = self._ids.get(string)
+        if i is None:
+            if len(self._strings) >= _MAX_STRINGS:
+                return _OVERFLOW
+            i = self._ids[string] = len(self._strings)
+            self._strings.append(string)
+        return i
+
+    def record(
+        self, kind: int, name: str, detail: Optional[str] = None, value: int = 0
+    ) -> None:
+        """Record an event.
+
+        Args:
+            kind (int): The kind of event, e.g. :py:data:`SIGNAL`.
+            name (str): What the event concerns, e.g. a method name.
+            detail (str): An optional second string, e.g. an object path.
+            value (int): An unsigned 32 bit value, clamped if larger.
+
+        """
+        _RECORD.pack_into(
+            self._buffer,
+            self._next * _RECORD.size,
+            self._clock(),
+            kind,
+            self._intern(name),
+            self._intern(detail),
+            min(value, 0xFFFFFFFF),
+        )
+        self._next = (self._next + 1) % self.size
+        if self._count < self.size:
+            self._count += 1
+
+    def clear(self) -> None:
+        """Remove all records. The interned strings are kept."""
+        self._next = 0
+        self._count = 0
+
+    def records(self) -> List[Tuple[float, str, str, Optional[str], int]]:
+        """Decode the records.
+
+        Returns:
+            List of ``(timestamp, kind, name, detail, value)`` tuples, oldest
+            first, with ``kind`` one of the names in :py:data:`KIND_NAMES`.
+
+        """
+        strings = self._strings
+        first = (self._next - self._count) % self.size
+        result = []
+        for n in range(self._count):
+            timestamp, kind, name, detail, value = _RECORD.unpack_from(
+                self._buffer, ((first + n) % self.size) * _RECORD.size
+            )
+            result.append(
+                (
+                    timestamp,
+                    KIND_NAMES.get(kind, str(kind)),
+                    strings[name] if name < len(strings) else "?",
+                    strings[detail] if detail < len(strings) else "?",
+                    value,
+                )
+            )
+        return result
+
+    def dump(self) -> str:
+        """Format the records as text, one line per event, oldest first.
+
+        Times are in seconds relative to the latest event.
+
+        """
+        records = self.records()
+        if not records:
+            return ""
+        last = records[-1][0]
+        return "\n".join(
+            "{0:+.6f} {1:<6} {2}{3}{4}".format(
+                timestamp - last,
+                kind,
+                name,
+                " " + detail if detail is not None else "",
+                " {0}".format(value) if value else "",
+            )
+            for timestamp, kind, name, detail, value in records
+        )
+
+    def failed(self, owner, operation: str, error: BaseException) -> None:
+        """Dump the history for an operation that failed, if asked to.
+
+        Args:
+            owner: The client or scanner, for the log message.
+            operation (str): The name of the operation.
+            error (Exception): What it failed with.
+
+        """
+        if not self.dump_on_error:
+            return
+        text = self.dump()
+        if callable(self.dump_on_error):
+            self.dump_on_error(text)
+        else:
+            logger.error(
+                "{0} failed in {1}: {2!r}. Flight recorder:\n{3}".format(
+                    operation, owner, error, text
+                )
+            )
@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+Linux scanner backend reading advertising reports from a raw HCI socket.
+
+"""
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+Parsing of HCI LE advertising report events and advertising data.
+
+Packets are HCI packets as read from a raw HCI socket, i.e. starting with
+the packet type indicator.
+
+"""
+import struct
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+HCI_COMMAND_PKT = 0x01
+HCI_EVENT_PKT = 0x04
+
+EVT_CMD_COMPLETE = 0x0E
+EVT_CMD_STATUS = 0x0F
+EVT_LE_META_EVENT = 0x3E
+
+EVT_LE_ADVERTISING_REPORT = 0x02
+EVT_LE_EXTENDED_ADVERTISING_REPORT = 0x0D
+
+OGF_LE_CTL = 0x08
+OCF_LE_SET_SCAN_PARAMETERS = 0x000B
+OCF_LE_SET_SCAN_ENABLE = 0x000C
+
+# Legacy advertising report event types
+ADV_IND = 0x00
+ADV_DIRECT_IND = 0x01
+ADV_SCAN_IND = 0x02
+ADV_NONCONN_IND = 0x03
+SCAN_RSP = 0x04
+
+# Address types 2 and 3 are resolved private addresses of public and random
+# identity addresses.
+_ADDRESS_TYPES = ("public", "random", "public", "random")
+
+_BASE_UUID = "-0000-1000-8000-00805f9b34fb"
+
+
+class AdvertisingReport(object):
+    """One advertising report of an LE (Extended) Advertising Report event.
+
+    Attributes:
+        event_type (int): The event type of the report. Legacy event types
+            are between ``ADV_IND`` and ``SCAN_RSP``; extended reports carry
+            the event type bit field of the extended report.
+        scan_response (bool): If the report is a scan response.
+        address (str): The address of the advertiser, e.g. ``"AA:BB:CC:DD:EE:FF"``.
+        address_type (str): ``"public"`` or ``"random"``.
+        rssi (int): The signal strength in dBm, or ``None`` if not available.
+        tx_power (int): The transmit power reported by the controller for
+            extended reports, in dBm, or ``None``.
+        data (bytes): The advertising data.
+
+    """
+
+    __slots__ = (
+        "event_type",
+        "scan_response",
+        "address",
+        "address_type",
+        "rssi",
+        "tx_power",
+        "data",
+    )
+
+    def __init__(
+        self,
+        event_type: int,
+        address: str,
+        address_type: str,
+        rssi: Optional[int],
+        data: bytes,
+        scan_response: bool = False,
+        tx_power: Optional[int] = None,
+    ):
+        self.event_type = event_type
+        self.scan_response = scan_response
+        self.address = address
+        self.address_type = address_type
+        self.rssi = rssi
+        self.tx_power = tx_power
+        self.data = data
+
+    def __repr__(self):
+        return "AdvertisingReport({0}, {1}, rssi={2}, data={3})".format(
+            self.address, self.address_type, self.rssi, self.data.hex()
+        )
+
+
+class ParsedData(object):
+    """The fields of a piece of advertising data.
+
+    Instances are cached on the raw data and shared, so their containers
+    must not be modified.
+
+    """
+
+    __slots__ = ("local_name", "manufacturer_data", "service_data", "service_uuids", "tx_power")
+
+    def __init__(self):
+        self.local_name = None
+        self.manufacturer_data = {}
+        self.service_data = {}
+        self.service_uuids = []
+        self.tx_power = None
+
+
+def _format_address(raw: bytes) -> str:
+    return "{5:02X}:{4:02X}:{3:02X}:{2:02X}:{1:02X}:{0:02X}".format(*raw)
+
+
+def _int8(value: int) -> int:
+    return value - 256 if value > 127 else value
+
+
+def _uuid16(raw: bytes) -> str:
+    return "0000{0:04x}{1}".format(int.from_bytes(raw, "little"), _BASE_UUID)
+
+
+def _uuid32(raw: bytes) -> str:
+    return "{0:08x}{1}".format(int.from_bytes(raw, "little"), _BASE_UUID)
+
+
+def _uuid128(raw: bytes) -> str:
+    h = raw[::-1].hex()
+    return "{0}-{1}-{2}-{3}-{4}".format(h[:8], h[8:12], h[12:16], h[16:20], h[20:])
+
+
+_UUID_LISTS = {
+    0x02: (2, _uuid16),
+    0x03: (2, _uuid16),
+    0x04: (4, _uuid32),
+    0x05: (4, _uuid32),
+    0x06: (16, _uuid128),
+    0x07: (16, _uuid128),
+}
+_SERVICE_DATA = {0x16: (2, _uuid16), 0x20: (4, _uuid32), 0x21: (16, _uuid128)}
+
+
+@lru_cache(maxsize=4096)
+def parse_advertising_data(data: bytes) -> ParsedData:
+    """Parse the AD structures of advertising or scan response data.
+
+    Results are cached on the raw data, as devices repeat the same data.
+
+    Args:
+        data (bytes): The advertising data.
+
+    Returns:
+        A :py:class:`ParsedData`. Malformed trailing structures are ignored.
+
+    """
+    parsed = ParsedData()
+    i = 0
+    end = len(data)
+    while i < end:
+        length = data[i]
+        if length == 0 or i + 1 + length > end:
+            break
+        ad_type = data[i + 1]
+        value = data[i + 2:i + 1 + length]
+        i += 1 + length
+
+        if ad_type == 0xFF and len(value) >= 2:
+            parsed.manufacturer_data[int.from_bytes(value[:2], "little")] = value[2:]
+        elif ad_type in _UUID_LISTS:
+            size, convert = _UUID_LISTS[ad_type]
+            for k in range(0, len(value) - size + 1, size):
+                parsed.service_uuids.append(convert(value[k:k + size]))
+        elif ad_type in _SERVICE_DATA:
+            size, convert = _SERVICE_DATA[ad_type]
+            if len(value) >= size:
+                parsed.service_data[convert(value[:size])] = value[size:]
+        elif ad_type == 0x09 or (ad_type == 0x08 and parsed.local_name is None):
+            parsed.local_name = value.decode("utf-8", "replace")
+        elif ad_type == 0x0A and value:
+            parsed.tx_power = _int8(value[0])
+    return parsed
+
+
+def parse_event(packet: bytes) -> List[AdvertisingReport]:
+    """Parse the advertising reports of an HCI event packet.
+
+    Args:
+        packet (bytes): An HCI packet, starting with the packet type.
+
+    Returns:
+        List of :py:class:`AdvertisingReport`, empty for packets that are not
+        LE (Extended) Advertising Report events.
+
+    """
+    if len(packet) < 5 or packet[0] != HCI_EVENT_PKT or packet[1] != EVT_LE_META_EVENT:
+        return []
+    subevent = packet[3]
+    if subevent == EVT_LE_ADVERTISING_REPORT:
+        return _parse_reports(packet)
+    if subevent == EVT_LE_EXTENDED_ADVERTISING_REPORT:
+        return _parse_extended_reports(packet)
+    return []
+
+
+def _parse_reports(packet: bytes) -> List[AdvertisingReport]:
+    reports = []
+    i = 5
+    end = len(packet)
+    for _ in range(packet[4]):
+        if i + 9 > end:
+            break
+        event_type = packet[i]
+        address_type = packet[i + 1]
+        address = _format_address(packet[i + 2:i + 8])
+        length = packet[i + 8]
+        data = packet[i + 9:i + 9 + length]
+        i += 9 + length
+        if i >= end:
+            break
+        rssi = _int8(packet[i])
+        i += 1
+        reports.append(
+            AdvertisingReport(
+                event_type,
+                address,
+                _ADDRESS_TYPES[address_type & 0x03],
+                None if rssi == 127 else rssi,
+                bytes(data),
+                scan_response=event_type == SCAN_RSP,
+            )
+        )
+    return reports
+
+
+_EXTENDED_REPORT = struct.Struct("<HB6sBBBbbHB6sB")
+
+
+def _parse_extended_reports(packet: bytes) -> List[AdvertisingReport]:
+    reports = []
+    i = 5
+    end = len(packet)
+    for _ in range(packet[4]):
+        if i + _EXTENDED_REPORT.size > end:
+            break
+        (
+            event_type,
+            address_type,
+            address,
+            _,
+            _,
+            _,
+            tx_power,
+            rssi,
+            _,
+            _,
+            _,
+            length,
+        ) = _EXTENDED_REPORT.unpack_from(packet, i)
+        i += _EXTENDED_REPORT.size
+        data = packet[i:i + length]
+        i += length
+        reports.append(
+            AdvertisingReport(
+                event_type,
+                _format_address(address),
+                _ADDRESS_TYPES[address_type & 0x03],
+                None if rssi == 127 else rssi,
+                bytes(data),
+                scan_response=bool(event_type & 0x08),
+                tx_power=None if tx_power == 127 else tx_power,
+            )
+        )
+    return reports
+
+
+def command_packet(ogf: int, ocf: int, params: bytes = b"") -> bytes:
+    """Build an HCI command packet."""
+    return struct.pack("<BHB", HCI_COMMAND_PKT, (ogf << 10) | ocf, len(params)) + params
+
+
+def le_set_scan_parameters(
+    active: bool = True,
+    interval: int = 0x0010,
+    window: int = 0x0010,
+    own_address_type: int = 0,
+    filter_policy: int = 0,
+) -> bytes:
+    """Build an LE Set Scan Parameters command packet.
+
+    ``interval`` and ``window`` are in units of 0.625 ms.
+    """
+    return command_packet(
+        OGF_LE_CTL,
+        OCF_LE_SET_SCAN_PARAMETERS,
+        struct.pack(
+            "<BHHBB", 1 if active else 0, interval, window, own_address_type, filter_policy
+        ),
+    )
+
+
+def le_set_scan_enable(enable: bool, filter_duplicates: bool = False) -> bytes:
+    """Build an LE Set Scan Enable command packet."""
+    return command_packet(
+        OGF_LE_CTL,
+        OCF_LE_SET_SCAN_ENABLE,
+        bytes([1 if enable else 0, 1 if filter_duplicates else 0]),
+    )
+
+
+def parse_command_complete(packet: bytes) -> Optional[Tuple[int, int]]:
+    """Get the opcode and status of a Command Complete or Command Status event.
+
+    Returns:
+        ``(opcode, status)``, or ``None`` for other packets.
+
+    """
+    if len(packet) < 6 or packet[0] != HCI_EVENT_PKT:
+        return None
+    if packet[1] == EVT_CMD_COMPLETE and len(packet) >= 7:
+        return int.from_bytes(packet[4:6], "little"), packet[6]
+    if packet[1] == EVT_CMD_STATUS and len(packet) >= 7:
+        return int.from_bytes(packet[5:7], "little"), packet[3]
+    return None
+
+
+def advertising_report_event(reports) -> bytes:
+    """Build an LE Advertising Report event packet.
+
+    The inverse of :py:func:`parse_event` for legacy reports, e.g. to feed
+    recorded or synthetic advertisements to a scanner.
+
+    Args:
+        reports: Iterable of :py:class:`AdvertisingReport`.
+
+    Returns:
+        The HCI event packet.
+
+    """
+    reports = list(reports)
+    body = bytearray([EVT_LE_ADVERTISING_REPORT, len(reports)])
+    for r in reports:
+        body.append(r.event_type)
+        body.append(0 if r.address_type == "public" else 1)
+        body += bytes.fromhex(r.address.replace(":", ""))[::-1]
+        body.append(len(r.data))
+        body += r.data
+        body.append((127 if r.rssi is None else r.rssi) & 0xFF)
+    return bytes([HCI_EVENT_PKT, EVT_LE_META_EVENT, len(body)]) + bytes(body)
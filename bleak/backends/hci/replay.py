@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Replay of recorded HCI traffic through the scanner pipeline.
+
+Reads btsnoop files, as written by ``btmon -w`` or Android's HCI snoop log,
+and pcap files with Bluetooth HCI link types, and feeds the LE advertising
+reports in them to a :py:class:`BleakScannerReplay`. Filtering, the device
+table, listeners and callbacks then run exactly as for a live scan, on the
+time of the capture, which makes it possible to benchmark and regression
+test them without a radio.
+
+"""
+import asyncio
+import struct
+from asyncio.events import AbstractEventLoop
+from typing import BinaryIO, Iterable, Iterator, Optional, Tuple
+
+from bleak.exc import BleakError
+from bleak.backends.hci import parser
+from bleak.backends.hci.scanner import BleakScannerHCI
+
+# btsnoop datalink types
+BTSNOOP_H1 = 1001
+BTSNOOP_H4 = 1002
+BTSNOOP_MONITOR = 2001
+
+# pcap link types
+LINKTYPE_BLUETOOTH_HCI_H4 = 187
+LINKTYPE_BLUETOOTH_HCI_H4_WITH_PHDR = 201
+LINKTYPE_BLUETOOTH_LINUX_MONITOR = 254
+
+_BTSNOOP_MAGIC = b"btsnoop\0"
+# Microseconds from year 0 to 1970-01-01, the btsnoop time origin.
+_BTSNOOP_EPOCH = 0x00DCDDB30F2F8000
+_BTSNOOP_RECORD = struct.Struct(">IIIIq")
+
+# Linux monitor opcodes of HCI packets
+_MONITOR_TYPES = {2: parser.HCI_COMMAND_PKT, 3: parser.HCI_EVENT_PKT, 4: 0x02, 5: 0x02}
+
+_PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+
+
+def _read_exactly(f: BinaryIO, n: int) -> Optional[bytes]:
+    data = f.read(n)
+    return data if len(data) == n else None
+
+
+def _btsnoop_packet(datalink: int, flags: int, data: bytes) -> Optional[bytes]:
+    if datalink == BTSNOOP_H4:
+        return data
+    if datalink == BTSNOOP_H1:
+        # Bit 1 is set for commands and events, bit 0 for received packets.
+        if flags & 0x02:
+            return bytes([parser.HCI_EVENT_PKT if flags & 0x01 else parser.HCI_COMMAND_PKT]) + data
+        return bytes([0x02]) + data
+    if datalink == BTSNOOP_MONITOR:
+        packet_type = _MONITOR_TYPES.get(flags & 0xFFFF)
+        return bytes([packet_type]) + data if packet_type is not None else None
+    raise BleakError("Unsupported btsnoop datalink type {0}".format(datalink))
+
+
+def read_btsnoop(f: BinaryIO) -> Iterator[Tuple[float, bytes]]:
+    """Read the HCI packets of a btsnoop file.
+
+    Args:
+        f: The file, opened in binary mode.
+
+    Yields:
+        ``(timestamp, packet)`` tuples, with the timestamp in seconds since
+        the epoch and the packet starting with the HCI packet type.
+
+    """
+    header = _read_exactly(f, 16)
+    if header is None or header[:8] != _BTSNOOP_MAGIC:
+        raise BleakError("Not a btsnoop file")
+    _, datalink = struct.unpack(">II", header[8:])
+    while True:
+        record = _read_exactly(f, _BTSNOOP_RECORD.size)
+        if record is None:
+            return
+        _, length, flags, _, timestamp = _BTSNOOP_RECORD.unpack(record)
+        data = _read_exactly(f, length)
+        if data is None:
+            return
+        packet = _btsnoop_packet(datalink, flags, data)
+        if packet is not None:
+            yield (timestamp - _BTSNOOP_EPOCH) / 1e6, packet
+
+
+def read_pcap(f: BinaryIO) -> Iterator[Tuple[float, bytes]]:
+    """Read the HCI packets of a pcap file.
+
+    Supports the ``BLUETOOTH_HCI_H4``, ``BLUETOOTH_HCI_H4_WITH_PHDR`` and
+    ``BLUETOOTH_LINUX_MONITOR`` link types.
+
+    Args:
+        f: The file, opened in binary mode.
+
+    Yields:
+        ``(timestamp, packet)`` tuples, as for :py:func:`read_btsnoop`.
+
+    """
+    header = _read_exactly(f, 24)
+    if header is None or header[:4] not in _PCAP_MAGIC:
+        raise BleakError("Not a pcap file")
+    order, resolution = _PCAP_MAGIC[header[:4]]
+    linktype = struct.unpack(order + "I", header[20:24])[0] & 0x0FFFFFFF
+    if linktype not in (
+        LINKTYPE_BLUETOOTH_HCI_H4,
+        LINKTYPE_BLUETOOTH_HCI_H4_WITH_PHDR,
+        LINKTYPE_BLUETOOTH_LINUX_MONITOR,
+    ):
+        raise BleakError("Unsupported pcap link type {0}".format(linktype))
+    record_header = struct.Struct(order + "IIII")
+    while True:
+        record = _read_exactly(f, record_header.size)
+        if record is None:
+            return
+        seconds, fraction, length, _ = record_header.unpack(record)
+        data = _read_exactly(f, length)
+        if data is None:
+            return
+        timestamp = seconds + fraction * resolution
+        if linktype == LINKTYPE_BLUETOOTH_HCI_H4:
+            yield timestamp, data
+        elif linktype == LINKTYPE_BLUETOOTH_HCI_H4_WITH_PHDR:
+            yield timestamp, data[4:]
+        else:
+            opcode = struct.unpack(">H", data[2:4])[0]
+            packet_type = _MONITOR_TYPES.get(opcode)
+            if packet_type is not None:
+                yield timestamp, bytes([packet_type]) + data[4:]
+
+
+def read_capture(f: BinaryIO) -> Iterator[Tuple[float, bytes]]:
+    """Read the HCI packets of a btsnoop or pcap file, detected on its header."""
+    position = f.tell()
+    magic = f.read(8)
+    f.seek(position)
+    if magic == _BTSNOOP_MAGIC:
+        return read_btsnoop(f)
+    return read_pcap(f)
+
+
+def write_btsnoop(f: BinaryIO, packets: Iterable[Tuple[float, bytes]]) -> None:
+    """Write HCI packets to a btsnoop file with the H4 datalink type.
+
+    Args:
+        f: The file, opened in binary mode.
+        packets: ``(timestamp, packet)`` tuples as yielded by
+            :py:func:`read_btsnoop`.
+
+    """
+    f.write(_BTSNOOP_MAGIC + struct.pack(">II", 1, BTSNOOP_H4))
+    for timestamp, packet in packets:
+        received = packet[0] != parser.HCI_COMMAND_PKT
+        flags = (0x01 if received else 0x00) | (
+            0x02 if packet[0] in (parser.HCI_COMMAND_PKT, parser.HCI_EVENT_PKT) else 0x00
+        )
+        f.write(
+            _BTSNOOP_RECORD.pack(
+                len(packet),
+                len(packet),
+                flags,
+                0,
+                int(round(timestamp * 1e6)) + _BTSNOOP_EPOCH,
+            )
+        )
+        f.write(packet)
+
+
+class BleakScannerReplay(BleakScannerHCI):
+    """A scanner replaying the advertising reports of a btsnoop or pcap file.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+
+    Keyword Args:
+        path (str): The btsnoop or pcap file to replay.
+        speed (float): Playback speed relative to the recording. Defaults to
+            1.0, i.e. real time. Set to ``None`` or 0 to replay as fast as
+            possible.
+        repeat (bool): Start over at the end of the file. Defaults to ``False``.
+
+    Advertisement timestamps, and the ``max_age`` of devices, follow the
+    time of the capture rather than the clock, so replaying as fast as
+    possible ages devices out as they were during the recording. Repeats
+    continue the capture time where the previous pass ended.
+
+    All other keyword arguments but ``device``, ``sock`` and the scanning
+    parameters are the same as for
+    :py:class:`bleak.backends.hci.scanner.BleakScannerHCI`.
+
+    """
+
+    def __init__(self, loop: AbstractEventLoop = None, **kwargs):
+        super(BleakScannerReplay, self).__init__(loop, **kwargs)
+        if "path" not in kwargs:
+            raise BleakError("A path to a btsnoop or pcap file is required.")
+        self._path = kwargs["path"]
+        self._speed = kwargs.get("speed", 1.0)
+        self._repeat = kwargs.get("repeat", False)
+        self._task = None
+        self.packets = 0
+        # Capture time of the latest packet, and the loop time it was
+        # replayed at when replaying in real time.
+        self._capture_time = 0.0
+        self._anchor = None
+
+    async def start(self):
+        self._task = self.loop.create_task(self._replay())
+        if self._max_age is not None:
+            self._prune_task = self.loop.create_task(self._prune_devices())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await super(BleakScannerReplay, self).stop()
+
+    async def wait(self) -> None:
+        """Wait for the replay to reach the end of the file."""
+        if self._task is not None:
+            await asyncio.shield(self._task)
+
+    def _now(self) -> float:
+        if self._anchor is None:
+            return self._capture_time
+        return self._capture_time + (self.loop.time() - self._anchor) * self._speed
+
+    async def _replay(self):
+        offset = 0.0
+        while True:
+            with open(self._path, "rb") as f:
+                first = last = None
+                started = self.loop.time()
+                for timestamp, packet in read_capture(f):
+                    if first is None:
+                        first = timestamp
+                    if self._speed:
+                        delay = started + (timestamp - first) / self._speed - self.loop.time()
+                        if delay > 0:
+                            await asyncio.sleep(delay)
+                        self._anchor = self.loop.time()
+                    elif self.packets % 256 == 0:
+                        # Let other tasks run now and then.
+                        await asyncio.sleep(0)
+                    self._capture_time = offset + timestamp
+                    if self._max_age is not None:
+                        self._devices.prune()
+                    self.packets += 1
+                    self.handle_packet(packet)
+                    last = timestamp
+            if not self._repeat:
+                return
+            if first is not None:
+                offset += last - first
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+"""
+Linux BLE scanner reading advertising reports straight from a raw HCI socket.
+
+"""
+import asyncio
+import logging
+import socket
+import struct
+import time
+from asyncio.events import AbstractEventLoop
+from typing import Callable, List
+
+from bleak.exc import BleakError
+from bleak.backends import metrics
+from bleak.backends.cache import DeviceCache
+from bleak.backends.device import AdvertisementData, BLEDevice
+from bleak.backends.scanner import BaseBleakScanner
+from bleak.backends.hci import parser
+
+logger = logging.getLogger(__name__)
+
+# Not all Python builds define the Bluetooth socket constants.
+AF_BLUETOOTH = getattr(socket, "AF_BLUETOOTH", 31)
+BTPROTO_HCI = getattr(socket, "BTPROTO_HCI", 1)
+SOL_HCI = getattr(socket, "SOL_HCI", 0)
+HCI_FILTER = getattr(socket, "HCI_FILTER", 2)
+
+_MAX_PACKET = 1024
+
+
+def _hci_filter() -> bytes:
+    # struct hci_filter: packet type mask, event mask (64 bits), opcode.
+    events = 0
+    for event in (parser.EVT_CMD_COMPLETE, parser.EVT_CMD_STATUS, parser.EVT_LE_META_EVENT):
+        events |= 1 << event
+    return struct.pack(
+        "<IIIH", 1 << parser.HCI_EVENT_PKT, events & 0xFFFFFFFF, events >> 32, 0
+    )
+
+
+def open_hci_socket(device: str = "hci0") -> socket.socket:
+    """Open a raw HCI socket on an adapter, receiving LE meta events.
+
+    Requires the ``CAP_NET_RAW`` capability.
+
+    Args:
+        device (str): The Bluetooth adapter, e.g. ``"hci0"``.
+
+    Returns:
+        The non-blocking socket.
+
+    """
+    try:
+        dev_id = int(device[3:]) if device.startswith("hci") else int(device)
+    except ValueError:
+        raise BleakError("Invalid HCI device {0}".format(device))
+    try:
+        sock = socket.socket(AF_BLUETOOTH, socket.SOCK_RAW, BTPROTO_HCI)
+        sock.bind((dev_id,))
+        sock.setsockopt(SOL_HCI, HCI_FILTER, _hci_filter())
+    except OSError as e:
+        raise BleakError("Could not open HCI socket on {0}: {1}".format(device, e))
+    sock.setblocking(False)
+    return sock
+
+
+class _DeviceState(object):
+    __slots__ = (
+        "address_type",
+        "rssi",
+        "local_name",
+        "manufacturer_data",
+        "service_data",
+        "service_uuids",
+        "tx_power",
+    )
+
+    def __init__(self, address_type):
+        self.address_type = address_type
+        self.rssi = None
+        self.local_name = None
+        self.manufacturer_data = {}
+        self.service_data = {}
+        self.service_uuids = []
+        self.tx_power = None
+
+    def merge(self, report, data):
+        # Advertisements and scan responses carry different parts of the
+        # data, so fields are kept until the device sends new values.
+        if report.rssi is not None:
+            self.rssi = report.rssi
+        if data.local_name is not None:
+            self.local_name = data.local_name
+        if data.manufacturer_data:
+            self.manufacturer_data = data.manufacturer_data
+        if data.service_data:
+            self.service_data = data.service_data
+        if data.service_uuids:
+            self.service_uuids = data.service_uuids
+        tx_power = data.tx_power if data.tx_power is not None else report.tx_power
+        if tx_power is not None:
+            self.tx_power = tx_power
+
+    def device(self, address, details) -> BLEDevice:
+        return BLEDevice(
+            address,
+            self.local_name,
+            details,
+            rssi=self.rssi,
+            uuids=self.service_uuids,
+            manufacturer_data=self.manufacturer_data,
+            service_data=self.service_data,
+            tx_power=self.tx_power,
+            address_type=self.address_type,
+        )
+
+
+class BleakScannerHCI(BaseBleakScanner):
+    """A Linux BLE Scanner using a raw HCI socket instead of BlueZ.
+
+    Advertising reports are read from the controller and parsed directly,
+    bypassing bluetoothd and D-Bus, and without bluetoothd merging and
+    throttling reports. Opening the socket requires the ``CAP_NET_RAW``
+    capability, and bluetoothd must not be scanning on the same adapter.
+
+    The detection callback is called with every
+    :py:class:`bleak.backends.hci.parser.AdvertisingReport`, which is also
+    the ``details`` of the devices.
+
+    Args:
+        loop (asyncio.events.AbstractEventLoop): The event loop to use.
+
+    Keyword Args:
+        device (str): Bluetooth device to use for discovery. Defaults to ``"hci0"``.
+        scanning_mode (str): Set to ``"passive"`` to avoid the ``"active"``
+            scanning mode.
+        interval (int): Scan interval in units of 0.625 ms. Defaults to 0x10.
+        window (int): Scan window in units of 0.625 ms. Defaults to 0x10.
+        filter_duplicates (bool): Let the controller drop duplicate reports.
+            Defaults to ``False``.
+        sock (socket.socket): An already open socket delivering HCI packets,
+            e.g. one end of a ``socket.socketpair(socket.AF_UNIX,
+            socket.SOCK_SEQPACKET)`` to feed recorded packets. No commands
+            are sent to the controller when given.
+        rules (list of AdvertisementRule): Declarative rules that
+            advertisements must match before the detection callback is called.
+        max_age (float): Seconds a device may go without being seen before
+            it is forgotten, and reported lost. Checked periodically while
+            scanning. Defaults to ``None``.
+        max_devices (int): Maximum number of devices to keep track of.
+            Defaults to ``None``.
+
+    """
+
+    def __init__(self, loop: AbstractEventLoop = None, **kwargs):
+        super(BleakScannerHCI, self).__init__(loop, **kwargs)
+        self._device = kwargs.get("device", "hci0")
+        self._active = kwargs.get("scanning_mode", "active").lower() != "passive"
+        self._interval = kwargs.get("interval", 0x0010)
+        self._window = kwargs.get("window", 0x0010)
+        self._filter_duplicates = kwargs.get("filter_duplicates", False)
+        self._given_sock = kwargs.get("sock")
+        self._sock = None
+        self._callback = None
+        self._max_age = kwargs.get("max_age")
+        self._devices = DeviceCache(
+            self._max_age,
+            kwargs.get("max_devices"),
+            on_evict=self._device_evicted,
+            clock=self._now,
+        )
+        self._prune_task = None
+
+    async def start(self):
+        if self._given_sock is not None:
+            self._sock = self._given_sock
+            self._sock.setblocking(False)
+        else:
+            self._sock = open_hci_socket(self._device)
+            try:
+                self._sock.send(parser.le_set_scan_enable(False))
+                self._sock.send(
+                    parser.le_set_scan_parameters(
+                        self._active, self._interval, self._window
+                    )
+                )
+                self._sock.send(
+                    parser.le_set_scan_enable(True, self._filter_duplicates)
+                )
+            except OSError as e:
+                self._sock.close()
+                self._sock = None
+                raise BleakError("Could not start scanning: {0}".format(e))
+        self.loop.add_reader(self._sock.fileno(), self._on_readable)
+        if self._max_age is not None:
+            self._prune_task = self.loop.create_task(self._prune_devices())
+
+    async def stop(self):
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            self._prune_task = None
+        if self._sock is None:
+            return
+        self.loop.remove_reader(self._sock.fileno())
+        if self._given_sock is None:
+            try:
+                self._sock.send(parser.le_set_scan_enable(False))
+            except OSError as e:
+                logger.warning("Could not stop scanning: {0}".format(e))
+            self._sock.close()
+        self._sock = None
+
+    async def set_scanning_filter(self, **kwargs):
+        if "rules" in kwargs:
+            self.set_advertisement_rules(kwargs["rules"])
+
+    async def get_discovered_devices(self) -> List[BLEDevice]:
+        self._devices.prune()
+        return [
+            state.device(address, None)
+            for address, state in self._devices.items()
+            if self._accepts(address, state)
+        ]
+
+    def register_detection_callback(self, callback: Callable):
+        """Set a function to be called on each advertising report.
+
+        Args:
+            callback: Function accepting one argument of type
+                :py:class:`bleak.backends.hci.parser.AdvertisingReport`.
+
+        """
+        self._callback = callback
+
+    # Helper methods
+
+    def _accepts(self, address, state) -> bool:
+        return self._matcher is None or self._matcher.matches(
+            address,
+            state.local_name,
+            state.rssi,
+            state.manufacturer_data,
+            state.service_data,
+            state.service_uuids,
+        )
+
+    def _now(self) -> float:
+        # Clock of the device table and of the advertisement timestamps.
+        return time.monotonic()
+
+    async def _prune_devices(self):
+        interval = max(self._max_age / 4.0, 0.1)
+        while True:
+            await asyncio.sleep(interval)
+            self._devices.prune()
+
+    def _on_readable(self):
+        while True:
+            try:
+                packet = self._sock.recv(_MAX_PACKET)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.error("HCI socket failed: {0}".format(e))
+                self.loop.remove_reader(self._sock.fileno())
+                return
+            if not packet:
+                self.loop.remove_reader(self._sock.fileno())
+                return
+            self.handle_packet(packet)
+
+    def handle_packet(self, packet: bytes) -> None:
+        """Process one HCI packet."""
+        reports = parser.parse_event(packet)
+        if not reports:
+            status = parser.parse_command_complete(packet)
+            if status is not None and status[1] != 0:
+                logger.error(
+                    "HCI command 0x{0:04x} failed with status 0x{1:02x}".format(*status)
+                )
+            return
+        for report in reports:
+            self.handle_report(report)
+
+    def handle_report(self, report: parser.AdvertisingReport) -> None:
+        """Process one advertising report."""
+        metrics.count_advertisements(self._device)
+        data = parser.parse_advertising_data(report.data)
+        address = report.address
+        state = self._devices.get(address)
+        if state is None:
+            state = _DeviceState(report.address_type)
+        state.merge(report, data)
+        self._devices[address] = state
+
+        if not self._accepts(address, state):
+            return
+
+        if self._advertisement_listeners:
+            device = state.device(address, report)
+            self._notify_listeners(
+                device,
+                AdvertisementData(
+                    local_name=data.local_name,
+                    rssi=report.rssi,
+                    manufacturer_data=data.manufacturer_data,
+                    service_data=data.service_data,
+                    service_uuids=data.service_uuids,
+                    tx_power=device.tx_power,
+                    timestamp=self._now(),
+                    platform_data=report,
+                ),
+            )
+
+        if self._callback is not None:
+            self._callback(report)
+
+    def _device_evicted(self, address, state):
+        self._device_lost(state.device(address, None))
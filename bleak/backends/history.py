@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""
+Fixed-size RSSI histories of many devices, with statistics over all of them.
+
+The samples of all devices live in two flat, preallocated arrays, one row of
+``size`` samples per device, used as ring buffers. Adding a sample is O(1)
+and allocates nothing, and the arrays can be viewed as ``(devices, size)``
+NumPy matrices without copying, so statistics are computed for all devices
+in a handful of vectorised operations. NumPy is optional; without it the
+statistics are computed in plain Python.
+
+"""
+import math
+import time
+from array import array
+from typing import Callable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+from bleak.backends.device import AdvertisementData, BLEDevice
+
+
+class RssiStats(object):
+    """RSSI statistics of all devices in a :py:class:`RssiHistory`.
+
+    Each attribute but ``addresses`` is a sequence with one value per device,
+    in the order of ``addresses``: a NumPy array if NumPy is installed,
+    otherwise a list.
+
+    Attributes:
+        addresses (list): The addresses of the devices.
+        count: The number of samples in the window.
+        mean: The mean RSSI over the window, in dBm.
+        median: The median RSSI over the window, in dBm.
+        ewma: The exponentially weighted moving average of the RSSI, in dBm.
+        slope: The least squares slope of the RSSI over the window, in dBm
+            per second. ``nan`` with fewer than two samples.
+
+    """
+
+    __slots__ = ("addresses", "count", "mean", "median", "ewma", "slope")
+
+    def __init__(self, addresses, count, mean, median, ewma, slope):
+        self.addresses = addresses
+        self.count = count
+        self.mean = mean
+        self.median = median
+        self.ewma = ewma
+        self.slope = slope
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def as_dict(self) -> dict:
+        """Get the statistics keyed on address.
+
+        Returns:
+            Dict of address to dict with keys ``count``, ``mean``, ``median``,
+            ``ewma`` and ``slope``.
+
+        """
+        return {
+            address: {
+                "count": int(self.count[i]),
+                "mean": float(self.mean[i]),
+                "median": float(self.median[i]),
+                "ewma": float(self.ewma[i]),
+                "slope": float(self.slope[i]),
+            }
+            for i, address in enumerate(self.addresses)
+        }
+
+
+class RssiHistory(object):
+    """The latest RSSI samples and their timestamps for any number of devices.
+
+    Args:
+        size (int): Number of samples kept per device. Defaults to 32.
+        alpha (float): Smoothing factor of the exponentially weighted moving
+            average, between 0 and 1. Defaults to 0.3.
+        capacity (int): Number of devices to preallocate room for. The arrays
+            grow as needed. Defaults to 64.
+        clock (callable): Function returning the current time in seconds, used
+            for samples without a timestamp. Defaults to :py:func:`time.monotonic`.
+
+    """
+
+    def __init__(
+        self,
+        size: int = 32,
+        alpha: float = 0.3,
+        capacity: int = 64,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        self.size = size
+        self.alpha = alpha
+        self._clock = clock
+        # address -> row
+        self._rows = {}
+        self._free = []
+        self._capacity = 0
+        self._rssi = array("d")
+        self._time = array("d")
+        self._count = array("l")
+        self._head = array("l")
+        self._ewma = array("d")
+        self._grow(max(capacity, 1))
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, address):
+        return address in self._rows
+
+    def add(self, address: str, rssi: int, timestamp: Optional[float] = None) -> None:
+        """Add a sample.
+
+        Args:
+            address (str): The address of the device.
+            rssi (int): The signal strength in dBm.
+            timestamp (float): The time of the sample. Defaults to now.
+
+        """
+        row = self._rows.get(address)
+        if row is None:
+            if not self._free:
+                self._grow(self._capacity * 2)
+            row = self._rows[address] = self._free.pop()
+            self._count[row] = 0
+            self._head[row] = 0
+            self._ewma[row] = rssi
+        else:
+            self._ewma[row] += self.alpha * (rssi - self._ewma[row])
+
+        head = self._head[row]
+        i = row * self.size + head
+        self._rssi[i] = rssi
+        self._time[i] = self._clock() if timestamp is None else timestamp
+        self._head[row] = (head + 1) % self.size
+        if self._count[row] < self.size:
+            self._count[row] += 1
+
+    def update(
+        self, device: BLEDevice, advertisement_data: AdvertisementData = None
+    ) -> None:
+        """Add the RSSI of an advertisement.
+
+        Can be used as an advertisement listener on a scanner.
+        """
+        timestamp = None
+        rssi = device.rssi
+        if advertisement_data is not None:
+            timestamp = advertisement_data.timestamp
+            if advertisement_data.rssi is not None:
+                rssi = advertisement_data.rssi
+        if rssi is not None:
+            self.add(device.address, rssi, timestamp)
+
+    def remove(self, address: str) -> None:
+        """Forget the samples of a device, freeing its row."""
+        row = self._rows.pop(address, None)
+        if row is not None:
+            self._count[row] = 0
+            self._free.append(row)
+
+    def clear(self) -> None:
+        """Forget the samples of all devices."""
+        for address in list(self._rows):
+            self.remove(address)
+
+    def samples(self, address: str) -> List[tuple]:
+        """Get the samples of one device.
+
+        Returns:
+            List of ``(timestamp, rssi)`` tuples, oldest first.
+
+        """
+        row = self._rows.get(address)
+        if row is None:
+            return []
+        count = self._count[row]
+        start = row * self.size
+        first = (self._head[row] - count) % self.size
+        samples = []
+        for k in range(count):
+            i = start + (first + k) % self.size
+            samples.append((self._time[i], self._rssi[i]))
+        return samples
+
+    def stats(self) -> RssiStats:
+        """Compute the statistics of all devices at once.
+
+        Returns:
+            A :py:class:`RssiStats`.
+
+        """
+        if np is not None:
+            return self._stats_numpy()
+        return self._stats_python()
+
+    # Helper methods
+
+    def _grow(self, capacity: int):
+        extra = capacity - self._capacity
+        self._rssi.extend([math.nan] * (extra * self.size))
+        self._time.extend([math.nan] * (extra * self.size))
+        self._count.extend([0] * extra)
+        self._head.extend([0] * extra)
+        self._ewma.extend([math.nan] * extra)
+        # Hand out low rows first, so that used rows stay packed.
+        self._free.extend(range(capacity - 1, self._capacity - 1, -1))
+        self._capacity = capacity
+
+    def _stats_numpy(self) -> RssiStats:
+        addresses = list(self._rows)
+        if not addresses:
+            empty = np.empty(0)
+            return RssiStats(addresses, np.empty(0, dtype=int), empty, empty, empty, empty)
+
+        rows = np.fromiter(self._rows.values(), dtype=np.intp, count=len(addresses))
+        count = np.frombuffer(self._count, dtype="i%d" % self._count.itemsize)[rows]
+        # Ring buffer slots past the sample count are unused. All samples in
+        # the window are taken into account, so their order does not matter.
+        window = np.arange(self.size)[np.newaxis, :] < count[:, np.newaxis]
+        rssi = np.where(window, np.frombuffer(self._rssi).reshape(-1, self.size)[rows], np.nan)
+        times = np.where(window, np.frombuffer(self._time).reshape(-1, self.size)[rows], np.nan)
+
+        mean = np.nanmean(rssi, axis=1)
+        median = np.nanmedian(rssi, axis=1)
+        dt = times - np.nanmean(times, axis=1)[:, np.newaxis]
+        dr = rssi - mean[:, np.newaxis]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = np.nansum(dt * dr, axis=1) / np.nansum(dt * dt, axis=1)
+        slope[count < 2] = np.nan
+        ewma = np.frombuffer(self._ewma)[rows]
+        return RssiStats(addresses, count, mean, median, ewma, slope)
+
+    def _stats_python(self) -> RssiStats:
+        addresses, count, mean, median, ewma, slope = [], [], [], [], [], []
+        for address, row in self._rows.items():
+            samples = self.samples(address)
+            n = len(samples)
+            values = sorted(r for _, r in samples)
+            m = sum(values) / n
+            half = n // 2
+            med = values[half] if n % 2 else (values[half - 1] + values[half]) / 2.0
+            tm = sum(t for t, _ in samples) / n
+            sxx = sum((t - tm) ** 2 for t, _ in samples)
+            sxy = sum((t - tm) * (r - m) for t, r in samples)
+            addresses.append(address)
+            count.append(n)
+            mean.append(m)
+            median.append(med)
+            ewma.append(self._ewma[row])
+            slope.append(sxy / sxx if n > 1 and sxx else math.nan)
+        return RssiStats(addresses, count, mean, median, ewma, slope)
@@ -0,0 +1,386 @@
+# -*- coding: utf-8 -*-
+"""
+Declarative advertisement rules and a compiled, indexed matcher for them.
+
+Rules are compiled once into hash indexes keyed by company identifier,
+service data UUID, service UUID and address OUI, so that an advertisement is
+only checked in full against the few rules that can possibly match it.
+
+"""
+import re
+from typing import Iterable, List, Optional, Union
+
+from bleak.exc import BleakError
+from bleak.uuids import normalize_uuid_str
+
+
+class BytePattern(object):
+    """A value/mask byte pattern matched at an offset within a payload.
+
+    A payload matches if ``payload[offset + i] & mask[i] == value[i] & mask[i]``
+    for every byte in ``value``.
+
+    Args:
+        value (bytes): The bytes to match.
+        mask (bytes): Optional mask, of the same length as ``value``. Defaults
+            to matching every bit of ``value``.
+        offset (int): Offset into the payload where ``value`` starts.
+
+    """
+
+    __slots__ = ("value", "mask", "offset", "key_length", "_value_int", "_mask_int")
+
+    def __init__(self, value: bytes, mask: Optional[bytes] = None, offset: int = 0):
+        value = bytes(value)
+        mask = bytes(mask) if mask is not None else b"\xff" * len(value)
+        if len(mask) != len(value):
+            raise BleakError("Mask and value of a BytePattern must be of equal length.")
+        if offset < 0:
+            raise BleakError("BytePattern offset must not be negative.")
+
+        self.value = bytes(v & m for v, m in zip(value, mask))
+        self.mask = mask
+        self.offset = offset
+
+        # The leading run of fully masked bytes can be looked up by hash.
+        n = 0
+        while n < len(mask) and mask[n] == 0xFF:
+            n += 1
+        self.key_length = n
+
+        self._value_int = int.from_bytes(self.value, "big")
+        self._mask_int = int.from_bytes(self.mask, "big")
+
+    def __repr__(self):
+        return "BytePattern({0!r}, mask={1!r}, offset={2})".format(
+            self.value, self.mask, self.offset
+        )
+
+    @property
+    def key(self) -> bytes:
+        """The fully masked prefix of ``value`` used for indexing"""
+        return self.value[: self.key_length]
+
+    def matches(self, data) -> bool:
+        """Check if a payload matches this pattern.
+
+        Args:
+            data (bytes or list of int): The payload.
+
+        Returns:
+            Boolean representing if the payload matched.
+
+        """
+        end = self.offset + len(self.value)
+        if len(data) < end:
+            return False
+        chunk = bytes(data[self.offset : end])
+        if self.key_length == len(self.value):
+            return chunk == self.value
+        return int.from_bytes(chunk, "big") & self._mask_int == self._value_int
+
+
+def _as_pattern(pattern) -> Optional[BytePattern]:
+    if pattern is None or isinstance(pattern, BytePattern):
+        return pattern
+    # Plain bytes are treated as a prefix.
+    return BytePattern(pattern)
+
+
+class AdvertisementRule(object):
+    """A declarative rule matching Bluetooth LE advertisements.
+
+    All criteria that are given must be fulfilled for an advertisement to
+    match. A rule without any criteria matches everything.
+
+    Args:
+        tag: Optional user data identifying the rule, returned unchanged.
+
+    Keyword Args:
+        company_id (int): Company identifier that must be present in the
+            manufacturer data.
+        manufacturer_data (BytePattern or bytes): Pattern that the manufacturer
+            data of ``company_id`` must match. Plain bytes match as a prefix.
+        service_data_uuid (str): Service UUID that must be present in the
+            service data.
+        service_data (BytePattern or bytes): Pattern that the service data of
+            ``service_data_uuid`` must match. Plain bytes match as a prefix.
+        service_uuids (iterable of str): At least one of these service UUIDs
+            must be advertised.
+        address_prefix (str): Prefix that the address must start with, e.g.
+            an OUI on the form ``"AA:BB:CC"``.
+        rssi_min (int): Lowest accepted RSSI, in dBm.
+        rssi_max (int): Highest accepted RSSI, in dBm.
+        local_name (str or compiled regex): Regular expression that the
+            local name must match, using ``re.match`` semantics.
+
+    """
+
+    __slots__ = (
+        "tag",
+        "company_id",
+        "manufacturer_data",
+        "service_data_uuid",
+        "service_data",
+        "service_uuids",
+        "address_prefix",
+        "rssi_min",
+        "rssi_max",
+        "local_name",
+    )
+
+    def __init__(
+        self,
+        tag=None,
+        company_id: Optional[int] = None,
+        manufacturer_data: Union[BytePattern, bytes, None] = None,
+        service_data_uuid: Optional[str] = None,
+        service_data: Union[BytePattern, bytes, None] = None,
+        service_uuids: Optional[Iterable[str]] = None,
+        address_prefix: Optional[str] = None,
+        rssi_min: Optional[int] = None,
+        rssi_max: Optional[int] = None,
+        local_name=None,
+    ):
+        if manufacturer_data is not None and company_id is None:
+            raise BleakError("A manufacturer data pattern requires a company_id.")
+        if service_data is not None and service_data_uuid is None:
+            raise BleakError("A service data pattern requires a service_data_uuid.")
+
+        self.tag = tag
+        self.company_id = company_id
+        self.manufacturer_data = _as_pattern(manufacturer_data)
+        self.service_data_uuid = (
+            normalize_uuid_str(service_data_uuid)
+            if service_data_uuid is not None
+            else None
+        )
+        self.service_data = _as_pattern(service_data)
+        self.service_uuids = (
+            frozenset(normalize_uuid_str(u) for u in service_uuids)
+            if service_uuids is not None
+            else None
+        )
+        self.address_prefix = (
+            address_prefix.upper().replace("-", ":")
+            if address_prefix is not None
+            else None
+        )
+        self.rssi_min = rssi_min
+        self.rssi_max = rssi_max
+        self.local_name = (
+            re.compile(local_name) if isinstance(local_name, str) else local_name
+        )
+
+    def __repr__(self):
+        return "<AdvertisementRule {0!r}>".format(self.tag)
+
+    def matches(
+        self,
+        address: str,
+        local_name: Optional[str] = None,
+        rssi: Optional[int] = None,
+        manufacturer_data: Optional[dict] = None,
+        service_data: Optional[dict] = None,
+        service_uuids: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """Check an advertisement against this rule alone.
+
+        See :py:meth:`AdvertisementMatcher.match` for the arguments.
+
+        Returns:
+            Boolean representing if the advertisement matched.
+
+        """
+        if self.company_id is not None:
+            data = (manufacturer_data or {}).get(self.company_id)
+            if data is None:
+                return False
+            if self.manufacturer_data is not None and not self.manufacturer_data.matches(
+                data
+            ):
+                return False
+        if self.service_data_uuid is not None:
+            data = (service_data or {}).get(self.service_data_uuid)
+            if data is None:
+                return False
+            if self.service_data is not None and not self.service_data.matches(data):
+                return False
+        if self.service_uuids is not None and self.service_uuids.isdisjoint(
+            service_uuids or ()
+        ):
+            return False
+        if self.address_prefix is not None and not (address or "").upper().startswith(
+            self.address_prefix
+        ):
+            return False
+        if self.rssi_min is not None and (rssi is None or rssi < self.rssi_min):
+            return False
+        if self.rssi_max is not None and (rssi is None or rssi > self.rssi_max):
+            return False
+        if self.local_name is not None and (
+            local_name is None or not self.local_name.match(local_name)
+        ):
+            return False
+        return True
+
+
+class _PatternBucket(object):
+    """Rules sharing an index key, sub-indexed on their exact-match prefix."""
+
+    __slots__ = ("keyed", "rest")
+
+    def __init__(self):
+        # (offset, length) -> {prefix bytes: [rule indices]}
+        self.keyed = {}
+        self.rest = []
+
+    def add(self, index: int, pattern: Optional[BytePattern]):
+        if pattern is None or pattern.key_length == 0:
+            self.rest.append(index)
+        else:
+            table = self.keyed.setdefault((pattern.offset, pattern.key_length), {})
+            table.setdefault(pattern.key, []).append(index)
+
+    def candidates(self, data, out: set):
+        out.update(self.rest)
+        for (offset, length), table in self.keyed.items():
+            found = table.get(bytes(data[offset : offset + length]))
+            if found:
+                out.update(found)
+
+
+class AdvertisementMatcher(object):
+    """A set of :py:class:`AdvertisementRule` compiled into hash indexes.
+
+    Each rule is indexed on its most selective criterion, in order: company
+    identifier (sub-indexed on the exact-match prefix of its manufacturer data
+    pattern), service data UUID (sub-indexed likewise), service UUIDs and
+    address OUI. Checking an advertisement then only costs a few dictionary
+    lookups plus a full check of the candidate rules, regardless of how many
+    rules there are in total.
+
+    Args:
+        rules (iterable of AdvertisementRule): The rules to compile.
+
+    """
+
+    def __init__(self, rules: Iterable[AdvertisementRule]):
+        self._rules = list(rules)
+        self._by_company = {}
+        self._by_service_data = {}
+        self._by_service_uuid = {}
+        self._by_oui = {}
+        self._unindexed = []
+
+        for i, rule in enumerate(self._rules):
+            if rule.company_id is not None:
+                self._by_company.setdefault(rule.company_id, _PatternBucket()).add(
+                    i, rule.manufacturer_data
+                )
+            elif rule.service_data_uuid is not None:
+                self._by_service_data.setdefault(
+                    rule.service_data_uuid, _PatternBucket()
+                ).add(i, rule.service_data)
+            elif rule.service_uuids:
+                for u in rule.service_uuids:
+                    self._by_service_uuid.setdefault(u, []).append(i)
+            elif rule.address_prefix is not None and len(rule.address_prefix) >= 8:
+                self._by_oui.setdefault(rule.address_prefix[:8], []).append(i)
+            else:
+                self._unindexed.append(i)
+
+    def __len__(self):
+        return len(self._rules)
+
+    @property
+    def rules(self) -> List[AdvertisementRule]:
+        """The compiled rules, in the order they were given"""
+        return list(self._rules)
+
+    def _candidates(
+        self, address, manufacturer_data, service_data, service_uuids
+    ) -> set:
+        out = set(self._unindexed)
+        if manufacturer_data and self._by_company:
+            for company_id, data in manufacturer_data.items():
+                bucket = self._by_company.get(company_id)
+                if bucket is not None:
+                    bucket.candidates(data, out)
+        if service_data and self._by_service_data:
+            for _uuid, data in service_data.items():
+                bucket = self._by_service_data.get(_uuid)
+                if bucket is not None:
+                    bucket.candidates(data, out)
+        if service_uuids and self._by_service_uuid:
+            for _uuid in service_uuids:
+                out.update(self._by_service_uuid.get(_uuid, ()))
+        if address and self._by_oui:
+            out.update(self._by_oui.get(address[:8].upper(), ()))
+        return out
+
+    def match(
+        self,
+        address: str,
+        local_name: Optional[str] = None,
+        rssi: Optional[int] = None,
+        manufacturer_data: Optional[dict] = None,
+        service_data: Optional[dict] = None,
+        service_uuids: Optional[Iterable[str]] = None,
+    ) -> List[AdvertisementRule]:
+        """Get all rules matching an advertisement.
+
+        Args:
+            address (str): The address of the advertising device.
+            local_name (str): The advertised local name, if any.
+            rssi (int): The signal strength in dBm, if known.
+            manufacturer_data (dict): Company identifier to payload.
+            service_data (dict): Lower case 128-bit UUID string to payload.
+            service_uuids (iterable of str): Lower case 128-bit UUID strings.
+
+        Returns:
+            List of matching rules, in the order they were given.
+
+        """
+        candidates = self._candidates(
+            address, manufacturer_data, service_data, service_uuids
+        )
+        return [
+            self._rules[i]
+            for i in sorted(candidates)
+            if self._rules[i].matches(
+                address,
+                local_name,
+                rssi,
+                manufacturer_data,
+                service_data,
+                service_uuids,
+            )
+        ]
+
+    def matches(
+        self,
+        address: str,
+        local_name: Optional[str] = None,
+        rssi: Optional[int] = None,
+        manufacturer_data: Optional[dict] = None,
+        service_data: Optional[dict] = None,
+        service_uuids: Optional[Iterable[str]] = None,
+    ) -> bool:
+        """Check if any rule matches an advertisement.
+
+        Takes the same arguments as :py:meth:`match`, but stops at the first
+        matching rule.
+
+        Returns:
+            Boolean representing if any rule matched.
+
+        """
+        for i in self._candidates(
+            address, manufacturer_data, service_data, service_uuids
+        ):
+            if self._rules[i].matches(
+                address, local_name, rssi, manufacturer_data, service_data, service_uuids
+            ):
+                return True
+        return False
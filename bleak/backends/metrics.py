@@ -0,0 +1,381 @@
+# -*- coding: utf-8 -*-
+"""
+Process wide metrics of connections, notifications and scanning.
+
+Backends update the metrics below as they go: a counter or gauge update is
+one dict lookup and addition, cheap enough to leave on in production.
+:py:func:`generate_text` renders all of them in the `OpenMetrics
+<https://openmetrics.io>`_ text format, for a Prometheus scrape endpoint:
+
+.. code-block:: python
+
+    from aiohttp import web
+    from bleak.backends import metrics
+
+    async def handle(request):
+        return web.Response(
+            body=metrics.generate_text().encode(),
+            headers={"Content-Type": metrics.CONTENT_TYPE},
+        )
+
+Per second rates of counters are best left to Prometheus, e.g.
+``rate(bleak_advertisements_total[1m])``; the advertisement rate is also
+available as a gauge, for consumers that read the text directly.
+
+"""
+import time
+import weakref
+from typing import Callable, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if value != value:
+            return "NaN"
+        if value in (float("inf"), float("-inf")):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer():
+            return str(int(value))
+    return repr(value)
+
+
+class _Metric(object):
+    """A metric family with a fixed set of label names."""
+
+    type = "unknown"
+    # Appended to the family name in sample names, e.g. "_total".
+    suffix = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Iterable[str] = (), unit=""
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.unit = unit
+        # label values -> value
+        self._values = {}
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """Get the current values, sorted on their label values."""
+        return sorted(self._values.items())
+
+    def value(self, *labels) -> float:
+        """Get the current value for the given label values, 0 if never set."""
+        return dict(self.samples()).get(tuple(labels), 0)
+
+    def clear(self) -> None:
+        """Remove all values."""
+        self._values.clear()
+
+    def render(self) -> List[str]:
+        """Render the metric family as lines of OpenMetrics text."""
+        lines = [
+            "# TYPE {0} {1}".format(self.name, self.type),
+            "# HELP {0} {1}".format(self.name, _escape(self.documentation)),
+        ]
+        if self.unit:
+            lines.append("# UNIT {0} {1}".format(self.name, self.unit))
+        name = self.name + self.suffix
+        for labels, value in self.samples():
+            if labels:
+                label_text = ",".join(
+                    '{0}="{1}"'.format(k, _escape(str(v)))
+                    for k, v in zip(self.labelnames, labels)
+                )
+                lines.append(
+                    "{0}{{{1}}} {2}".format(name, label_text, _format_value(value))
+                )
+            else:
+                lines.append("{0} {1}".format(name, _format_value(value)))
+        return lines
+
+
+class Counter(_Metric):
+    """A monotonically increasing count.
+
+    Args:
+        name (str): The family name, without the ``_total`` suffix.
+        documentation (str): The help text.
+        labelnames (iterable of str): The names of the labels.
+        unit (str): The unit, e.g. ``"bytes"``. The name must end with it.
+
+    """
+
+    type = "counter"
+    suffix = "_total"
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        """Increment the count for the given label values.
+
+        Args:
+            labels (tuple): The label values, in the order of ``labelnames``.
+            amount (float): How much to add. Must not be negative.
+
+        """
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    """A value that can go up and down.
+
+    Args:
+        name (str): The family name.
+        documentation (str): The help text.
+        labelnames (iterable of str): The names of the labels.
+        unit (str): The unit, e.g. ``"seconds"``.
+        function (callable): Optional function returning ``{label values:
+            value}``, called on every collection. Gauges with a function
+            are not set directly, which keeps work off the hot path for
+            values that are cheap to read when needed, e.g. table sizes.
+
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        unit="",
+        function: Optional[Callable[[], dict]] = None,
+    ):
+        super(Gauge, self).__init__(name, documentation, labelnames, unit)
+        self._function = function
+
+    def set(self, labels: Tuple[str, ...], value: float) -> None:
+        """Set the value for the given label values."""
+        self._values[labels] = value
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        """Add to the value for the given label values."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        """Subtract from the value for the given label values."""
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], float]]:
+        if self._function is not None:
+            return sorted(self._function().items())
+        return super(Gauge, self).samples()
+
+
+class RateGauge(_Metric):
+    """Events per second, averaged over a sliding window of whole seconds.
+
+    Each label set keeps one count per second of the window, so marking an
+    event is a clock read and an addition.
+
+    Args:
+        name (str): The family name.
+        documentation (str): The help text.
+        labelnames (iterable of str): The names of the labels.
+        window (int): Seconds to average over, the current, incomplete one
+            excluded. Defaults to 10.
+        clock (callable): Function returning the current time in seconds.
+            Defaults to :py:func:`time.monotonic`.
+
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        window: int = 10,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super(RateGauge, self).__init__(name, documentation, labelnames)
+        self.window = window
+        self._clock = clock
+        # label values -> [current second, counts indexed by second % size]
+        self._slots = {}
+
+    def mark(self, labels: Tuple[str, ...] = (), count: int = 1) -> None:
+        """Record events for the given label values."""
+        now = int(self._clock())
+        slot = self._slots.get(labels)
+        if slot is None:
+            slot = self._slots[labels] = [now, [0] * (self.window + 1)]
+        elif slot[0] != now:
+            self._advance(slot, now)
+        slot[1][now % (self.window + 1)] += count
+
+    def _advance(self, slot, now):
+        counts = slot[1]
+        size = len(counts)
+        for second in range(max(slot[0] + 1, now - size + 1), now + 1):
+            counts[second % size] = 0
+        slot[0] = now
+
+    def samples(self) -> List[Tuple[Tuple[str, ...], float]]:
+        now = int(self._clock())
+        result = []
+        for labels, slot in sorted(self._slots.items()):
+            if slot[0] != now:
+                self._advance(slot, now)
+            counts = slot[1]
+            total = sum(counts) - counts[now % len(counts)]
+            result.append((labels, total / self.window))
+        return result
+
+    def clear(self) -> None:
+        self._slots.clear()
+
+
+class Registry(object):
+    """A collection of metric families rendered together."""
+
+    def __init__(self):
+        # name -> metric family
+        self._metrics = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """Add a metric family.
+
+        Returns:
+            The metric, so that it can be created and registered in one go.
+
+        Raises:
+            ValueError: If a family of the same name is registered already.
+
+        """
+        if metric.name in self._metrics:
+            raise ValueError("Metric {0} is registered already".format(metric.name))
+        self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, metric: _Metric) -> None:
+        """Remove a metric family."""
+        self._metrics.pop(metric.name, None)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        """Get a metric family by name, or ``None``."""
+        return self._metrics.get(name)
+
+    def clear(self) -> None:
+        """Reset the values of all metric families, e.g. between tests."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def render(self) -> str:
+        """Render all metric families as OpenMetrics text."""
+        lines = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+#: The registry of the metrics of bleak.
+REGISTRY = Registry()
+
+
+def generate_text(registry: Registry = None) -> str:
+    """Render the metrics of a registry in the OpenMetrics text format.
+
+    Args:
+        registry (Registry): Defaults to :py:data:`REGISTRY`.
+
+    Returns:
+        The text, to be served with the ``Content-Type`` in
+        :py:data:`CONTENT_TYPE`.
+
+    """
+    return (registry if registry is not None else REGISTRY).render()
+
+
+# Scanners alive in the process, for the size of their device tables.
+_scanners = weakref.WeakSet()
+
+
+def track_scanner(scanner) -> None:
+    """Include the device table of a scanner in ``bleak_scanner_devices``."""
+    _scanners.add(scanner)
+
+
+def _scanner_table_sizes() -> dict:
+    sizes = {}
+    for scanner in list(_scanners):
+        key = (type(scanner).__name__,)
+        sizes[key] = sizes.get(key, 0) + len(getattr(scanner, "_devices", ()))
+    return sizes
+
+
+CONNECTIONS = REGISTRY.register(
+    Gauge("bleak_connections", "Connected clients.", ("adapter",))
+)
+CONNECT_ATTEMPTS = REGISTRY.register(
+    Counter("bleak_connect_attempts", "Connection attempts.", ("adapter",))
+)
+CONNECT_SUCCESSES = REGISTRY.register(
+    Counter("bleak_connect_successes", "Successful connection attempts.", ("adapter",))
+)
+CONNECT_FAILURES = REGISTRY.register(
+    Counter(
+        "bleak_connect_failures",
+        "Failed connection attempts, by exception class.",
+        ("adapter", "error"),
+    )
+)
+NOTIFICATIONS = REGISTRY.register(
+    Counter(
+        "bleak_notifications",
+        "Notifications received, by characteristic UUID.",
+        ("characteristic",),
+    )
+)
+NOTIFICATION_BYTES = REGISTRY.register(
+    Counter(
+        "bleak_notification_bytes",
+        "Bytes of notification data received, by characteristic UUID.",
+        ("characteristic",),
+        unit="bytes",
+    )
+)
+DROPPED = REGISTRY.register(
+    Counter(
+        "bleak_dropped_packets",
+        "Packets received but not delivered: malformed ones, replies to calls "
+        "given up on and notifications whose callback failed.",
+        ("reason",),
+    )
+)
+ADVERTISEMENTS = REGISTRY.register(
+    Counter("bleak_advertisements", "Advertisements seen.", ("adapter",))
+)
+ADVERTISEMENT_RATE = REGISTRY.register(
+    RateGauge(
+        "bleak_advertisements_per_second",
+        "Advertisements seen per second, over the last 10 seconds.",
+        ("adapter",),
+    )
+)
+SCANNER_DEVICES = REGISTRY.register(
+    Gauge(
+        "bleak_scanner_devices",
+        "Devices in the tables of the scanners, by scanner class.",
+        ("scanner",),
+        function=_scanner_table_sizes,
+    )
+)
+DBUS_CALLS_IN_FLIGHT = REGISTRY.register(
+    Gauge("bleak_dbus_calls_in_flight", "D-Bus method calls awaiting a reply.")
+)
+DBUS_CALLS_IN_FLIGHT.set((), 0)
+
+
+def count_advertisements(adapter: str, count: int = 1) -> None:
+    """Count advertisements seen on an adapter, in total and per second."""
+    ADVERTISEMENTS.inc((adapter,), count)
+    ADVERTISEMENT_RATE.mark((adapter,), count)
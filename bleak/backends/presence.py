@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+"""
+Arrival and departure events for devices seen by a scanner.
+
+A :py:class:`PresenceEngine` turns the advertisements of a scanner into
+``ENTER``, ``UPDATE`` and ``EXIT`` events. A device enters when its RSSI
+reaches ``enter_rssi`` and only exits when its RSSI drops below the lower
+``exit_rssi``, or when it has not been heard from for ``timeout`` seconds.
+
+Departure timeouts of all devices are kept in one :py:class:`TimerWheel`
+driven by a single periodic task, rather than one timer per device, so an
+advertisement costs O(1) and a tick only costs as much as the timeouts that
+are due.
+
+.. code-block:: python
+
+    def on_presence(event, device):
+        print(event.name, device.address)
+
+    presence = PresenceEngine(enter_rssi=-75, exit_rssi=-85, timeout=30.0)
+    presence.add_listener(on_presence)
+    presence.attach(scanner)
+
+"""
+import asyncio
+import enum
+import logging
+import math
+import time
+from typing import Callable, Hashable, List, Optional
+
+from bleak.backends.device import AdvertisementData, BLEDevice
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWheel(object):
+    """A hashed timer wheel.
+
+    Deadlines are hashed into ``slots`` buckets of ``resolution`` seconds
+    each. Scheduling and cancelling are O(1), and advancing the wheel only
+    visits the buckets that came due, checking the deadlines in them. A
+    timer fires at most ``resolution`` seconds late.
+
+    Args:
+        resolution (float): Seconds per bucket.
+        slots (int): Number of buckets. Deadlines more than ``slots *
+            resolution`` seconds ahead are kept, but looked at once per turn
+            of the wheel.
+        now (float): The current time.
+
+    """
+
+    def __init__(self, resolution: float = 1.0, slots: int = 64, now: float = 0.0):
+        self.resolution = resolution
+        self._slots = [dict() for _ in range(slots)]
+        # key -> bucket index
+        self._where = {}
+        self._tick = int(now // resolution)
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def schedule(self, key: Hashable, deadline: float) -> None:
+        """Set the deadline of a key, replacing any earlier one."""
+        self.cancel(key)
+        tick = max(int(math.ceil(deadline / self.resolution)), self._tick + 1)
+        i = tick % len(self._slots)
+        self._slots[i][key] = deadline
+        self._where[key] = i
+
+    def cancel(self, key: Hashable) -> None:
+        """Remove the deadline of a key, if any."""
+        i = self._where.pop(key, None)
+        if i is not None:
+            del self._slots[i][key]
+
+    def advance(self, now: float) -> List[Hashable]:
+        """Advance the wheel and collect the keys whose deadline has passed.
+
+        Args:
+            now (float): The current time.
+
+        Returns:
+            List of expired keys, which are removed from the wheel.
+
+        """
+        target = int(now // self.resolution)
+        expired = []
+        n = len(self._slots)
+        for tick in range(self._tick + 1, min(target, self._tick + n) + 1):
+            slot = self._slots[tick % n]
+            if not slot:
+                continue
+            for key, deadline in list(slot.items()):
+                if deadline <= now:
+                    del slot[key]
+                    del self._where[key]
+                    expired.append(key)
+        self._tick = max(self._tick, target)
+        return expired
+
+
+class PresenceEventType(enum.Enum):
+    """The kinds of events emitted by a :py:class:`PresenceEngine`."""
+
+    ENTER = "enter"
+    UPDATE = "update"
+    EXIT = "exit"
+
+
+class PresenceEngine(object):
+    """Tracks which devices are present, with RSSI hysteresis and timeouts.
+
+    Args:
+        enter_rssi (int): RSSI in dBm a device must reach to enter.
+            Defaults to -75.
+        exit_rssi (int): RSSI in dBm below which a present device exits.
+            Defaults to -85. Must not be above ``enter_rssi``.
+        timeout (float): Seconds without advertisements after which a present
+            device exits. Defaults to 10.0.
+        resolution (float): Seconds between ticks of the timer wheel.
+            Defaults to 1.0.
+        clock (callable): Function returning the current time in seconds.
+            Defaults to :py:func:`time.monotonic`.
+
+    """
+
+    def __init__(
+        self,
+        enter_rssi: int = -75,
+        exit_rssi: int = -85,
+        timeout: float = 10.0,
+        resolution: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if exit_rssi > enter_rssi:
+            raise ValueError("exit_rssi must not be above enter_rssi")
+        self.enter_rssi = enter_rssi
+        self.exit_rssi = exit_rssi
+        self.timeout = timeout
+        self._clock = clock
+        self._wheel = TimerWheel(
+            resolution,
+            max(64, int(math.ceil(timeout / resolution)) + 1),
+            now=clock(),
+        )
+        # address -> BLEDevice, for present devices only
+        self._present = {}
+        self._listeners = []
+        self._scanners = []
+        self._task = None
+
+    def __len__(self):
+        return len(self._present)
+
+    def __contains__(self, address):
+        return address in self._present
+
+    @property
+    def present(self) -> List[BLEDevice]:
+        """The devices currently present, as last seen"""
+        return list(self._present.values())
+
+    def add_listener(
+        self, callback: Callable[[PresenceEventType, BLEDevice], None]
+    ) -> None:
+        """Add a function to be called with every presence event.
+
+        Args:
+            callback: Function accepting a :py:class:`PresenceEventType` and
+                a :py:class:`bleak.backends.device.BLEDevice`.
+
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(
+        self, callback: Callable[[PresenceEventType, BLEDevice], None]
+    ) -> None:
+        """Remove a function added with :py:meth:`add_listener`."""
+        self._listeners.remove(callback)
+
+    def attach(self, scanner) -> None:
+        """Follow the advertisements of a scanner.
+
+        The timer wheel is ticked on the event loop of the scanner for as
+        long as a scanner is attached.
+
+        Args:
+            scanner (BaseBleakScanner): The scanner to listen to.
+
+        """
+        scanner.add_advertisement_listener(self.update)
+        self._scanners.append(scanner)
+        if self._task is None:
+            self._task = scanner.loop.create_task(self._run())
+
+    def detach(self, scanner) -> None:
+        """Stop following a scanner given to :py:meth:`attach`."""
+        scanner.remove_advertisement_listener(self.update)
+        self._scanners.remove(scanner)
+        if not self._scanners and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def update(
+        self, device: BLEDevice, advertisement_data: AdvertisementData = None
+    ) -> None:
+        """Process an advertisement of a device.
+
+        Can be used as an advertisement listener on a scanner.
+        """
+        rssi = device.rssi
+        now = None
+        if advertisement_data is not None:
+            if advertisement_data.rssi is not None:
+                rssi = advertisement_data.rssi
+            now = advertisement_data.timestamp
+        if now is None:
+            now = self._clock()
+        address = device.address
+
+        if address in self._present:
+            if rssi is not None and rssi < self.exit_rssi:
+                self._exit(address, device)
+                return
+            self._present[address] = device
+            self._wheel.schedule(address, now + self.timeout)
+            self._emit(PresenceEventType.UPDATE, device)
+        elif rssi is not None and rssi >= self.enter_rssi:
+            self._present[address] = device
+            self._wheel.schedule(address, now + self.timeout)
+            self._emit(PresenceEventType.ENTER, device)
+
+    def tick(self, now: Optional[float] = None) -> None:
+        """Advance the timer wheel, emitting ``EXIT`` for timed out devices.
+
+        Called periodically while a scanner is attached.
+
+        Args:
+            now (float): The current time. Defaults to the engine clock.
+
+        """
+        for address in self._wheel.advance(self._clock() if now is None else now):
+            device = self._present.pop(address, None)
+            if device is not None:
+                self._emit(PresenceEventType.EXIT, device)
+
+    # Helper methods
+
+    def _exit(self, address, device):
+        self._wheel.cancel(address)
+        del self._present[address]
+        self._emit(PresenceEventType.EXIT, device)
+
+    def _emit(self, event, device):
+        for listener in list(self._listeners):
+            try:
+                listener(event, device)
+            except Exception as e:
+                logger.exception(
+                    "Presence listener failed on {0}: {1}".format(event.name, e)
+                )
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._wheel.resolution)
+            self.tick()
@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+Queryable table of the devices seen by one or more scanners.
+
+A :py:class:`DeviceRegistry` is fed with the parsed advertisements of a
+scanner and keeps secondary indexes on address, advertised service UUID,
+company identifier, name and RSSI, so that questions like "all devices from
+company 0x004C with RSSI above -70 dBm" only visit the devices that can
+answer them. Subscriptions are compiled into an
+:py:class:`bleak.backends.matcher.AdvertisementMatcher`, so that telling
+whether an advertisement is of interest to any subscriber does not depend on
+the number of subscriptions either.
+
+.. code-block:: python
+
+    registry = DeviceRegistry(max_age=60.0)
+    registry.attach(scanner)
+    registry.subscribe(print, company_id=0x004C, rssi_min=-70)
+    nearby = registry.query(service_uuid="180f", rssi_min=-80)
+
+"""
+import bisect
+import itertools
+import re
+import time
+from typing import Callable, List, Optional
+
+from bleak.backends.cache import DeviceCache
+from bleak.backends.device import AdvertisementData, BLEDevice
+from bleak.backends.matcher import AdvertisementMatcher, AdvertisementRule
+from bleak.uuids import normalize_uuid_str
+
+
+class _Entry(object):
+    __slots__ = ("device", "name", "rssi", "uuids", "company_ids", "subscriptions")
+
+    def __init__(self, device: BLEDevice):
+        self.device = device
+        self.name = device.name
+        self.rssi = device.rssi
+        self.uuids = frozenset(normalize_uuid_str(u) for u in device.uuids)
+        self.company_ids = frozenset(device.manufacturer_data)
+        # Tokens of the subscriptions the device currently matches.
+        self.subscriptions = frozenset()
+
+
+def _add(index: dict, key, address: str):
+    bucket = index.get(key)
+    if bucket is None:
+        bucket = index[key] = set()
+    bucket.add(address)
+
+
+def _discard(index: dict, key, address: str):
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.discard(address)
+        if not bucket:
+            del index[key]
+
+
+class DeviceRegistry(object):
+    """An indexed table of devices, keyed on address.
+
+    Args:
+        max_age (float): Seconds a device may go without being seen before it
+            is removed. Stale devices are removed on every update, query and
+            subscription, or explicitly with :py:meth:`prune`. Defaults to
+            ``None``, i.e. devices are kept until removed with
+            :py:meth:`remove`.
+        max_size (int): Maximum number of devices. The least recently seen
+            device is removed when the limit is hit. Defaults to ``None``.
+        clock (callable): Function returning the current time in seconds.
+            Defaults to :py:func:`time.monotonic`.
+
+    """
+
+    def __init__(
+        self,
+        max_age: Optional[float] = None,
+        max_size: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._clock = clock
+        self._entries = DeviceCache(
+            max_age, max_size, on_evict=self._entry_evicted, clock=clock
+        )
+        # Secondary indexes: service UUID, company identifier or RSSI -> set
+        # of addresses
+        self._by_uuid = {}
+        self._by_company = {}
+        self._by_rssi = {}
+        # Sorted list of (name, address)
+        self._names = []
+        self._subscriptions = {}  # token -> (rule, callback)
+        self._matcher = None
+        self._tokens = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, address):
+        return address.upper() in self._entries
+
+    def attach(self, scanner) -> None:
+        """Feed the registry with the advertisements received by a scanner.
+
+        Args:
+            scanner (BaseBleakScanner): The scanner to listen to.
+
+        """
+        scanner.add_advertisement_listener(self.update)
+
+    def detach(self, scanner) -> None:
+        """Stop listening to a scanner given to :py:meth:`attach`."""
+        scanner.remove_advertisement_listener(self.update)
+
+    def update(
+        self, device: BLEDevice, advertisement_data: AdvertisementData = None
+    ) -> None:
+        """Add or refresh a device.
+
+        Subscribers whose criteria the device did not match before are
+        notified.
+
+        Args:
+            device (BLEDevice): The device, as last seen.
+            advertisement_data (AdvertisementData): Unused, accepted so that
+                the method can be used as advertisement listener.
+
+        """
+        self._entries.prune()
+        address = device.address.upper()
+        new = _Entry(device)
+        old = self._entries.get(address)
+        if old is None:
+            self._index(address, new)
+        else:
+            self._reindex(address, old, new)
+            new.subscriptions = old.subscriptions
+        self._entries[address] = new
+
+        if self._matcher is not None:
+            self._notify(address, new)
+
+    def remove(self, address: str) -> Optional[BLEDevice]:
+        """Remove a device.
+
+        Args:
+            address (str): The address of the device.
+
+        Returns:
+            The removed device, or ``None`` if it was not present.
+
+        """
+        address = address.upper()
+        entry = self._entries.pop(address)
+        if entry is None:
+            return None
+        self._unindex(address, entry)
+        return entry.device
+
+    def get(self, address: str) -> Optional[BLEDevice]:
+        """Get a device on its address, or ``None`` if it is not present."""
+        entry = self._entries.get(address.upper())
+        return entry.device if entry is not None else None
+
+    def last_seen(self, address: str) -> Optional[float]:
+        """Get the time a device was last seen, or ``None`` if it is not present."""
+        return self._entries.last_seen(address.upper())
+
+    def prune(self, now: Optional[float] = None) -> List[BLEDevice]:
+        """Remove the devices that have not been seen for ``max_age`` seconds.
+
+        Returns:
+            List of the removed devices.
+
+        """
+        return [entry.device for _, entry in self._entries.prune(now)]
+
+    def query(
+        self,
+        address: Optional[str] = None,
+        service_uuid: Optional[str] = None,
+        company_id: Optional[int] = None,
+        name_prefix: Optional[str] = None,
+        rssi_min: Optional[int] = None,
+        rssi_max: Optional[int] = None,
+        seen_since: Optional[float] = None,
+        seen_before: Optional[float] = None,
+    ) -> List[BLEDevice]:
+        """Get the devices matching all given criteria.
+
+        The most selective index among the criteria is used to find the
+        candidates, which are then checked against the other criteria.
+
+        Args:
+            address (str): The address of the device.
+            service_uuid (str): A service UUID the device advertises.
+            company_id (int): A company identifier the device has
+                manufacturer data for.
+            name_prefix (str): The start of the name of the device.
+            rssi_min (int): The lowest RSSI, in dBm.
+            rssi_max (int): The highest RSSI, in dBm.
+            seen_since (float): The earliest last sighting, on the registry clock.
+            seen_before (float): The latest last sighting, on the registry clock.
+
+        Returns:
+            List of matching :py:class:`bleak.backends.device.BLEDevice`.
+
+        """
+        self._entries.prune()
+        if service_uuid is not None:
+            service_uuid = normalize_uuid_str(service_uuid)
+
+        candidates = []
+        if address is not None:
+            address = address.upper()
+            candidates.append({address} if address in self._entries else set())
+        if service_uuid is not None:
+            candidates.append(self._by_uuid.get(service_uuid, set()))
+        if company_id is not None:
+            candidates.append(self._by_company.get(company_id, set()))
+        if name_prefix is not None:
+            candidates.append(self._with_name_prefix(name_prefix))
+
+        if candidates:
+            addresses = min(candidates, key=len)
+        elif seen_since is not None:
+            addresses = [a for a, _ in self._entries.seen_since(seen_since)]
+        elif rssi_min is not None or rssi_max is not None:
+            addresses = self._with_rssi(rssi_min, rssi_max)
+        else:
+            addresses = list(self._entries)
+
+        found = []
+        for address_ in addresses:
+            entry = self._entries[address_]
+            if service_uuid is not None and service_uuid not in entry.uuids:
+                continue
+            if company_id is not None and company_id not in entry.company_ids:
+                continue
+            if name_prefix is not None and not entry.name.startswith(name_prefix):
+                continue
+            if rssi_min is not None and (entry.rssi is None or entry.rssi < rssi_min):
+                continue
+            if rssi_max is not None and (entry.rssi is None or entry.rssi > rssi_max):
+                continue
+            if seen_since is not None or seen_before is not None:
+                seen = self._entries.last_seen(address_)
+                if seen_since is not None and seen < seen_since:
+                    continue
+                if seen_before is not None and seen > seen_before:
+                    continue
+            found.append(entry.device)
+        return found
+
+    def subscribe(
+        self,
+        callback: Callable[[BLEDevice], None],
+        address: Optional[str] = None,
+        service_uuid: Optional[str] = None,
+        company_id: Optional[int] = None,
+        name_prefix: Optional[str] = None,
+        rssi_min: Optional[int] = None,
+        rssi_max: Optional[int] = None,
+    ) -> int:
+        """Get notified when a device starts matching some criteria.
+
+        The callback is called with the device when it is first seen matching
+        all given criteria, and again if it matches after having stopped
+        matching or after having been removed from the registry. Devices
+        already in the registry are not reported.
+
+        See :py:meth:`query` for the criteria.
+
+        Returns:
+            A token for :py:meth:`unsubscribe`.
+
+        """
+        self._entries.prune()
+        token = next(self._tokens)
+        rule = AdvertisementRule(
+            tag=token,
+            company_id=company_id,
+            service_uuids=[service_uuid] if service_uuid is not None else None,
+            address_prefix=address,
+            rssi_min=rssi_min,
+            rssi_max=rssi_max,
+            local_name=re.escape(name_prefix) if name_prefix is not None else None,
+        )
+        self._subscriptions[token] = (rule, callback)
+        self._compile()
+        for entry in self._entries.values():
+            if rule.matches(*self._match_args(entry)):
+                entry.subscriptions = entry.subscriptions | {token}
+        return token
+
+    def unsubscribe(self, token: int) -> None:
+        """Cancel a subscription made with :py:meth:`subscribe`."""
+        if self._subscriptions.pop(token, None) is not None:
+            self._compile()
+
+    # Helper methods
+
+    def _index(self, address: str, entry: _Entry):
+        for uuid in entry.uuids:
+            _add(self._by_uuid, uuid, address)
+        for company_id in entry.company_ids:
+            _add(self._by_company, company_id, address)
+        _add(self._by_rssi, entry.rssi, address)
+        bisect.insort(self._names, (entry.name, address))
+
+    def _unindex(self, address: str, entry: _Entry):
+        for uuid in entry.uuids:
+            _discard(self._by_uuid, uuid, address)
+        for company_id in entry.company_ids:
+            _discard(self._by_company, company_id, address)
+        _discard(self._by_rssi, entry.rssi, address)
+        i = bisect.bisect_left(self._names, (entry.name, address))
+        if i < len(self._names) and self._names[i] == (entry.name, address):
+            del self._names[i]
+
+    def _reindex(self, address: str, old: _Entry, new: _Entry):
+        # Advertisements of a device mostly differ in RSSI only.
+        if old.uuids != new.uuids:
+            for uuid in old.uuids - new.uuids:
+                _discard(self._by_uuid, uuid, address)
+            for uuid in new.uuids - old.uuids:
+                _add(self._by_uuid, uuid, address)
+        if old.company_ids != new.company_ids:
+            for company_id in old.company_ids - new.company_ids:
+                _discard(self._by_company, company_id, address)
+            for company_id in new.company_ids - old.company_ids:
+                _add(self._by_company, company_id, address)
+        if old.rssi != new.rssi:
+            _discard(self._by_rssi, old.rssi, address)
+            _add(self._by_rssi, new.rssi, address)
+        if old.name != new.name:
+            i = bisect.bisect_left(self._names, (old.name, address))
+            if i < len(self._names) and self._names[i] == (old.name, address):
+                del self._names[i]
+            bisect.insort(self._names, (new.name, address))
+
+    def _entry_evicted(self, address, entry):
+        self._unindex(address, entry)
+
+    def _with_name_prefix(self, prefix: str) -> List[str]:
+        i = bisect.bisect_left(self._names, (prefix,))
+        found = []
+        while i < len(self._names) and self._names[i][0].startswith(prefix):
+            found.append(self._names[i][1])
+            i += 1
+        return found
+
+    def _with_rssi(self, rssi_min, rssi_max) -> List[str]:
+        # RSSI values are integers in a small range, so the buckets are few.
+        found = []
+        for rssi, addresses in self._by_rssi.items():
+            if rssi is None:
+                continue
+            if rssi_min is not None and rssi < rssi_min:
+                continue
+            if rssi_max is not None and rssi > rssi_max:
+                continue
+            found.extend(addresses)
+        return found
+
+    def _compile(self):
+        self._matcher = (
+            AdvertisementMatcher(rule for rule, _ in self._subscriptions.values())
+            if self._subscriptions
+            else None
+        )
+
+    @staticmethod
+    def _match_args(entry: _Entry):
+        device = entry.device
+        return (
+            device.address,
+            entry.name,
+            entry.rssi,
+            device.manufacturer_data,
+            device.service_data,
+            entry.uuids,
+        )
+
+    def _notify(self, address: str, entry: _Entry):
+        matched = frozenset(
+            rule.tag for rule in self._matcher.match(*self._match_args(entry))
+        )
+        started = matched - entry.subscriptions
+        entry.subscriptions = matched
+        for token in sorted(started):
+            subscription = self._subscriptions.get(token)
+            if subscription is not None:
+                subscription[1](entry.device)
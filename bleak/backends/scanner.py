@@ -3,19 +3,56 @@ import asyncio
 from asyncio import AbstractEventLoop
 from typing import Callable, List
 
-from bleak.backends.device import BLEDevice
+from bleak.backends.device import AdvertisementData, BLEDevice
+from bleak.backends.flightrecorder import FlightRecorder
+from bleak.backends.history import RssiHistory
+from bleak.backends import metrics
+from bleak.backends.matcher import AdvertisementMatcher
+from bleak.backends.stats import LatencyStats, TimedABCMeta
 
 
-class BaseBleakScanner(abc.ABC):
+class BaseBleakScanner(metaclass=TimedABCMeta):
     """Interface for Bleak Bluetooth LE Scanners
 
     Args:
         loop (Event Loop): The event loop to use.
 
+    Keyword Args:
+        rules (list of AdvertisementRule): Declarative rules that
+            advertisements must match, see :py:mod:`bleak.backends.matcher`.
+            Advertisements not matching any rule are dropped before any
+            detection callback is called.
+        rssi_history (int): Number of RSSI samples to keep per device in
+            :py:attr:`rssi_history`. Defaults to ``None``, i.e. no history.
+        stats (bool): Record the latencies of ``start``, ``stop``,
+            ``set_scanning_filter`` and ``get_discovered_devices``, see
+            :py:meth:`stats`, keyed on the adapter. Defaults to ``True``.
+        flight_recorder (int): Number of recent operations, signals and
+            state changes to keep in :py:attr:`flight_recorder`, see
+            :py:mod:`bleak.backends.flightrecorder`. Defaults to 1024; 0
+            turns the recorder off.
+
     """
 
+    _timed_category = "scanner"
+    # Scanners are keyed on their adapter, where backends have one.
+    _timed_source = "_device"
+    _timed_operations = ("start", "stop", "set_scanning_filter", "get_discovered_devices")
+
     def __init__(self, loop: AbstractEventLoop = None, **kwargs):
         self.loop = loop if loop else asyncio.get_event_loop()
+        self._matcher = None
+        self.set_advertisement_rules(kwargs.get("rules"))
+        self._device_lost_callback = None
+        self._advertisement_listeners = []
+        self._stats = LatencyStats() if kwargs.get("stats", True) else None
+        size = kwargs.get("flight_recorder", 1024)
+        self.flight_recorder = FlightRecorder(size) if size else None
+        metrics.track_scanner(self)
+        self.rssi_history = None
+        if kwargs.get("rssi_history"):
+            self.rssi_history = RssiHistory(kwargs["rssi_history"])
+            self.add_advertisement_listener(self.rssi_history.update)
 
     async def __aenter__(self):
         await self.start()
@@ -33,10 +70,93 @@ class BaseBleakScanner(abc.ABC):
             devices = await scanner.get_discovered_devices()
         return devices
 
+    def stats(self) -> LatencyStats:
+        """Get the latency histograms of the operations of this scanner.
+
+        Call ``reset()`` on the returned object to start over.
+
+        Returns:
+            A :py:class:`bleak.backends.stats.LatencyStats`, or ``None`` if
+            created with ``stats=False``.
+
+        """
+        return self._stats
+
+    def set_advertisement_rules(self, rules) -> None:
+        """Compile and set the rules that advertisements must match.
+
+        Args:
+            rules (list of AdvertisementRule): The rules. Set to ``None`` to
+                accept all advertisements.
+
+        """
+        self._matcher = AdvertisementMatcher(rules) if rules else None
+
+    def _matches_device(self, device: BLEDevice) -> bool:
+        if self._matcher is None:
+            return True
+        return self._matcher.matches(
+            device.address,
+            device.name,
+            device.rssi,
+            device.manufacturer_data,
+            device.service_data,
+            device.uuids,
+        )
+
+    def add_advertisement_listener(
+        self, callback: Callable[[BLEDevice, AdvertisementData], None]
+    ) -> None:
+        """Add a function to be called with every accepted advertisement.
+
+        Unlike the detection callback, which receives backend specific
+        objects, listeners receive the parsed
+        :py:class:`bleak.backends.device.BLEDevice` and
+        :py:class:`bleak.backends.device.AdvertisementData`, which backends
+        only build while at least one listener is registered.
+
+        Args:
+            callback: Function accepting a ``BLEDevice`` and an
+                ``AdvertisementData``.
+
+        """
+        self._advertisement_listeners.append(callback)
+
+    def remove_advertisement_listener(
+        self, callback: Callable[[BLEDevice, AdvertisementData], None]
+    ) -> None:
+        """Remove a function added with :py:meth:`add_advertisement_listener`."""
+        self._advertisement_listeners.remove(callback)
+
+    def _device_lost(self, device: BLEDevice) -> None:
+        if self.rssi_history is not None:
+            self.rssi_history.remove(device.address)
+        if self._device_lost_callback is not None:
+            self._device_lost_callback(device)
+
+    def _notify_listeners(
+        self, device: BLEDevice, advertisement_data: AdvertisementData
+    ) -> None:
+        for listener in list(self._advertisement_listeners):
+            listener(device, advertisement_data)
+
     @abc.abstractmethod
     def register_detection_callback(self, callback: Callable):
         raise NotImplementedError()
 
+    def register_device_lost_callback(self, callback: Callable[[BLEDevice], None]):
+        """Set a function to be called when a device is evicted from the scanner.
+
+        Only backends that age out devices, e.g. the BlueZ backend with the
+        ``max_age`` or ``max_devices`` keyword arguments set, call it.
+
+        Args:
+            callback: Function accepting one argument of type
+                :py:class:`bleak.backends.device.BLEDevice`.
+
+        """
+        self._device_lost_callback = callback
+
     @abc.abstractmethod
     async def start(self):
         raise NotImplementedError()
@@ -0,0 +1,340 @@
+# -*- coding: utf-8 -*-
+"""
+Latency histograms of client and scanner operations.
+
+:py:class:`LatencyHistogram` buckets latencies like an HdrHistogram: every
+power of two range of microseconds is split into the same number of linear
+sub-buckets, so that any recorded value is known to within a fixed relative
+error, about 1.6 % by default, from one microsecond up to an hour. The
+counts live in one preallocated array; recording a value is a few integer
+operations and allocates nothing.
+
+:py:class:`LatencyStats` keeps one histogram per operation and device.
+Clients and scanners record the duration of their public coroutines into
+one, see :py:class:`TimedABCMeta`, readable through their ``stats()``
+method.
+
+"""
+import abc
+import asyncio
+import functools
+import time
+from array import array
+from typing import Iterable, Optional
+
+from bleak.backends.flightrecorder import BEGIN, END
+from bleak.backends.trace import TRACER
+
+# Largest recordable latency, in microseconds: about 71 minutes.
+_MAX_VALUE = (1 << 32) - 1
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram(object):
+    """A histogram of latencies with a bounded relative error.
+
+    Args:
+        significant_bits (int): Bits of precision kept per value. The
+            relative error of a recorded value is at most
+            ``2 ** (1 - significant_bits)``. Defaults to 7, i.e. 1.6 %.
+
+    """
+
+    __slots__ = ("_bits", "_half", "counts", "count", "errors", "total", "min", "max")
+
+    def __init__(self, significant_bits: int = 7):
+        if not 2 <= significant_bits <= 16:
+            raise ValueError("significant_bits must be between 2 and 16")
+        self._bits = significant_bits
+        self._half = 1 << (significant_bits - 1)
+        self.counts = array("I", bytes(4 * (self._index(_MAX_VALUE) + 1)))
+        self.count = 0
+        self.errors = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, value: int) -> int:
+        shift = value.bit_length() - self._bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _highest_value(self, index: int) -> int:
+        # The largest value sharing the bucket at index.
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        return ((index - shift * self._half + 1) << shift) - 1
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """Record a latency.
+
+        Args:
+            seconds (float): The latency, in seconds.
+            error (bool): If the operation failed.
+
+        """
+        value = min(max(int(seconds * 1e6), 0), _MAX_VALUE)
+        self.counts[self._index(value)] += 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+        if error:
+            self.errors += 1
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        """Add the values recorded in a histogram of the same precision."""
+        if other._bits != self._bits:
+            raise ValueError("Cannot merge histograms of different precision")
+        if not other.count:
+            return
+        for i, n in enumerate(other.counts):
+            if n:
+                self.counts[i] += n
+        self.min = min(self.min, other.min) if self.count else other.min
+        self.max = max(self.max, other.max)
+        self.count += other.count
+        self.total += other.total
+        self.errors += other.errors
+
+    def reset(self) -> None:
+        """Remove all recorded values."""
+        self.counts = array("I", bytes(4 * len(self.counts)))
+        self.count = self.errors = self.total = self.min = self.max = 0
+
+    def percentile(self, q: float) -> float:
+        """Get a percentile of the recorded latencies.
+
+        Args:
+            q (float): The percentile, between 0 and 100.
+
+        Returns:
+            The latency in seconds, rounded up to the precision of the
+            histogram, or 0.0 if nothing has been recorded.
+
+        """
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * q // 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._highest_value(i), self.max) / 1e6
+        return self.max / 1e6
+
+    @property
+    def mean(self) -> float:
+        """The mean latency, in seconds."""
+        return self.total / self.count / 1e6 if self.count else 0.0
+
+    def as_dict(self, percentiles: Iterable[float] = PERCENTILES) -> dict:
+        """Summarise the histogram.
+
+        Returns:
+            Dict with ``count``, ``errors`` and the ``min``, ``mean``,
+            ``max`` and percentile latencies in seconds, the latter under
+            keys like ``"p99"`` and ``"p99.9"``.
+
+        """
+        summary = {
+            "count": self.count,
+            "errors": self.errors,
+            "min": self.min / 1e6,
+            "mean": self.mean,
+            "max": self.max / 1e6,
+        }
+        for q in percentiles:
+            summary["p{0:g}".format(q)] = self.percentile(q)
+        return summary
+
+
+class LatencyStats(object):
+    """Latency histograms per operation and device.
+
+    Args:
+        significant_bits (int): Precision of the histograms, see
+            :py:class:`LatencyHistogram`.
+
+    """
+
+    def __init__(self, significant_bits: int = 7):
+        self._bits = significant_bits
+        # (operation, device) -> histogram
+        self._histograms = {}
+
+    def __len__(self):
+        return len(self._histograms)
+
+    def record(
+        self, operation: str, device: Optional[str], seconds: float, error: bool = False
+    ) -> None:
+        """Record the latency of an operation on a device.
+
+        Args:
+            operation (str): The operation, e.g. ``"read_gatt_char"``.
+            device (str): The address of the device, or ``None``.
+            seconds (float): The latency, in seconds.
+            error (bool): If the operation failed.
+
+        """
+        histogram = self._histograms.get((operation, device))
+        if histogram is None:
+            histogram = self._histograms[(operation, device)] = LatencyHistogram(
+                self._bits
+            )
+        histogram.record(seconds, error)
+
+    def histogram(
+        self, operation: str, device: Optional[str] = None
+    ) -> LatencyHistogram:
+        """Get the latencies of an operation.
+
+        Args:
+            operation (str): The operation.
+            device (str): The device. Defaults to ``None``, i.e. the
+                latencies of all devices merged.
+
+        Returns:
+            A :py:class:`LatencyHistogram`, empty if nothing was recorded.
+            The histogram of a device is live; merged ones are copies.
+
+        """
+        if device is not None:
+            return self._histograms.get(
+                (operation, device), LatencyHistogram(self._bits)
+            )
+        merged = LatencyHistogram(self._bits)
+        for (op, _), histogram in self._histograms.items():
+            if op == operation:
+                merged.merge(histogram)
+        return merged
+
+    def operations(self) -> list:
+        """Get the operations with recorded latencies, sorted."""
+        return sorted(set(op for op, _ in self._histograms))
+
+    def as_dict(self) -> dict:
+        """Summarise all histograms.
+
+        Returns:
+            ``{operation: {device: summary}}``, with summaries as returned
+            by :py:meth:`LatencyHistogram.as_dict`.
+
+        """
+        result = {}
+        for (operation, device), histogram in self._histograms.items():
+            result.setdefault(operation, {})[device] = histogram.as_dict()
+        return result
+
+    def reset(self) -> None:
+        """Remove all recorded latencies."""
+        self._histograms.clear()
+
+
+def _span(category, operation, owner, start, end, error):
+    return {
+        "category": category,
+        "operation": operation,
+        "owner": owner,
+        "start": start,
+        "end": end,
+        "error": error,
+    }
+
+
+def _timed(operation: str, func):
+    @functools.wraps(func)
+    async def timed(self, *args, **kwargs):
+        stats = getattr(self, "_stats", None)
+        flight = getattr(self, "flight_recorder", None)
+        tracing = TRACER.enabled
+        # Overrides calling up to a timed base implementation are timed once.
+        if (stats is None and flight is None and not tracing) or getattr(
+            type(self), operation
+        ) is not timed:
+            return await func(self, *args, **kwargs)
+        if flight is not None:
+            flight.record(BEGIN, operation)
+        start = time.perf_counter()
+        error = True
+        try:
+            result = await func(self, *args, **kwargs)
+            error = False
+            return result
+        except BaseException as e:
+            if flight is not None:
+                flight.record(END, operation, value=1)
+                flight.failed(self, operation, e)
+            raise
+        finally:
+            end = time.perf_counter()
+            if flight is not None and not error:
+                flight.record(END, operation)
+            source = getattr(self, self._timed_source, None)
+            if stats is not None:
+                stats.record(operation, source, end - start, error)
+            if tracing:
+                TRACER.emit(
+                    "span",
+                    source,
+                    functools.partial(
+                        _span,
+                        self._timed_category,
+                        operation,
+                        id(self),
+                        start,
+                        end,
+                        error,
+                    ),
+                )
+
+    timed.__wrapped_timed__ = True
+    return timed
+
+
+class TimedABCMeta(abc.ABCMeta):
+    """Metaclass recording the latency of the operations of a class.
+
+    The coroutine methods named in the ``_timed_operations`` attribute of
+    a class or its bases are wrapped wherever they are implemented, so that
+    every backend records them at the same boundary; only the outermost
+    implementation of a call records it. Durations go to the
+    :py:class:`LatencyStats` in the ``_stats`` attribute of the instance,
+    keyed on the attribute named by ``_timed_source``, ``address`` by
+    default; nothing is recorded while ``_stats`` is ``None``. The start
+    and end of every call also go to the
+    :py:class:`~bleak.backends.flightrecorder.FlightRecorder` in the
+    ``flight_recorder`` attribute, if any, which is dumped on failure if
+    asked to.
+
+    While trace sinks are subscribed, every call is also emitted as a
+    ``"span"`` event, see :py:mod:`bleak.backends.trace`, with its
+    ``category``, ``operation``, ``owner`` (the ``id`` of the instance),
+    ``start`` and ``end`` :py:func:`time.perf_counter` times and ``error``.
+
+    """
+
+    def __new__(mcls, name, bases, namespace, **kwargs):
+        cls = super(TimedABCMeta, mcls).__new__(mcls, name, bases, namespace, **kwargs)
+        if not hasattr(cls, "_timed_source"):
+            cls._timed_source = "address"
+        if not hasattr(cls, "_timed_category"):
+            cls._timed_category = name
+        for operation in getattr(cls, "_timed_operations", ()):
+            func = namespace.get(operation)
+            if (
+                asyncio.iscoroutinefunction(func)
+                and not getattr(func, "__isabstractmethod__", False)
+                and not getattr(func, "__wrapped_timed__", False)
+            ):
+                setattr(cls, operation, _timed(operation, func))
+        return cls
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Timelines of client, scanner and D-Bus operations in the Chrome trace format.
+
+A :py:class:`TimelineRecorder` subscribes to the ``"span"`` and
+``"gatt.notify"`` trace events, see :py:mod:`bleak.backends.trace`, and
+keeps them as `Trace Event Format
+<https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAqWQ>`_
+events, which ``chrome://tracing`` and `Perfetto <https://ui.perfetto.dev>`_
+display as a timeline. Every device, and every adapter a scanner runs on,
+gets a track of its own, with its connect, service discovery, read, write
+and notify operations, the D-Bus calls made for them nested inside, and
+the scan sessions from the end of ``start`` to the start of ``stop``. The
+time an operation spends outside its D-Bus calls is spent in the process.
+
+.. code-block:: python
+
+    recorder = TimelineRecorder()
+    with recorder:
+        async with BleakClient(address) as client:
+            await client.read_gatt_char(MODEL_NBR_UUID)
+    recorder.dump("timeline.json")
+
+Recording is opt-in: nothing is recorded, or built, while no recorder is
+started.
+
+"""
+import json
+import os
+import time
+from typing import Optional, Union
+
+from bleak.backends.trace import TRACER, TraceEvent, Tracer
+
+
+class TimelineRecorder(object):
+    """Records the operations of clients and scanners as Chrome trace events.
+
+    Args:
+        tracer (Tracer): The tracer to subscribe to. Defaults to the tracer
+            of the process.
+        max_events (int): Stop recording after this many events, to bound
+            memory use. Defaults to ``None``, i.e. no limit.
+
+    """
+
+    def __init__(self, tracer: Tracer = None, max_events: Optional[int] = None):
+        self.tracer = tracer if tracer is not None else TRACER
+        self.max_events = max_events
+        self.events = []
+        self._pid = os.getpid()
+        self._origin = time.perf_counter()
+        # device or adapter -> track id
+        self._tracks = {}
+        # (source, scanner id) -> end of the start call
+        self._scans = {}
+        self._recording = False
+
+    def __len__(self):
+        return len(self.events)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self) -> None:
+        """Start recording. Times are relative to the creation of the recorder."""
+        if not self._recording:
+            self._recording = True
+            self.tracer.subscribe(self._on_span, prefix="span")
+            self.tracer.subscribe(self._on_notify, prefix="gatt.notify")
+
+    def stop(self) -> None:
+        """Stop recording. Scan sessions still running are left out."""
+        if self._recording:
+            self._recording = False
+            self.tracer.unsubscribe(self._on_span)
+            self.tracer.unsubscribe(self._on_notify)
+
+    def clear(self) -> None:
+        """Remove all recorded events."""
+        self.events = []
+        self._tracks.clear()
+        self._scans.clear()
+
+    def to_dict(self) -> dict:
+        """Get the recorded events in the JSON object format."""
+        return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def dump(self, fp: Union[str, "os.PathLike", object]) -> None:
+        """Write the recorded events as JSON.
+
+        Args:
+            fp: A path, or a text file object.
+
+        """
+        if hasattr(fp, "write"):
+            json.dump(self.to_dict(), fp)
+        else:
+            with open(fp, "w") as f:
+                json.dump(self.to_dict(), f)
+
+    # Helper methods
+
+    def _us(self, t: float) -> float:
+        return round((t - self._origin) * 1e6, 3)
+
+    def _track(self, source) -> int:
+        tid = self._tracks.get(source)
+        if tid is None:
+            tid = self._tracks[source] = len(self._tracks) + 1
+            self._add(
+                {
+                    "ph": "M",
+                    "name": "thread_name",
+                    "pid": self._pid,
+                    "tid": tid,
+                    "args": {"name": source if source is not None else "bleak"},
+                }
+            )
+        return tid
+
+    def _add(self, event: dict) -> None:
+        if self.max_events is None or len(self.events) < self.max_events:
+            self.events.append(event)
+
+    def _complete(self, name, category, source, start, end, args) -> None:
+        self._add(
+            {
+                "ph": "X",
+                "name": name,
+                "cat": category,
+                "pid": self._pid,
+                "tid": self._track(source),
+                "ts": self._us(start),
+                "dur": self._us(end) - self._us(start),
+                "args": args,
+            }
+        )
+
+    def _on_span(self, event: TraceEvent) -> None:
+        span = event.payload
+        category, operation = span["category"], span["operation"]
+        args = {"error": True} if span["error"] else {}
+        self._complete(
+            operation, category, event.source, span["start"], span["end"], args
+        )
+        if category != "scanner":
+            return
+        key = (event.source, span["owner"])
+        if operation == "start" and not span["error"]:
+            self._scans[key] = span["end"]
+        elif operation == "stop" and key in self._scans:
+            self._complete(
+                "scan", category, event.source, self._scans.pop(key), span["start"], {}
+            )
+
+    def _on_notify(self, event: TraceEvent) -> None:
+        payload = event.payload
+        value = payload.get("value")
+        self._add(
+            {
+                "ph": "i",
+                "s": "t",
+                "name": "notify",
+                "cat": "client",
+                "pid": self._pid,
+                "tid": self._track(event.source),
+                # Sinks are called as the event is emitted.
+                "ts": self._us(time.perf_counter()),
+                "args": {
+                    "uuid": payload.get("uuid"),
+                    "bytes": len(value) if value is not None else 0,
+                },
+            }
+        )
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Structured trace events from the hot paths of the backends.
+
+Reads, writes, notifications and scanner signals are reported as
+:py:class:`TraceEvent` objects instead of being formatted into log records.
+Nothing is built unless a sink is subscribed: the emitting code checks
+:py:attr:`Tracer.enabled` first, and the payload of an event is a function
+that is only called if a sink reads it.
+
+.. code-block:: python
+
+    from bleak.backends import trace
+
+    def sink(event):
+        if event.name == "gatt.notify":
+            print(event.source, event.payload["value"])
+
+    trace.subscribe(sink, prefix="gatt.")
+
+To get the events as log records, as older releases logged them, subscribe
+a :py:class:`LoggingSink`; setting the ``BLEAK_LOGGING`` environment variable
+does so.
+
+"""
+import logging
+import time
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TraceEvent(object):
+    """An event emitted by a backend.
+
+    Attributes:
+        name (str): What happened, e.g. ``"gatt.read"``; see :py:data:`EVENTS`.
+        source (str): The address of the device, the adapter of a scanner,
+            or ``None``.
+        timestamp (float): :py:func:`time.monotonic` time of the event.
+
+    """
+
+    __slots__ = ("name", "source", "timestamp", "_payload", "_value")
+
+    def __init__(self, name: str, source: Optional[str], payload, timestamp=None):
+        self.name = name
+        self.source = source
+        self.timestamp = time.monotonic() if timestamp is None else timestamp
+        self._payload = payload
+        self._value = _MISSING
+
+    @property
+    def payload(self) -> dict:
+        """The details of the event, built on first access."""
+        if self._value is _MISSING:
+            self._value = (
+                self._payload() if callable(self._payload) else self._payload
+            )
+        return self._value
+
+    def __str__(self):
+        return "{0} {1}: {2}".format(self.name, self.source, self.payload)
+
+    def __repr__(self):
+        return "TraceEvent({0!r}, {1!r}, {2!r})".format(
+            self.name, self.source, self.payload
+        )
+
+
+class Tracer(object):
+    """Dispatches trace events to subscribed sinks."""
+
+    def __init__(self):
+        #: If any sink is subscribed. Check it before building an event.
+        self.enabled = False
+        # (name prefix, sink) pairs
+        self._sinks = []
+
+    def subscribe(self, sink: Callable[[TraceEvent], Any], prefix: str = "") -> None:
+        """Call a function with every event whose name starts with ``prefix``."""
+        self._sinks.append((prefix, sink))
+        self.enabled = True
+
+    def unsubscribe(self, sink: Callable[[TraceEvent], Any]) -> None:
+        """Stop calling a function subscribed with :py:meth:`subscribe`."""
+        self._sinks = [(p, s) for p, s in self._sinks if s != sink]
+        self.enabled = bool(self._sinks)
+
+    def emit(self, name: str, source: Optional[str], payload) -> None:
+        """Send an event to the sinks subscribed to it.
+
+        Args:
+            name (str): The event name.
+            source (str): The device or adapter the event concerns.
+            payload: A dict, or a function returning one, called at most once
+                and only if a sink reads :py:attr:`TraceEvent.payload`.
+
+        """
+        event = None
+        for prefix, sink in self._sinks:
+            if name.startswith(prefix):
+                if event is None:
+                    event = TraceEvent(name, source, payload)
+                try:
+                    sink(event)
+                except Exception as e:
+                    logger.error("Trace sink failed on {0}: {1}".format(name, e))
+
+
+class LoggingSink(object):
+    """A sink writing events to a logger.
+
+    Args:
+        logger (logging.Logger): Defaults to the ``bleak.trace`` logger.
+        level (int): The level of the records. Defaults to ``DEBUG``.
+
+    """
+
+    def __init__(self, logger: logging.Logger = None, level: int = logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger("bleak.trace")
+        self.level = level
+
+    def __call__(self, event: TraceEvent) -> None:
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s", event)
+
+
+#: The events emitted by the backends.
+EVENTS = (
+    "gatt.read",  # A characteristic or descriptor was read.
+    "gatt.write",  # A characteristic or descriptor was written.
+    "gatt.notify",  # A notification was received.
+    "dbus.properties_changed",  # A client received a PropertiesChanged signal.
+    "scan.signal",  # A scanner received a signal it does not handle.
+    "scan.device",  # A scanner received news of a device.
+    "span",  # A client or scanner operation, or a D-Bus call, ended.
+)
+
+#: The tracer of the process.
+TRACER = Tracer()
+
+subscribe = TRACER.subscribe
+unsubscribe = TRACER.unsubscribe
@@ -11,3 +11,21 @@ class BleakDotNetTaskError(BleakError):
     """Wrapped exception that occurred in .NET async Task."""
 
     pass
+
+
+class BleakDBusError(BleakError):
+    """An error returned by a D-Bus method call.
+
+    Attributes:
+        dbus_error (str): The D-Bus error name, e.g.
+            ``"org.bluez.Error.Failed"``.
+        dbus_message (str): The error message, if any.
+
+    """
+
+    def __init__(self, dbus_error: str, dbus_message: str = ""):
+        self.dbus_error = dbus_error
+        self.dbus_message = dbus_message
+        super(BleakDBusError, self).__init__(
+            "{0}: {1}".format(dbus_error, dbus_message) if dbus_message else dbus_error
+        )
@@ -667,3 +667,27 @@ def uuidstr_to_str(uuid_):
         return "Unknown"
 
     return s
+
+
+def normalize_uuid_str(uuid_) -> str:
+    """Normalize a UUID to the lower case 128-bit string form used by bleak.
+
+    16-bit and 32-bit UUIDs (e.g. ``"180f"`` or ``0x180F``) are expanded using
+    the Bluetooth Base UUID.
+
+    Args:
+        uuid_ (str, int or UUID): The UUID to normalize.
+
+    Returns:
+        The UUID as a lower case string on the form
+        ``xxxxxxxx-xxxx-xxxx-xxxx-xxxxxxxxxxxx``.
+
+    """
+    if isinstance(uuid_, int):
+        uuid_ = "{0:04x}".format(uuid_)
+    uuid_ = str(uuid_).lower()
+    if len(uuid_) == 4:
+        return "0000{0}-0000-1000-8000-00805f9b34fb".format(uuid_)
+    if len(uuid_) == 8:
+        return "{0}-0000-1000-8000-00805f9b34fb".format(uuid_)
+    return uuid_
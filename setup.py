@@ -30,6 +30,14 @@ REQUIRED = [
 
 TEST_REQUIRED = ["pytest", "pytest-cov"]
 
+# Optional packages
+EXTRAS = {
+    # Vectorised RSSI statistics in bleak.backends.history
+    "numpy": ["numpy"],
+    # Arrow IPC and Parquet files in bleak.backends.export
+    "arrow": ["pyarrow"],
+}
+
 here = os.path.abspath(os.path.dirname(__file__))
 with io.open(os.path.join(here, "README.rst"), encoding="utf-8") as f:
     long_description = "\n" + f.read()
@@ -88,6 +96,7 @@ setup(
     package_data={"bleak.backends.dotnet": ["*.dll"]},
     entry_points={"console_scripts": ["bleak-lescan=bleak:cli"]},
     install_requires=REQUIRED,
+    extras_require=EXTRAS,
     test_suite="tests",
     tests_require=TEST_REQUIRED,
     include_package_data=True,
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""A stand-in for a D-Bus connection to BlueZ, for tests."""
+
+import copy
+import itertools
+
+from bleak.exc import BleakDBusError
+from bleak.backends.bluezdbus.bus import _rule_matches
+from bleak.backends.bluezdbus.marshal import SIGNAL, Message
+
+
+class FakeBus(object):
+    """Records method calls and answers them from ``handlers``.
+
+    ``GetManagedObjects`` returns a copy of ``objects``. Other calls return
+    what the handler registered for their member returns, or ``None``; a
+    handler raising :py:class:`bleak.exc.BleakDBusError` fails the call.
+
+    """
+
+    def __init__(self, objects: dict = None):
+        self.objects = objects if objects is not None else {}
+        self.handlers = {}
+        # (path, member, *body) of every call, in order
+        self.calls = []
+        self.connected = True
+        self.unique_name = ":1.1"
+        self.stats = None
+        self.stats_device = None
+        self.flight = None
+        self._matches = {}
+        self._ids = itertools.count(1)
+
+    def members(self, *members) -> list:
+        """Get the members of the calls made, only those given if any."""
+        return [c[1] for c in self.calls if not members or c[1] in members]
+
+    async def call(
+        self,
+        path,
+        member,
+        interface,
+        destination=None,
+        signature="",
+        body=(),
+        return_signature=None,
+    ):
+        self.calls.append((path, member) + tuple(body))
+        if member == "GetManagedObjects":
+            return copy.deepcopy(self.objects)
+        handler = self.handlers.get(member)
+        return handler(path, *body) if handler is not None else None
+
+    async def call_many(self, calls, return_exceptions=False):
+        results = []
+        for c in calls:
+            c = dict(c)
+            c.pop("return_signature", None)
+            try:
+                results.append(await self.call(**c))
+            except BleakDBusError as e:
+                if not return_exceptions:
+                    raise
+                results.append(e)
+        return results
+
+    async def add_match(self, callback, **rule):
+        rule_id = next(self._ids)
+        self._matches[rule_id] = (callback, rule)
+        return rule_id
+
+    async def remove_match(self, rule_id):
+        self._matches.pop(rule_id, None)
+
+    def disconnect(self):
+        self.connected = False
+
+    def emit(self, path, interface, member, *body):
+        """Deliver a signal from BlueZ to the matching callbacks."""
+        message = Message(SIGNAL, path, interface, member, body=body)
+        for callback, rule in list(self._matches.values()):
+            if _rule_matches(rule, message):
+                callback(message)
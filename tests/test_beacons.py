@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.beacons` module."""
+
+from bleak.backends import beacons
+from bleak.backends.beacons import (
+    AltBeacon,
+    EddystoneTLM,
+    EddystoneURL,
+    IBeacon,
+    decode_beacons,
+)
+
+_UUID = bytes.fromhex("e2c56db5dffb48d2b060d0f5a71096e0")
+
+
+def test_decode_beacons():
+    """Test decoding of iBeacon, AltBeacon and Eddystone frames."""
+    ibeacon = b"\x02\x15" + _UUID + b"\x00\x01\x00\x02\xc5"
+    altbeacon = b"\xbe\xac" + _UUID + b"\x00\x03\x00\x04\xc0\x00"
+    url = b"\x10\xeb\x01google\x07"
+    tlm = b"\x20\x00\x0b\xb8\x16\x80\x00\x00\x00\x0a\x00\x00\x00\x64"
+    found = decode_beacons(
+        {0x004C: ibeacon, 0x0118: altbeacon},
+        {beacons.EDDYSTONE_UUID: url},
+    )
+    assert found == [
+        IBeacon("e2c56db5-dffb-48d2-b060-d0f5a71096e0", 1, 2, -59),
+        AltBeacon(0x0118, "e2c56db5-dffb-48d2-b060-d0f5a71096e0", 3, 4, -64, 0),
+        EddystoneURL(-21, "https://www.google.com"),
+    ]
+    assert decode_beacons(service_data={beacons.EDDYSTONE_UUID: tlm}) == [
+        EddystoneTLM(0, 3000, 22.5, 10, 10.0)
+    ]
+    assert decode_beacons({0x004C: b"\x10\x05\x01"}) == []
+
+
+def test_decode_cached():
+    """Test that frames are decoded once per payload."""
+    beacons.clear_cache()
+    ibeacon = b"\x02\x15" + _UUID + b"\x00\x01\x00\x02\xc5"
+    for _ in range(3):
+        decode_beacons({0x004C: ibeacon})
+    info = beacons.decode_ibeacon.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.bus` module."""
+
+import asyncio
+import socket
+import struct
+
+import pytest
+
+from bleak.exc import BleakDBusError
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.bus import AsyncioMessageBus
+from bleak.backends.bluezdbus.marshal import (
+    ERROR,
+    METHOD_RETURN,
+    SIGNAL,
+    Message,
+    decode_message,
+    encode_message,
+    message_length,
+)
+
+
+def _connect(loop):
+    """A bus whose peer is the other end of a socket pair."""
+    ours, peer = socket.socketpair()
+    ours.setblocking(False)
+    bus = AsyncioMessageBus(loop)
+    bus._sock = ours
+    loop.add_reader(ours.fileno(), bus._on_readable)
+    return bus, peer
+
+
+def _receive(peer) -> list:
+    peer.setblocking(False)
+    data = b""
+    try:
+        while True:
+            data += peer.recv(65536)
+    except BlockingIOError:
+        pass
+    messages = []
+    while data:
+        n = message_length(data)
+        messages.append(decode_message(data[:n]))
+        data = data[n:]
+    return messages
+
+
+def _reply(call, *body, error=None):
+    if error is not None:
+        return Message(
+            ERROR, signature="s", body=["Nope"], error_name=error, reply_serial=call.serial
+        )
+    return Message(
+        METHOD_RETURN, signature="s" * len(body), body=body, reply_serial=call.serial
+    )
+
+
+CALLS = [
+    dict(path="/a", member="Get", interface=defs.PROPERTIES_INTERFACE, return_signature="s"),
+    dict(path="/b", member="Get", interface=defs.PROPERTIES_INTERFACE),
+    dict(path="/c", member="Get", interface=defs.PROPERTIES_INTERFACE),
+]
+
+
+def test_call_many():
+    """Test that a batch goes out before any reply, and is answered in order."""
+
+    async def test(loop):
+        bus, peer = _connect(loop)
+        batch = loop.create_task(bus.call_many(CALLS, return_exceptions=True))
+        await asyncio.sleep(0)
+        calls = _receive(peer)
+        assert [c.path for c in calls] == ["/a", "/b", "/c"]
+        assert not batch.done()
+        # Replies arrive out of order, the one to /b as an error.
+        peer.sendall(
+            encode_message(_reply(calls[2], "c"))
+            + encode_message(_reply(calls[1], error="org.bluez.Error.Failed"))
+            + encode_message(_reply(calls[0], "a"))
+        )
+        a, b, c = await batch
+        assert (a, c) == ("a", "c")
+        assert isinstance(b, BleakDBusError) and b.dbus_error == "org.bluez.Error.Failed"
+
+        batch = loop.create_task(bus.call_many(CALLS))
+        await asyncio.sleep(0)
+        calls = _receive(peer)
+        peer.sendall(
+            encode_message(_reply(calls[0], "a"))
+            + encode_message(_reply(calls[1], "b"))
+            + encode_message(_reply(calls[2], error="org.bluez.Error.Failed"))
+        )
+        with pytest.raises(BleakDBusError):
+            await batch
+        assert bus._calls == {}
+        bus.disconnect()
+        peer.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def test_chunked_reply():
+    """Test that messages arriving over many reads are decoded whole."""
+
+    async def test(loop):
+        bus, peer = _connect(loop)
+        first = loop.create_task(bus.call(**CALLS[1]))
+        second = loop.create_task(bus.call(**CALLS[2]))
+        await asyncio.sleep(0)
+        calls = _receive(peer)
+        payload = bytes(range(256)) * 1024
+        data = encode_message(
+            Message(METHOD_RETURN, signature="ay", body=[payload], reply_serial=calls[0].serial)
+        ) + encode_message(_reply(calls[1], "b"))
+        for i in range(0, len(data), 7000):
+            peer.sendall(data[i:i + 7000])
+            await asyncio.sleep(0)
+        assert await first == payload
+        assert await second == "b"
+        assert not bus._rbuf
+        bus.disconnect()
+        peer.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def test_call_many_failures():
+    """Test that a batch which cannot be encoded or written leaves no pending call."""
+
+    async def test(loop):
+        bus, peer = _connect(loop)
+        bad = dict(CALLS[2], signature="u", body=["not an integer"])
+        with pytest.raises(struct.error):
+            await bus.call_many([CALLS[0], CALLS[1], bad])
+        assert bus._calls == {}
+
+        peer.close()
+        bus._sock.shutdown(socket.SHUT_WR)
+        with pytest.raises(OSError):
+            await bus.call_many(CALLS)
+        assert bus._calls == {}
+        bus.disconnect()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def _properties_changed(sender):
+    return encode_message(
+        Message(
+            SIGNAL,
+            path="/org/bluez/hci0",
+            interface=defs.PROPERTIES_INTERFACE,
+            member="PropertiesChanged",
+            sender=sender,
+        )
+    )
+
+
+def test_match_sender():
+    """Test that signals only reach rules whose sender owns the name they gave."""
+
+    async def answer(peer, *replies):
+        # Answers the calls of the bus one at a time, as they come.
+        for body in replies:
+            calls = []
+            while not calls:
+                await asyncio.sleep(0)
+                calls = _receive(peer)
+            call, = calls
+            peer.sendall(encode_message(_reply(call, *body)))
+
+    async def test(loop):
+        bus, peer = _connect(loop)
+        seen = []
+        add = loop.create_task(
+            bus.add_match(
+                lambda m: seen.append(m.sender),
+                sender=defs.BLUEZ_SERVICE,
+                member="PropertiesChanged",
+            )
+        )
+        # AddMatch for NameOwnerChanged, GetNameOwner, AddMatch for the rule
+        await asyncio.wait_for(answer(peer, (), (":1.5",), ()), 1.0)
+        await add
+
+        peer.sendall(_properties_changed(":1.9") + _properties_changed(":1.5"))
+        await asyncio.sleep(0.01)
+        assert seen == [":1.5"]
+
+        # bluetoothd restarts under another unique name.
+        peer.sendall(
+            encode_message(
+                Message(
+                    SIGNAL,
+                    path="/org/freedesktop/DBus",
+                    interface="org.freedesktop.DBus",
+                    member="NameOwnerChanged",
+                    signature="sss",
+                    body=[defs.BLUEZ_SERVICE, ":1.5", ":1.9"],
+                    sender="org.freedesktop.DBus",
+                )
+            )
+            + _properties_changed(":1.5")
+            + _properties_changed(":1.9")
+        )
+        await asyncio.sleep(0.01)
+        assert seen == [":1.5", ":1.9"]
+        bus.disconnect()
+        peer.close()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.cache` module."""
+
+from bleak.backends.cache import DeviceCache
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_device_cache_aging():
+    """Test that idle entries are pruned and fresh entries are kept."""
+    clock = _Clock()
+    evicted = []
+    cache = DeviceCache(
+        max_age=10.0, on_evict=lambda k, v: evicted.append(k), clock=clock
+    )
+    cache["a"] = 1
+    clock.now = 5.0
+    cache["b"] = 2
+    clock.now = 8.0
+    cache["a"] = 3
+    clock.now = 16.0
+    assert cache.prune() == [("b", 2)]
+    assert evicted == ["b"]
+    assert list(cache) == ["a"] and cache["a"] == 3
+
+
+def test_device_cache_size():
+    """Test that the least recently seen entry is evicted on overflow."""
+    cache = DeviceCache(max_size=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    cache.touch("a")
+    cache["c"] = 3
+    assert sorted(cache.keys()) == ["a", "c"]
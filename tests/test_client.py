@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.client` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.exc import BleakDBusError, BleakError
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+
+from tests.fakebus import FakeBus
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+DEVICE = "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"
+SERVICE = DEVICE + "/service000c"
+CHAR = SERVICE + "/char000d"
+HEART_RATE = "0000180d-0000-1000-8000-00805f9b34fb"
+MEASUREMENT = "00002a37-0000-1000-8000-00805f9b34fb"
+CCCD = "00002902-0000-1000-8000-00805f9b34fb"
+
+OBJECTS = {
+    DEVICE: {defs.DEVICE_INTERFACE: {"Address": ADDRESS}},
+    SERVICE: {
+        defs.GATT_SERVICE_INTERFACE: {"UUID": HEART_RATE, "Device": DEVICE, "Primary": True}
+    },
+    CHAR: {
+        defs.GATT_CHARACTERISTIC_INTERFACE: {
+            "UUID": MEASUREMENT,
+            "Service": SERVICE,
+            "Flags": ["notify", "read"],
+        }
+    },
+    CHAR + "/desc000f": {
+        defs.GATT_DESCRIPTOR_INTERFACE: {"UUID": CCCD, "Characteristic": CHAR}
+    },
+    "/org/bluez/hci0/dev_11_22_33_44_55_66/service0001": {
+        defs.GATT_SERVICE_INTERFACE: {"UUID": HEART_RATE}
+    },
+}
+
+
+def _client(loop, properties, battery=None):
+    client = BleakClientBlueZDBus(ADDRESS, loop)
+    client._bus = FakeBus(OBJECTS)
+    client._device_path = DEVICE
+
+    def get_all(path, interface):
+        if interface == defs.DEVICE_INTERFACE:
+            return dict(properties)
+        if battery is None:
+            raise BleakDBusError("org.freedesktop.DBus.Error.InvalidArgs")
+        return battery
+
+    client._bus.handlers["GetAll"] = get_all
+    return client
+
+
+def _run(test):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def _summary(services):
+    return (
+        sorted((s.uuid, s.path) for s in services),
+        sorted((c.uuid, c.path, c.service_uuid) for c in services.characteristics.values()),
+        sorted((d.uuid, d.path) for d in services.descriptors.values()),
+    )
+
+
+def test_connect_services_resolved():
+    """Test that connecting to a resolved device builds the services from the batch."""
+
+    async def test(loop):
+        resolved = _client(loop, {"Connected": True, "ServicesResolved": True})
+        await resolved._connect()
+        fetched = _client(loop, {"Connected": True, "ServicesResolved": True})
+        await fetched.get_services()
+        return resolved, fetched
+
+    resolved, fetched = _run(test)
+    assert resolved._bus.members("Connect", "GetAll", "GetManagedObjects") == [
+        "Connect",
+        "GetAll",
+        "GetManagedObjects",
+    ]
+    assert _summary(resolved.services) == _summary(fetched.services)
+    assert len(resolved.services.characteristics) == 1
+    assert resolved._char_path_to_uuid == {CHAR: MEASUREMENT}
+
+
+def test_device_snapshot():
+    """Test the device snapshot, with and without a battery service."""
+
+    async def test(loop):
+        client = _client(loop, {"Connected": True})
+        without = await client.device_snapshot()
+        client = _client(loop, {"Connected": True}, {"Percentage": 80})
+        return without, await client.device_snapshot()
+
+    without, with_battery = _run(test)
+    assert without == {
+        "device": {"Connected": True},
+        "battery": {},
+        "services": {HEART_RATE: {MEASUREMENT: ["notify", "read"]}},
+    }
+    assert with_battery["battery"] == {"Percentage": 80}
+
+    async def failing(loop):
+        client = _client(loop, {})
+
+        def get_all(path, interface):
+            raise BleakDBusError("org.freedesktop.DBus.Error.UnknownObject")
+
+        client._bus.handlers["GetAll"] = get_all
+        await client.device_snapshot()
+
+    with pytest.raises(BleakDBusError):
+        _run(failing)
+
+
+def test_not_connected():
+    """Test that BlueZ version checks before the first connect raise BleakError."""
+
+    async def test(loop):
+        client = BleakClientBlueZDBus(ADDRESS, loop)
+        with pytest.raises(BleakError):
+            await client.read_gatt_char("00002a19-0000-1000-8000-00805f9b34fb")
+        with pytest.raises(BleakError):
+            await client.read_gatt_char("00002a00-0000-1000-8000-00805f9b34fb")
+        with pytest.raises(BleakError):
+            await client.start_notify("00002a19-0000-1000-8000-00805f9b34fb", print)
+        with pytest.raises(BleakError):
+            await client.write_gatt_char(MEASUREMENT, b"\x01")
+
+    _run(test)
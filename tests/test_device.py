@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.device` module."""
+
+from bleak.backends.device import AdvertisementData, BLEDevice
+
+
+def test_device_fields():
+    """Test that advertised data is parsed into attributes."""
+    device = BLEDevice(
+        "00:11:22:33:44:55",
+        None,
+        {"path": "/org/bluez/hci0/dev_00_11_22_33_44_55", "props": {"RSSI": -60}},
+        manufacturer_data={76: b"\x02\x15"},
+        tx_power=-8,
+    )
+    assert device.name == "Unknown"
+    assert device.rssi == -60
+    assert device.uuids == []
+    assert device.tx_power == -8
+    assert device.metadata == {
+        "uuids": [],
+        "manufacturer_data": {76: b"\x02\x15"},
+        "tx_power": -8,
+    }
+    assert not hasattr(device, "__dict__")
+
+
+def test_device_lazy_details():
+    """Test that details are only created when asked for."""
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return {"path": "/org/bluez/hci0/dev_00_11_22_33_44_55"}
+
+    device = BLEDevice("00:11:22:33:44:55", "Sensor", rssi=-70, details_factory=factory)
+    assert not calls
+    assert device.rssi == -70
+    assert device.details["path"].endswith("44_55")
+    assert device.details is device.details
+    assert len(calls) == 1
+    assert AdvertisementData(rssi=-70).service_uuids == []
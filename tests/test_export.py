@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.export` module."""
+
+import csv
+import os
+
+import pytest
+
+from bleak.backends.device import AdvertisementData, BLEDevice
+from bleak.backends.export import AdvertisementSink
+
+
+def _feed(sink, n):
+    for i in range(n):
+        device = BLEDevice("00:00:00:00:00:{0:02X}".format(i), None, rssi=-60 - i)
+        sink.update(device, AdvertisementData(rssi=-60 - i, manufacturer_data={0x004C: bytes([i])}))
+
+
+def test_export_csv(tmpdir):
+    """Test batching and rollover of CSV files."""
+    sink = AdvertisementSink(str(tmpdir.join("scan.csv")), batch_size=2, max_rows=3, clock=lambda: 1.5)
+    with sink:
+        _feed(sink, 4)
+        assert len(sink) == 0
+        _feed(sink, 1)
+        assert len(sink) == 1
+    assert [p[-10:] for p in sink.files] == ["scan-0.csv", "scan-1.csv"]
+    with open(sink.files[0]) as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["address", "timestamp", "rssi", "company_id", "payload"]
+    assert rows[1] == ["00:00:00:00:00:00", "1.500000", "-60", "76", "00"]
+    assert len(rows) == 4
+    with open(sink.files[1]) as f:
+        assert len(list(csv.reader(f))) == 3
+
+
+def test_export_arrow(tmpdir):
+    """Test writing Arrow IPC files."""
+    pa = pytest.importorskip("pyarrow")
+    path = str(tmpdir.join("scan-{index}.arrow"))
+    with AdvertisementSink(path, batch_size=2) as sink:
+        _feed(sink, 3)
+    table = pa.ipc.open_file(sink.files[0]).read_all()
+    assert table.column("rssi").to_pylist() == [-60, -61, -62]
+    assert table.column("payload").to_pylist() == [b"\x00", b"\x01", b"\x02"]
+
+
+def test_export_max_age(tmpdir):
+    """Test that the age of a file counts from its first row."""
+    now = [0.0]
+    sink = AdvertisementSink(
+        str(tmpdir.join("scan-{time}.csv")), batch_size=100, max_age=10.0, clock=lambda: now[0]
+    )
+    with sink:
+        _feed(sink, 2)
+        assert sink.files == []
+        now[0] = 10.0
+        _feed(sink, 1)
+        assert len(sink) == 0
+        now[0] = 15.0
+        _feed(sink, 1)
+        now[0] = 30.0
+    assert [os.path.basename(p) for p in sink.files] == ["scan-0.csv", "scan-15.csv"]
+    with open(sink.files[0]) as f:
+        assert len(list(csv.reader(f))) == 4
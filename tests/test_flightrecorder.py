@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.flightrecorder` module."""
+
+import asyncio
+import itertools
+
+import pytest
+
+from bleak.backends import flightrecorder
+from bleak.backends.flightrecorder import FlightRecorder
+from bleak.backends.stats import TimedABCMeta
+
+
+def test_ring_buffer():
+    """Test that only the latest events are kept, oldest first."""
+    recorder = FlightRecorder(3, clock=itertools.count().__next__)
+    assert len(recorder) == 0 and recorder.dump() == ""
+    recorder.record(flightrecorder.STATE, "connected")
+    for i in range(3):
+        recorder.record(flightrecorder.CALL, "ReadValue", "/org/bluez/char{0}".format(i))
+    recorder.record(flightrecorder.REPLY, "ReadValue", value=1 << 40)
+    assert len(recorder) == 3
+    assert recorder.records() == [
+        (2.0, "call", "ReadValue", "/org/bluez/char1", 0),
+        (3.0, "call", "ReadValue", "/org/bluez/char2", 0),
+        (4.0, "reply", "ReadValue", None, 0xFFFFFFFF),
+    ]
+    assert recorder.dump().splitlines() == [
+        "-2.000000 call   ReadValue /org/bluez/char1",
+        "-1.000000 call   ReadValue /org/bluez/char2",
+        "+0.000000 reply  ReadValue 4294967295",
+    ]
+    recorder.clear()
+    assert recorder.records() == []
+    with pytest.raises(ValueError):
+        FlightRecorder(0)
+
+
+class _Scanner(metaclass=TimedABCMeta):
+    _timed_operations = ("start",)
+
+    def __init__(self):
+        self._device = "hci0"
+        self._stats = None
+        self.flight_recorder = FlightRecorder(16)
+
+    async def start(self, fail=False):
+        self.flight_recorder.record(flightrecorder.SIGNAL, "InterfacesAdded", "/")
+        if fail:
+            raise RuntimeError("No adapter")
+
+
+def test_timed_operations_and_dump_on_error():
+    """Test that operations are recorded and the history dumped on failure."""
+    scanner = _Scanner()
+    dumps = []
+    scanner.flight_recorder.dump_on_error = dumps.append
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(scanner.start())
+        assert dumps == []
+        with pytest.raises(RuntimeError):
+            loop.run_until_complete(scanner.start(fail=True))
+    finally:
+        loop.close()
+    events = [(kind, name, value) for _, kind, name, _, value in scanner.flight_recorder.records()]
+    assert events == [
+        ("begin", "start", 0),
+        ("signal", "InterfacesAdded", 0),
+        ("end", "start", 0),
+        ("begin", "start", 0),
+        ("signal", "InterfacesAdded", 0),
+        ("end", "start", 1),
+    ]
+    dump, = dumps
+    assert dump == scanner.flight_recorder.dump()
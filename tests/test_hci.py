@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.hci` package."""
+
+import asyncio
+import socket
+import struct
+
+from bleak.backends.hci import parser, replay
+from bleak.backends.hci.parser import AdvertisingReport
+from bleak.backends.hci.scanner import BleakScannerHCI
+
+# Flags, complete list of 16-bit UUIDs (0x180F), Apple manufacturer data
+_ADV = bytes.fromhex("020106" "03030f18" "07ff4c0002150102")
+# Complete local name "Tag"
+_SCAN_RSP = bytes.fromhex("0409546167")
+
+
+def test_parse_event():
+    """Test parsing of an LE Advertising Report event."""
+    packet = parser.advertising_report_event(
+        [
+            AdvertisingReport(parser.ADV_IND, "AA:BB:CC:DD:EE:FF", "random", -60, _ADV),
+            AdvertisingReport(parser.SCAN_RSP, "AA:BB:CC:DD:EE:FF", "random", -61, _SCAN_RSP),
+        ]
+    )
+    reports = parser.parse_event(packet)
+    assert [(r.address, r.address_type, r.rssi, r.scan_response) for r in reports] == [
+        ("AA:BB:CC:DD:EE:FF", "random", -60, False),
+        ("AA:BB:CC:DD:EE:FF", "random", -61, True),
+    ]
+    data = parser.parse_advertising_data(reports[0].data)
+    assert data.service_uuids == ["0000180f-0000-1000-8000-00805f9b34fb"]
+    assert data.manufacturer_data == {0x004C: b"\x02\x15\x01\x02"}
+    assert parser.parse_advertising_data(reports[1].data).local_name == "Tag"
+
+
+def test_scanner_socketpair():
+    """Test the scanner on recorded packets fed through a socketpair."""
+    loop = asyncio.new_event_loop()
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    scanner = BleakScannerHCI(loop, sock=ours)
+    seen = []
+    scanner.add_advertisement_listener(lambda d, a: seen.append((d.name, a.rssi)))
+
+    async def scan():
+        await scanner.start()
+        theirs.send(
+            parser.advertising_report_event(
+                [AdvertisingReport(parser.ADV_IND, "AA:BB:CC:DD:EE:FF", "public", -60, _ADV)]
+            )
+        )
+        theirs.send(
+            parser.advertising_report_event(
+                [AdvertisingReport(parser.SCAN_RSP, "AA:BB:CC:DD:EE:FF", "public", -58, _SCAN_RSP)]
+            )
+        )
+        await asyncio.sleep(0.05)
+        await scanner.stop()
+        return await scanner.get_discovered_devices()
+
+    try:
+        devices = loop.run_until_complete(scan())
+    finally:
+        ours.close()
+        theirs.close()
+        loop.close()
+    assert seen == [("Unknown", -60), ("Tag", -58)]
+    assert len(devices) == 1
+    assert devices[0].uuids == ["0000180f-0000-1000-8000-00805f9b34fb"]
+    assert devices[0].rssi == -58
+
+
+def test_scanner_max_age():
+    """Test that devices age out while scanning, without polling for devices."""
+    loop = asyncio.new_event_loop()
+    ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    scanner = BleakScannerHCI(loop, sock=ours, max_age=0.1)
+    lost = []
+    scanner.register_device_lost_callback(lambda d: lost.append(d.address))
+
+    async def scan():
+        await scanner.start()
+        theirs.send(
+            parser.advertising_report_event(
+                [AdvertisingReport(parser.ADV_IND, "AA:BB:CC:DD:EE:FF", "public", -60, _ADV)]
+            )
+        )
+        await asyncio.sleep(0.35)
+        task = scanner._prune_task
+        await scanner.stop()
+        await asyncio.sleep(0)
+        return task
+
+    try:
+        task = loop.run_until_complete(scan())
+    finally:
+        ours.close()
+        theirs.close()
+        loop.close()
+    assert lost == ["AA:BB:CC:DD:EE:FF"]
+    assert task.cancelled() and scanner._prune_task is None
+
+
+def test_replay(tmpdir):
+    """Test replaying btsnoop and pcap files as fast as possible."""
+    packets = [
+        (
+            1600000000.0 + i,
+            parser.advertising_report_event(
+                [AdvertisingReport(parser.ADV_IND, "AA:BB:CC:DD:EE:0%d" % (i % 3), "public", -60, _ADV)]
+            ),
+        )
+        for i in range(10)
+    ]
+    btsnoop = tmpdir.join("scan.btsnoop")
+    with open(str(btsnoop), "wb") as f:
+        replay.write_btsnoop(f, packets)
+    with open(str(btsnoop), "rb") as f:
+        assert list(replay.read_capture(f)) == packets
+
+    pcap = tmpdir.join("scan.pcap")
+    with open(str(pcap), "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 201))
+        for timestamp, packet in packets:
+            f.write(struct.pack("<IIII", int(timestamp), 0, len(packet) + 4, len(packet) + 4))
+            f.write(b"\x00\x00\x00\x01" + packet)
+
+    for path in (btsnoop, pcap):
+        loop = asyncio.new_event_loop()
+        scanner = replay.BleakScannerReplay(loop, path=str(path), speed=None)
+        seen = []
+        scanner.add_advertisement_listener(lambda d, a: seen.append(d.address))
+
+        async def run():
+            await scanner.start()
+            await scanner.wait()
+            return await scanner.get_discovered_devices()
+
+        try:
+            devices = loop.run_until_complete(run())
+        finally:
+            loop.close()
+        assert len(seen) == 10
+        assert len(devices) == 3
+
+
+def test_replay_capture_time(tmpdir):
+    """Test that a fast replay ages devices out on the time of the capture."""
+
+    def packet(timestamp, address):
+        return (
+            1600000000.0 + timestamp,
+            parser.advertising_report_event(
+                [AdvertisingReport(parser.ADV_IND, address, "public", -60, _ADV)]
+            ),
+        )
+
+    path = str(tmpdir.join("scan.btsnoop"))
+    with open(path, "wb") as f:
+        replay.write_btsnoop(
+            f,
+            [
+                packet(0.0, "AA:BB:CC:DD:EE:01"),
+                packet(0.0, "AA:BB:CC:DD:EE:02"),
+                packet(30.0, "AA:BB:CC:DD:EE:02"),
+                packet(80.0, "AA:BB:CC:DD:EE:02"),
+                packet(3600.0, "AA:BB:CC:DD:EE:03"),
+            ],
+        )
+
+    loop = asyncio.new_event_loop()
+    scanner = replay.BleakScannerReplay(loop, path=path, speed=None, max_age=60.0)
+    timestamps = []
+    lost = []
+    scanner.add_advertisement_listener(lambda d, a: timestamps.append(a.timestamp - 1600000000.0))
+    scanner.register_device_lost_callback(lambda d: lost.append(d.address))
+
+    async def run():
+        await scanner.start()
+        task = scanner._prune_task
+        await scanner.wait()
+        devices = await scanner.get_discovered_devices()
+        await scanner.stop()
+        await asyncio.sleep(0)
+        return devices, task
+
+    try:
+        devices, task = loop.run_until_complete(run())
+    finally:
+        loop.close()
+    assert timestamps == [0.0, 0.0, 30.0, 80.0, 3600.0]
+    assert lost == ["AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02"]
+    assert [d.address for d in devices] == ["AA:BB:CC:DD:EE:03"]
+    assert task.cancelled() and scanner._prune_task is None
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.history` module."""
+
+import math
+
+from bleak.backends import history
+from bleak.backends.history import RssiHistory
+
+
+def _filled():
+    h = RssiHistory(size=4, alpha=0.5, capacity=1)
+    for t, rssi in enumerate([-70, -60, -50, -40, -30]):
+        h.add("00:00:00:00:00:01", rssi, float(t))
+    h.add("00:00:00:00:00:02", -80, 0.0)
+    return h
+
+
+def test_history_ring_buffer():
+    """Test that only the latest samples are kept."""
+    h = _filled()
+    assert h.samples("00:00:00:00:00:01") == [
+        (1.0, -60.0),
+        (2.0, -50.0),
+        (3.0, -40.0),
+        (4.0, -30.0),
+    ]
+    h.remove("00:00:00:00:00:02")
+    assert h.samples("00:00:00:00:00:02") == []
+    assert len(h) == 1
+
+
+def test_history_stats(monkeypatch):
+    """Test the statistics with and without NumPy."""
+    for np in {history.np, None}:
+        monkeypatch.setattr(history, "np", np)
+        stats = _filled().stats().as_dict()
+        first = stats["00:00:00:00:00:01"]
+        assert first["count"] == 4
+        assert first["mean"] == -45.0
+        assert first["median"] == -45.0
+        assert first["ewma"] == -39.375
+        assert abs(first["slope"] - 10.0) < 1e-9
+        assert math.isnan(stats["00:00:00:00:00:02"]["slope"])
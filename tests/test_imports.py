@@ -5,6 +5,8 @@
 
 import os
 import platform
+import subprocess
+import sys
 
 import pytest
 
@@ -36,3 +38,19 @@ def test_import():
         from bleak import BleakClient
 
         assert BleakClient.__name__ == "BleakClientCoreBluetooth"
+
+
+@pytest.mark.skipif(
+    condition=sys.version_info < (3, 7),
+    reason="Backends are only loaded lazily on Python 3.7 and later.",
+)
+def test_lazy_backend():
+    """Test that importing bleak does not import a backend."""
+    code = (
+        "import sys, bleak; "
+        "assert not any(m.startswith('bleak.backends') for m in sys.modules)"
+    )
+    # BLEAK_LOGGING makes bleak import its tracing module.
+    env = dict(os.environ)
+    env.pop("BLEAK_LOGGING", None)
+    subprocess.check_call([sys.executable, "-c", code], env=env)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.marshal` module."""
+
+import array
+
+import pytest
+
+from bleak.exc import BleakError
+from bleak.backends.bluezdbus.marshal import (
+    METHOD_CALL,
+    Message,
+    Variant,
+    decode_message,
+    encode_message,
+    marshal,
+    message_length,
+    signature_of,
+    split_signature,
+    unmarshal,
+)
+
+
+def test_split_signature():
+    """Test splitting signatures into complete types."""
+    assert split_signature("oa{sa{sv}}") == ["o", "a{sa{sv}}"]
+    assert split_signature("(yyay)as") == ["(yyay)", "as"]
+    assert split_signature("") == []
+
+
+def test_signature_of():
+    """Test guessing the signatures of variant values."""
+    assert signature_of(True) == "b"
+    assert signature_of(-60) == "i"
+    assert signature_of(b"\x01") == "ay"
+    assert signature_of(["a", "b"]) == "as"
+    assert signature_of({"RSSI": -60, "Transport": "le"}) == "a{sv}"
+    assert signature_of(Variant("n", -60)) == "n"
+    with pytest.raises(BleakError):
+        signature_of(object())
+
+
+def test_round_trip():
+    """Test marshalling and unmarshalling values of all kinds."""
+    values = [
+        "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF",
+        {
+            "org.bluez.Device1": {
+                "Address": "AA:BB:CC:DD:EE:FF",
+                "RSSI": Variant("n", -60),
+                "ManufacturerData": {0x004C: Variant("ay", b"\x02\x15")},
+                "UUIDs": ["0000180d-0000-1000-8000-00805f9b34fb"],
+                "Paired": False,
+            }
+        },
+    ]
+    data = marshal("oa{sa{sv}}", values)
+    decoded, pos = unmarshal("oa{sa{sv}}", bytes(data))
+    assert pos == len(data)
+    path, interfaces = decoded
+    props = interfaces["org.bluez.Device1"]
+    assert path == values[0]
+    assert props["RSSI"] == -60
+    assert props["ManufacturerData"] == {0x004C: b"\x02\x15"}
+    assert props["UUIDs"] == values[1]["org.bluez.Device1"]["UUIDs"]
+    assert props["Paired"] is False
+    assert unmarshal("(yyay)", bytes(marshal("(yyay)", [(0, 0xFF, b"\x4c")])))[0] == [
+        [0, 0xFF, b"\x4c"]
+    ]
+
+
+def test_byte_arrays():
+    """Test that byte arrays are read as bytes and written from any buffer."""
+    for value in (b"\x01\x02", bytearray(b"\x01\x02"), memoryview(b"\x01\x02")):
+        data = marshal("ay", [value])
+        assert bytes(data) == b"\x02\x00\x00\x00\x01\x02"
+        assert unmarshal("ay", bytes(data)) == ([b"\x01\x02"], len(data))
+    data = marshal("ay", [memoryview(array.array("H", [0x0201]))])
+    assert bytes(data) == b"\x02\x00\x00\x00" + array.array("H", [0x0201]).tobytes()
+    value = unmarshal("ay", memoryview(b"\0" + bytes(data))[1:])[0][0]
+    assert type(value) is bytes
+
+
+def test_messages():
+    """Test encoding, framing and decoding messages."""
+    message = Message(
+        METHOD_CALL,
+        "/org/bluez/hci0",
+        "org.bluez.Adapter1",
+        "SetDiscoveryFilter",
+        "a{sv}",
+        [{"Transport": "le"}],
+        destination="org.bluez",
+        serial=7,
+    )
+    data = encode_message(message)
+    assert message_length(data[:16]) == len(data)
+    assert message_length(data[:15]) == 0
+    # Messages are decoded in place from the received data.
+    decoded = decode_message(memoryview(b"\0\0\0" + data + b"\0")[3:-1])
+    assert decoded.serial == 7
+    assert decoded.path == "/org/bluez/hci0"
+    assert decoded.member == "SetDiscoveryFilter"
+    assert decoded.destination == "org.bluez"
+    assert decoded.body == [{"Transport": "le"}]
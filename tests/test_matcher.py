@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.matcher` module."""
+
+import pytest
+
+from bleak.exc import BleakError
+from bleak.backends.matcher import AdvertisementMatcher, AdvertisementRule, BytePattern
+
+IBEACON_UUID = bytes.fromhex("e2c56db5dffb48d2b060d0f5a71096e0")
+
+
+def test_byte_pattern_mask():
+    """Test masked and unmasked byte patterns."""
+    p = BytePattern(b"\x02\x15", offset=0)
+    assert p.matches(b"\x02\x15\x00")
+    assert not p.matches(b"\x02")
+    assert p.matches([0x02, 0x15])
+
+    p = BytePattern(b"\x10\xf0", mask=b"\xff\xf0", offset=1)
+    assert p.key == b"\x10"
+    assert p.matches(b"\x00\x10\xf7")
+    assert not p.matches(b"\x00\x10\x07")
+
+    with pytest.raises(BleakError):
+        BytePattern(b"\x00\x01", mask=b"\xff")
+
+
+def test_matcher_indexes():
+    """Test that rules are found through each of the indexes."""
+    ibeacon = AdvertisementRule(
+        "ibeacon",
+        company_id=0x004C,
+        manufacturer_data=BytePattern(b"\x02\x15" + IBEACON_UUID),
+        rssi_min=-80,
+    )
+    eddystone = AdvertisementRule(
+        "eddystone", service_data_uuid="feaa", service_data=b"\x10"
+    )
+    battery = AdvertisementRule("battery", service_uuids=["180f"])
+    oui = AdvertisementRule("oui", address_prefix="aa:bb:cc")
+    named = AdvertisementRule("named", local_name="Sensor-[0-9]+")
+    matcher = AdvertisementMatcher([ibeacon, eddystone, battery, oui, named])
+
+    assert matcher.match(
+        "00:11:22:33:44:55",
+        rssi=-60,
+        manufacturer_data={0x004C: b"\x02\x15" + IBEACON_UUID + b"\x00\x01\x00\x02\xc5"},
+    ) == [ibeacon]
+    assert not matcher.matches(
+        "00:11:22:33:44:55",
+        rssi=-90,
+        manufacturer_data={0x004C: b"\x02\x15" + IBEACON_UUID},
+    )
+    assert matcher.match(
+        "00:11:22:33:44:55",
+        service_data={"0000feaa-0000-1000-8000-00805f9b34fb": [0x10, 0x00]},
+    ) == [eddystone]
+    assert matcher.match(
+        "AA:BB:CC:33:44:55",
+        local_name="Sensor-12",
+        service_uuids=["0000180f-0000-1000-8000-00805f9b34fb"],
+    ) == [battery, oui, named]
+    assert matcher.match("00:11:22:33:44:55", local_name="Other") == []
+
+
+def test_matcher_many_rules():
+    """Test that rules sharing a company id are told apart by their prefix."""
+    rules = [
+        AdvertisementRule(
+            i, company_id=0x004C, manufacturer_data=b"\x02\x15" + i.to_bytes(16, "big")
+        )
+        for i in range(2000)
+    ]
+    matcher = AdvertisementMatcher(rules)
+    found = matcher.match(
+        "00:11:22:33:44:55",
+        manufacturer_data={0x004C: b"\x02\x15" + (1234).to_bytes(16, "big")},
+    )
+    assert [r.tag for r in found] == [1234]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.metrics` module."""
+
+import pytest
+
+from bleak.backends import metrics
+from bleak.backends.hci import parser
+from bleak.backends.hci.parser import AdvertisingReport
+from bleak.backends.hci.scanner import BleakScannerHCI
+
+
+def test_render():
+    """Test the OpenMetrics text of counters and gauges."""
+    registry = metrics.Registry()
+    counter = registry.register(
+        metrics.Counter("x_bytes", "Bytes.", ("name",), unit="bytes")
+    )
+    gauge = registry.register(metrics.Gauge("y", 'A "gauge".'))
+    counter.inc(("a\\b",), 10)
+    counter.inc(("q\"\n",), 2.5)
+    gauge.set((), 3)
+    gauge.dec()
+    assert metrics.generate_text(registry) == (
+        "# TYPE x_bytes counter\n"
+        "# HELP x_bytes Bytes.\n"
+        "# UNIT x_bytes bytes\n"
+        'x_bytes_total{name="a\\\\b"} 10\n'
+        'x_bytes_total{name="q\\"\\n"} 2.5\n'
+        "# TYPE y gauge\n"
+        '# HELP y A \\"gauge\\".\n'
+        "y 2\n"
+        "# EOF\n"
+    )
+    with pytest.raises(ValueError):
+        registry.register(metrics.Gauge("y", "Again."))
+    registry.clear()
+    assert counter.value("a\\b") == 0
+
+
+def test_gauge_function():
+    """Test that gauges with a function are collected when rendered."""
+    sizes = {("s",): 1}
+    gauge = metrics.Gauge("z", "Sizes.", ("scanner",), function=lambda: sizes)
+    assert gauge.render()[-1] == 'z{scanner="s"} 1'
+    sizes[("s",)] = 5
+    assert gauge.value("s") == 5
+
+
+def test_rate_gauge():
+    """Test the sliding window of the rate gauge."""
+    now = [100.0]
+    rate = metrics.RateGauge("r", "Rate.", ("adapter",), window=4, clock=lambda: now[0])
+    for second in range(100, 104):
+        now[0] = second + 0.5
+        rate.mark(("hci0",), 2)
+    # The current second is left out.
+    assert rate.value("hci0") == 6 / 4
+    now[0] = 104.2
+    assert rate.value("hci0") == 8 / 4
+    now[0] = 106.0
+    assert rate.value("hci0") == 4 / 4
+    now[0] = 200.0
+    assert rate.value("hci0") == 0
+
+
+def test_scanner_metrics():
+    """Test that scanners count advertisements and report their table size."""
+    scanner = BleakScannerHCI(device="hci9")
+    before = metrics.ADVERTISEMENTS.value("hci9")
+    for address in ("AA:BB:CC:DD:EE:01", "AA:BB:CC:DD:EE:02"):
+        scanner.handle_report(
+            AdvertisingReport(parser.ADV_IND, address, "random", -60, b"")
+        )
+    assert metrics.ADVERTISEMENTS.value("hci9") == before + 2
+    assert metrics.SCANNER_DEVICES.value("BleakScannerHCI") >= 2
+    assert 'bleak_advertisements_total{adapter="hci9"}' in metrics.generate_text()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.monitor` module."""
+
+import asyncio
+import shutil
+import subprocess
+
+import pytest
+
+from bleak.exc import BleakError
+from bleak.backends.matcher import AdvertisementRule
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.bus import AsyncioMessageBus, ServiceObject
+from bleak.backends.bluezdbus.marshal import Variant
+from bleak.backends.bluezdbus.monitor import (
+    AdvertisementMonitor,
+    OrPattern,
+    patterns_from_rules,
+)
+from bleak.backends.bluezdbus.scanner import BleakScannerBlueZDBus
+
+ADAPTER = "/org/bluez/hci0"
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+DEVICE = ADAPTER + "/dev_AA_BB_CC_DD_EE_FF"
+
+BUS_CONFIG = """<!DOCTYPE busconfig PUBLIC "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:path={0}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+
+def test_patterns_from_rules():
+    """Test deriving advertisement monitor patterns from rules."""
+    patterns = patterns_from_rules(
+        [
+            AdvertisementRule(company_id=0x004C, manufacturer_data=b"\x02\x15"),
+            AdvertisementRule(company_id=0x004C, manufacturer_data=b"\x02\x15"),
+            AdvertisementRule(service_data_uuid="feaa", service_uuids=["feaa"]),
+        ]
+    )
+    assert patterns == [
+        OrPattern(0, 0xFF, b"\x4c\x00\x02\x15"),
+        OrPattern(0, 0x16, b"\xaa\xfe"),
+    ]
+    with pytest.raises(BleakError):
+        patterns_from_rules([AdvertisementRule(rssi_min=-70)])
+    # A pattern would only match the UUID at the start of its list.
+    with pytest.raises(BleakError):
+        patterns_from_rules([AdvertisementRule(service_uuids=["180d"])])
+
+
+def test_monitor_properties():
+    """Test the properties exported on an advertisement monitor."""
+    monitor = AdvertisementMonitor(
+        "/org/bleak/test/0",
+        [(0, 0xFF, b"\x4c\x00")],
+        print,
+        print,
+        rssi_low_threshold=-90,
+    )
+    props = monitor.get_properties()
+    assert props["Type"] == Variant("s", "or_patterns")
+    assert props["Patterns"] == Variant("a(yyay)", [(0, 0xFF, b"\x4c\x00")])
+    assert props["RSSILowThreshold"] == Variant("n", -90)
+    with pytest.raises(BleakError):
+        OrPattern(0, 0xFF, b"")
+
+
+class _Device(ServiceObject):
+    interface = defs.DEVICE_INTERFACE
+
+    def get_properties(self):
+        return {
+            "Address": Variant("s", ADDRESS),
+            "Name": Variant("s", "Beacon"),
+            "RSSI": Variant("n", -60),
+            "ManufacturerData": Variant("a{qv}", {0x004C: Variant("ay", b"\x02\x15")}),
+        }
+
+
+class _MonitorManager(ServiceObject):
+    interface = defs.ADVERTISEMENT_MONITOR_MANAGER_INTERFACE
+    methods = {
+        "RegisterMonitor": ("o", "", "register"),
+        "UnregisterMonitor": ("o", "", "unregister"),
+    }
+
+    def __init__(self, path, bluetoothd):
+        super(_MonitorManager, self).__init__(path)
+        self.bluetoothd = bluetoothd
+        self.unregistered = []
+
+    def register(self, app):
+        self.bluetoothd.activation = self.bluetoothd.loop.create_task(
+            self.bluetoothd.activate(self.bluetoothd.sender, app)
+        )
+
+    def unregister(self, app):
+        self.unregistered.append(app)
+
+
+class _Bluetoothd(AsyncioMessageBus):
+    """Owns org.bluez and exports an adapter with one device."""
+
+    async def start(self):
+        await self.connect()
+        await self.call(
+            "/org/freedesktop/DBus",
+            "RequestName",
+            "org.freedesktop.DBus",
+            destination="org.freedesktop.DBus",
+            signature="su",
+            body=["org.bluez", 0],
+        )
+        self.manager = _MonitorManager(ADAPTER, self)
+        for obj in (ServiceObject("/"), self.manager, _Device(DEVICE)):
+            self.export(obj)
+
+    async def activate(self, sender, app):
+        objects = await self.call(
+            app, "GetManagedObjects", defs.OBJECT_MANAGER_INTERFACE, destination=sender
+        )
+        (path, interfaces), = objects.items()
+        await self.call(
+            path, "Activate", defs.ADVERTISEMENT_MONITOR_INTERFACE, destination=sender
+        )
+        return sender, path, interfaces[defs.ADVERTISEMENT_MONITOR_INTERFACE]
+
+    async def report(self, member, sender, monitor):
+        await self.call(
+            monitor,
+            member,
+            defs.ADVERTISEMENT_MONITOR_INTERFACE,
+            destination=sender,
+            signature="o",
+            body=[DEVICE],
+        )
+
+    def _handle_call(self, message):
+        self.sender = message.sender
+        super(_Bluetoothd, self)._handle_call(message)
+
+    def _managed_objects(self, root):
+        # Exported objects implement one interface, the adapter two.
+        objects = super(_Bluetoothd, self)._managed_objects(root)
+        objects[ADAPTER][defs.ADAPTER_INTERFACE] = {
+            "Address": Variant("s", "00:11:22:33:44:55")
+        }
+        return objects
+
+
+@pytest.fixture
+def private_bus(tmp_path, monkeypatch):
+    config = tmp_path / "bus.conf"
+    config.write_text(BUS_CONFIG.format(tmp_path / "bus"))
+    daemon = subprocess.Popen(
+        ["dbus-daemon", "--config-file={0}".format(config), "--nofork", "--print-address"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        address = daemon.stdout.readline().decode().strip()
+        monkeypatch.setenv("DBUS_SYSTEM_BUS_ADDRESS", address)
+        monkeypatch.setenv("BLEAK_DBUS_TRANSPORT", "asyncio")
+        yield address
+    finally:
+        daemon.terminate()
+        daemon.wait()
+        daemon.stdout.close()
+
+
+@pytest.mark.skipif(shutil.which("dbus-daemon") is None, reason="needs dbus-daemon")
+def test_passive_scanning(private_bus):
+    """Test a passive scanner against a fake bluetoothd on a private bus."""
+    found, lost = [], []
+
+    async def test(loop):
+        bluetoothd = _Bluetoothd(loop)
+        await bluetoothd.start()
+        scanner = BleakScannerBlueZDBus(
+            loop, scanning_mode="passive", or_patterns=[(0, 0xFF, b"\x4c\x00")]
+        )
+        scanner.add_advertisement_listener(
+            lambda device, data: found.append((device.address, data.manufacturer_data))
+        )
+        scanner.register_device_lost_callback(lambda device: lost.append(device.address))
+        try:
+            await scanner.start()
+            sender, monitor, props = await asyncio.wait_for(bluetoothd.activation, 5)
+            assert props["Patterns"] == [[0, 0xFF, b"\x4c\x00"]]
+            await bluetoothd.report("DeviceFound", sender, monitor)
+            assert found == [(ADDRESS, {0x004C: b"\x02\x15"})]
+            await bluetoothd.report("DeviceLost", sender, monitor)
+            assert lost == [ADDRESS]
+            await scanner.stop()
+            assert len(bluetoothd.manager.unregistered) == 1
+        finally:
+            bluetoothd.disconnect()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.multiscanner` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.exc import BleakError
+from bleak.backends.bluezdbus import defs, multiscanner, session
+from bleak.backends.bluezdbus.multiscanner import BleakMultiAdapterScannerBlueZDBus
+from bleak.backends.bluezdbus.session import get_scan_session
+
+from tests.fakebus import FakeBus
+
+ADDRESS = "AA:BB:CC:DD:EE:FF"
+
+
+def _adapter(name):
+    return {defs.ADAPTER_INTERFACE: {"Address": name}}
+
+
+def _device(adapter):
+    return "/org/bluez/{0}/dev_{1}".format(adapter, ADDRESS.replace(":", "_"))
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = FakeBus(
+        {"/org/bluez/hci0": _adapter("hci0"), "/org/bluez/hci1": _adapter("hci1")}
+    )
+
+    async def connect_system_bus(loop=None):
+        return bus
+
+    monkeypatch.setattr(session, "connect_system_bus", connect_system_bus)
+    return bus
+
+
+def _run(test):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def _advertise(bus, adapter, rssi):
+    bus.emit(
+        _device(adapter),
+        defs.PROPERTIES_INTERFACE,
+        "PropertiesChanged",
+        defs.DEVICE_INTERFACE,
+        {"RSSI": rssi},
+        [],
+    )
+
+
+def test_merge_adapters(bus):
+    """Test that a device seen on two adapters is reported once, at its best RSSI."""
+
+    # The first adapter reports the device while the second one is attaching.
+    def start_discovery(path):
+        if path == "/org/bluez/hci1":
+            bus.emit(
+                "/",
+                defs.OBJECT_MANAGER_INTERFACE,
+                "InterfacesAdded",
+                _device("hci0"),
+                {defs.DEVICE_INTERFACE: {"Address": ADDRESS, "Name": "A", "RSSI": -70}},
+            )
+
+    bus.handlers["StartDiscovery"] = start_discovery
+
+    async def test(loop):
+        scanner = BleakMultiAdapterScannerBlueZDBus(loop, adapters=["hci0", "hci1"])
+        await scanner.start()
+        _advertise(bus, "hci1", -50)
+        _advertise(bus, "hci0", -60)
+        devices = await scanner.get_discovered_devices()
+        sightings = scanner.get_sightings(ADDRESS)
+        await scanner.stop()
+        return devices, sightings
+
+    devices, sightings = _run(test)
+    device, = devices
+    assert (device.address, device.name, device.rssi) == (ADDRESS, "A", -50)
+    assert {a: (s.path, s.rssi) for a, s in sightings.items()} == {
+        "hci0": (_device("hci0"), -60),
+        "hci1": (_device("hci1"), -50),
+    }
+    assert bus.members("StartDiscovery", "StopDiscovery") == [
+        "StartDiscovery",
+        "StartDiscovery",
+        "StopDiscovery",
+        "StopDiscovery",
+    ]
+
+
+def test_partial_failure(bus):
+    """Test that starting fails as a whole if one adapter fails to attach."""
+    del bus.objects["/org/bluez/hci1"]
+
+    async def test(loop):
+        scanner = BleakMultiAdapterScannerBlueZDBus(loop, adapters=["hci0", "hci1"])
+        with pytest.raises(BleakError, match="adapter not found"):
+            await scanner.start()
+        assert scanner._sessions == {}
+        assert len(get_scan_session(loop, "hci0")) == 0
+        assert get_scan_session(loop, "hci0").bus is None
+
+    _run(test)
+    assert bus.members("StartDiscovery", "StopDiscovery") == [
+        "StartDiscovery",
+        "StopDiscovery",
+    ]
+
+
+def test_options(bus):
+    """Test that passive scanning is rejected and device pruning runs per adapter."""
+    with pytest.raises(BleakError):
+        BleakMultiAdapterScannerBlueZDBus(
+            asyncio.new_event_loop(), scanning_mode="passive"
+        )
+
+    async def test(loop):
+        scanner = BleakMultiAdapterScannerBlueZDBus(
+            loop, adapters=["hci0", "hci1"], prune_ttl=60.0
+        )
+        await scanner.start()
+        assert [len(get_scan_session(loop, a)) for a in ("hci0", "hci1")] == [2, 2]
+        await scanner.stop()
+        assert [len(get_scan_session(loop, a)) for a in ("hci0", "hci1")] == [0, 0]
+
+    _run(test)
+
+
+def test_stale_sighting(bus, monkeypatch):
+    """Test that an adapter which stopped hearing a device no longer gives its RSSI."""
+    now = [0.0]
+    monkeypatch.setattr(multiscanner.time, "monotonic", lambda: now[0])
+
+    async def test(loop):
+        scanner = BleakMultiAdapterScannerBlueZDBus(
+            loop, adapters=["hci0", "hci1"], sighting_max_age=10.0
+        )
+        await scanner.start()
+        _advertise(bus, "hci0", -40)
+        now[0] = 5.0
+        _advertise(bus, "hci1", -70)
+        device, = await scanner.get_discovered_devices()
+        assert (device.rssi, device.details["path"]) == (-40, _device("hci0"))
+        now[0] = 20.0
+        _advertise(bus, "hci1", -72)
+        device, = await scanner.get_discovered_devices()
+        await scanner.stop()
+        return device, scanner.get_sightings(ADDRESS)
+
+    device, sightings = _run(test)
+    assert (device.rssi, device.details["path"]) == (-72, _device("hci1"))
+    assert list(device.details["sightings"]) == ["hci1"]
+    assert list(sightings) == ["hci1"]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.presence` module."""
+
+from bleak.backends.device import AdvertisementData, BLEDevice
+from bleak.backends.presence import PresenceEngine, PresenceEventType, TimerWheel
+
+
+def test_timer_wheel():
+    """Test that keys expire once their deadline has passed."""
+    wheel = TimerWheel(resolution=1.0, slots=4)
+    wheel.schedule("a", 2.5)
+    wheel.schedule("b", 9.0)
+    wheel.schedule("c", 3.0)
+    wheel.cancel("c")
+    assert wheel.advance(2.0) == []
+    assert wheel.advance(3.0) == ["a"]
+    assert wheel.advance(8.5) == []
+    assert wheel.advance(20.0) == ["b"]
+    assert len(wheel) == 0
+
+
+def test_presence_events():
+    """Test enter, update and exit with hysteresis and timeouts."""
+    engine = PresenceEngine(enter_rssi=-70, exit_rssi=-80, timeout=5.0, clock=lambda: 0.0)
+    events = []
+    engine.add_listener(lambda event, device: events.append((event, device.address)))
+
+    def advertise(address, rssi, t):
+        engine.update(BLEDevice(address, None, rssi=rssi), AdvertisementData(rssi=rssi, timestamp=t))
+
+    advertise("A", -75, 0.0)
+    advertise("A", -65, 1.0)
+    advertise("A", -78, 2.0)
+    advertise("B", -60, 2.0)
+    advertise("A", -85, 3.0)
+    engine.tick(6.0)
+    engine.tick(8.0)
+    assert events == [
+        (PresenceEventType.ENTER, "A"),
+        (PresenceEventType.UPDATE, "A"),
+        (PresenceEventType.ENTER, "B"),
+        (PresenceEventType.EXIT, "A"),
+        (PresenceEventType.EXIT, "B"),
+    ]
+    assert len(engine) == 0
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.pruner` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.backends.bluezdbus import defs, session
+from bleak.backends.bluezdbus.pruner import DevicePruner
+
+from tests.fakebus import FakeBus
+
+ADAPTER = "/org/bluez/hci0"
+
+
+def _path(name):
+    return ADAPTER + "/dev_" + name
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = FakeBus(
+        {
+            ADAPTER: {defs.ADAPTER_INTERFACE: {"Address": "00:11:22:33:44:55"}},
+            _path("STALE"): {defs.DEVICE_INTERFACE: {"Paired": False}},
+            _path("PAIRED"): {defs.DEVICE_INTERFACE: {"Paired": True}},
+            _path("TRUSTED"): {defs.DEVICE_INTERFACE: {"Trusted": True}},
+            _path("CONNECTED"): {defs.DEVICE_INTERFACE: {"Connected": True}},
+            _path("FRESH"): {defs.DEVICE_INTERFACE: {}},
+            "/org/bluez/hci1/dev_OTHER": {defs.DEVICE_INTERFACE: {}},
+        }
+    )
+
+    async def connect_system_bus(loop=None):
+        return bus
+
+    monkeypatch.setattr(session, "connect_system_bus", connect_system_bus)
+    return bus
+
+
+def _changed(bus, name, props):
+    bus.emit(
+        _path(name),
+        defs.PROPERTIES_INTERFACE,
+        "PropertiesChanged",
+        defs.DEVICE_INTERFACE,
+        props,
+        [],
+    )
+
+
+def test_prune(bus):
+    """Test that stale devices are removed, unless paired, trusted or connected."""
+    now = [0.0]
+
+    async def test(loop):
+        pruner = DevicePruner(loop, ttl=60.0, interval=3600.0, clock=lambda: now[0])
+        await pruner.start()
+        assert len(pruner) == 5
+
+        now[0] = 50.0
+        _changed(bus, "FRESH", {"RSSI": -60})
+        now[0] = 70.0
+        assert await pruner.prune() == [_path("STALE")]
+
+        now[0] = 80.0
+        _changed(bus, "CONNECTED", {"Connected": False})
+        now[0] = 200.0
+        s = session.get_scan_session(loop)
+        await s.pause()
+        assert await pruner.prune() == []
+        await s.resume()
+        assert await pruner.prune() == [_path("FRESH"), _path("CONNECTED")]
+        assert pruner.removed == 3 and len(pruner) == 2
+
+        await pruner.stop()
+        assert s.bus is None
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+    assert [c[2] for c in bus.calls if c[1] == "RemoveDevice"] == [
+        _path("STALE"),
+        _path("FRESH"),
+        _path("CONNECTED"),
+    ]
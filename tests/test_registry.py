@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.registry` module."""
+
+from bleak.backends.device import BLEDevice
+from bleak.backends.registry import DeviceRegistry
+
+
+class _Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _device(address, name=None, rssi=None, **kwargs):
+    return BLEDevice(address, name, rssi=rssi, **kwargs)
+
+
+def test_registry_query():
+    """Test queries on the secondary indexes."""
+    clock = _Clock()
+    registry = DeviceRegistry(clock=clock)
+    registry.update(_device("00:00:00:00:00:01", "Tag 1", -60, manufacturer_data={0x004C: b""}))
+    clock.now = 1.0
+    registry.update(
+        _device("00:00:00:00:00:02", "Tag 2", -80, uuids=["0000180f-0000-1000-8000-00805f9b34fb"])
+    )
+    clock.now = 2.0
+    registry.update(_device("00:00:00:00:00:03", "Sensor", -50, manufacturer_data={0x004C: b""}))
+    registry.update(_device("00:00:00:00:00:02", "Tag 2", -65))
+
+    def addresses(**kwargs):
+        return sorted(d.address[-2:] for d in registry.query(**kwargs))
+
+    assert addresses(company_id=0x004C) == ["01", "03"]
+    assert addresses(company_id=0x004C, rssi_min=-55) == ["03"]
+    assert addresses(service_uuid="180f") == []
+    assert addresses(name_prefix="Tag") == ["01", "02"]
+    assert addresses(rssi_min=-70, rssi_max=-60) == ["01", "02"]
+    assert addresses(seen_since=1.5) == ["02", "03"]
+    assert addresses(address="00:00:00:00:00:02") == ["02"]
+    assert registry.remove("00:00:00:00:00:01").name == "Tag 1"
+    assert addresses(name_prefix="Tag") == ["02"]
+    assert len(registry) == 2
+
+
+def test_registry_subscribe():
+    """Test that subscribers are notified when a device starts matching."""
+    registry = DeviceRegistry()
+    seen = []
+    token = registry.subscribe(seen.append, company_id=0x004C, rssi_min=-70)
+    registry.update(_device("00:00:00:00:00:01", rssi=-80, manufacturer_data={0x004C: b""}))
+    registry.update(_device("00:00:00:00:00:01", rssi=-60, manufacturer_data={0x004C: b""}))
+    registry.update(_device("00:00:00:00:00:01", rssi=-65, manufacturer_data={0x004C: b""}))
+    registry.update(_device("00:00:00:00:00:02", rssi=-60))
+    assert [d.rssi for d in seen] == [-60]
+    registry.unsubscribe(token)
+    registry.update(_device("00:00:00:00:00:03", rssi=-60, manufacturer_data={0x004C: b""}))
+    assert len(seen) == 1
+
+
+def test_registry_max_age():
+    """Test that stale devices are removed without calling prune."""
+    clock = _Clock()
+    registry = DeviceRegistry(max_age=10.0, clock=clock)
+    seen = []
+    registry.subscribe(seen.append, company_id=0x004C)
+    registry.update(_device("00:00:00:00:00:01", "Tag 1", manufacturer_data={0x004C: b""}))
+    clock.now = 5.0
+    registry.update(_device("00:00:00:00:00:02", "Tag 2", manufacturer_data={0x004C: b""}))
+    clock.now = 12.0
+    assert [d.address for d in registry.query(name_prefix="Tag")] == ["00:00:00:00:00:02"]
+    assert len(registry) == 1
+    registry.update(_device("00:00:00:00:00:01", "Tag 1", manufacturer_data={0x004C: b""}))
+    assert [d.address[-2:] for d in seen] == ["01", "02", "01"]
+    assert registry.prune() == []
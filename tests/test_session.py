@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.session` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.exc import BleakDBusError, BleakError
+from bleak.backends.bluezdbus import client, defs, session
+from bleak.backends.bluezdbus.client import BleakClientBlueZDBus
+from bleak.backends.bluezdbus.session import (
+    ScanSession,
+    get_scan_session,
+    merge_discovery_filters,
+)
+
+from tests.fakebus import FakeBus
+
+ADAPTER = "/org/bluez/hci0"
+DEVICE = ADAPTER + "/dev_AA_BB_CC_DD_EE_FF"
+
+
+@pytest.fixture
+def bus(monkeypatch):
+    bus = FakeBus({ADAPTER: {defs.ADAPTER_INTERFACE: {"Address": "00:11:22:33:44:55"}}})
+
+    async def connect_system_bus(loop=None):
+        return bus
+
+    monkeypatch.setattr(session, "connect_system_bus", connect_system_bus)
+    return bus
+
+
+def _run(test):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(test(loop))
+    finally:
+        loop.close()
+
+
+def _discovery(bus):
+    return bus.members("StartDiscovery", "StopDiscovery")
+
+
+def test_merge_discovery_filters():
+    """Test that merged filters let through what any consumer asked for."""
+    assert merge_discovery_filters([]) == {"Transport": "le"}
+    assert merge_discovery_filters(
+        [
+            {"UUIDs": ["b", "a"], "RSSI": -60, "DuplicateData": False, "Pattern": "x"},
+            {"UUIDs": ["c"], "RSSI": -80, "DuplicateData": False, "Pattern": "x"},
+        ]
+    ) == {
+        "Transport": "le",
+        "UUIDs": ["a", "b", "c"],
+        "RSSI": -80,
+        "DuplicateData": False,
+        "Pattern": "x",
+    }
+    assert merge_discovery_filters(
+        [
+            {"UUIDs": ["a"], "Pathloss": 10, "DuplicateData": True, "Pattern": "x"},
+            {"Pathloss": 20, "Pattern": "y"},
+        ]
+    ) == {"Transport": "le", "Pathloss": 20, "DuplicateData": True}
+
+
+def test_attach_detach(bus):
+    """Test that discovery runs from the first attach to the last detach."""
+
+    async def test(loop):
+        s = ScanSession(loop)
+        await s.attach("a", print, {"RSSI": -60})
+        await s.attach("b", print, {"RSSI": -80})
+        await s.attach("passive", print, discovery=False)
+        assert len(s) == 3 and s.is_discovering
+        await s.detach("b")
+        await s.detach("a")
+        assert len(s) == 1 and not s.is_discovering and s.bus is bus
+        await s.detach("passive")
+        await s.detach("passive")
+        assert len(s) == 0 and s.bus is None
+
+    _run(test)
+    assert not bus.connected
+    assert bus.members(
+        "SetDiscoveryFilter", "StartDiscovery", "StopDiscovery", "GetManagedObjects"
+    ) == [
+        "GetManagedObjects",
+        "SetDiscoveryFilter",
+        "StartDiscovery",
+        "GetManagedObjects",
+        "SetDiscoveryFilter",
+        "GetManagedObjects",
+        "SetDiscoveryFilter",
+        "StopDiscovery",
+    ]
+    filters = [c[2]["RSSI"] for c in bus.calls if c[1] == "SetDiscoveryFilter"]
+    assert filters == [-60, -80, -60]
+
+
+def test_get_scan_session():
+    """Test that sessions are shared per loop and adapter, and dropped with their loop."""
+    loop = asyncio.new_event_loop()
+    s = get_scan_session(loop)
+    assert get_scan_session(loop, "hci0") is s
+    assert get_scan_session(loop, "hci1") is not s
+    loop.close()
+    other = asyncio.new_event_loop()
+    try:
+        get_scan_session(other)
+        assert [k for k in session._sessions if k[0] is loop] == []
+    finally:
+        other.close()
+
+
+def test_nested_pause_resume(bus):
+    """Test that discovery resumes when the last of nested pauses ends."""
+
+    async def test(loop):
+        s = ScanSession(loop)
+        await s.attach("scanner", print)
+        await s.pause()
+        await s.pause()
+        assert s.is_paused and not s.is_discovering
+        await s.resume()
+        assert s.is_paused and not s.is_discovering
+        await s.resume()
+        assert not s.is_paused and s.is_discovering
+        with pytest.raises(BleakError):
+            await s.resume()
+
+    _run(test)
+    assert _discovery(bus) == ["StartDiscovery", "StopDiscovery", "StartDiscovery"]
+
+
+def test_attach_while_paused(bus):
+    """Test that only device lookups start discovery on a paused session."""
+
+    async def test(loop):
+        s = ScanSession(loop)
+        await s.pause()
+        await s.attach("scanner", print)
+        assert not s.is_discovering
+        await s.attach("lookup", print, lookup=True)
+        assert s.is_discovering
+        await s.detach("lookup")
+        assert not s.is_discovering
+        await s.resume()
+        assert s.is_discovering
+        await s.detach("scanner")
+        assert s.bus is None
+
+    _run(test)
+    assert _discovery(bus) == [
+        "StartDiscovery",
+        "StopDiscovery",
+        "StartDiscovery",
+        "StopDiscovery",
+    ]
+
+
+def _client(loop):
+    client = BleakClientBlueZDBus("AA:BB:CC:DD:EE:FF", loop)
+    client._bus = FakeBus()
+    client._device_path = DEVICE
+
+    def get_all(path, interface):
+        raise BleakDBusError("org.freedesktop.DBus.Error.UnknownObject")
+
+    client._bus.handlers["GetAll"] = get_all
+    return client
+
+
+def test_find_device_while_paused(bus):
+    """Test that a connection attempt discovers its device during another's pause."""
+
+    async def test(loop):
+        s = get_scan_session(loop)
+        await s.pause()
+        find = loop.create_task(_client(loop)._find_device(1.0))
+        await asyncio.sleep(0.01)
+        assert s.is_discovering
+        bus.emit(
+            "/",
+            defs.OBJECT_MANAGER_INTERFACE,
+            "InterfacesAdded",
+            DEVICE,
+            {defs.DEVICE_INTERFACE: {}},
+        )
+        await find
+        assert not s.is_discovering
+
+        with pytest.raises(BleakError, match="AA:BB:CC:DD:EE:FF was not found"):
+            await _client(loop)._find_device(0.01)
+        await s.resume()
+
+    _run(test)
+    assert _discovery(bus) == [
+        "StartDiscovery",
+        "StopDiscovery",
+        "StartDiscovery",
+        "StopDiscovery",
+    ]
+
+
+def test_connect_not_found(bus, monkeypatch):
+    """Test that a failed connection attempt closes its bus."""
+    opened = []
+
+    async def connect_system_bus(loop=None):
+        opened.append(FakeBus())
+
+        def get_all(path, interface):
+            raise BleakDBusError("org.freedesktop.DBus.Error.UnknownObject")
+
+        opened[-1].handlers["GetAll"] = get_all
+        return opened[-1]
+
+    monkeypatch.setattr(client, "connect_system_bus", connect_system_bus)
+
+    async def test(loop):
+        c = BleakClientBlueZDBus("AA:BB:CC:DD:EE:FF", loop)
+        with pytest.raises(BleakError, match="was not found"):
+            await c.connect(timeout=0.01)
+        return c
+
+    c = _run(test)
+    assert c._bus is None
+    assert [b.connected for b in opened] == [False]
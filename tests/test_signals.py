@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.signals` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.backends.bluezdbus import defs
+from bleak.backends.bluezdbus.bus import _rule_matches, match_rule
+from bleak.backends.bluezdbus.marshal import SIGNAL, Message
+from bleak.backends.bluezdbus.signals import (
+    adapter_match_rules,
+    device_match_rules,
+    listen_properties_changed,
+)
+
+from tests.fakebus import FakeBus
+
+
+def _signal(path, interface, member, *body):
+    return Message(SIGNAL, path, interface, member, body=body)
+
+
+def _matched(rules, message):
+    return any(_rule_matches(rule, message) for rule in rules)
+
+
+def test_adapter_match_rules():
+    """Test that adapter rules only match the device objects of the adapter."""
+    rules = adapter_match_rules("/org/bluez/hci0")
+    added = defs.OBJECT_MANAGER_INTERFACE, "InterfacesAdded"
+    changed = defs.PROPERTIES_INTERFACE, "PropertiesChanged"
+    assert _matched(rules, _signal("/", *added, "/org/bluez/hci0/dev_AA", {}))
+    assert not _matched(rules, _signal("/", *added, "/org/bluez/hci1/dev_AA", {}))
+    assert not _matched(rules, _signal("/", *added, "/org/bluez/hci01/dev_AA", {}))
+    device = "/org/bluez/hci0/dev_AA"
+    assert _matched(rules, _signal(device, *changed, defs.DEVICE_INTERFACE, {}, []))
+    assert not _matched(
+        rules, _signal(device, *changed, defs.BATTERY_INTERFACE, {}, [])
+    )
+    assert not _matched(
+        rules, _signal("/org/bluez/hci1/dev_AA", *changed, defs.DEVICE_INTERFACE, {}, [])
+    )
+    assert match_rule(**rules[0]) == (
+        "type='signal',arg0path='/org/bluez/hci0/',"
+        "interface='org.freedesktop.DBus.ObjectManager',member='InterfacesAdded',"
+        "path='/',sender='org.bluez'"
+    )
+
+
+def test_device_match_rules():
+    """Test that device rules match the device and its characteristics."""
+    device = "/org/bluez/hci0/dev_AA"
+    char = device + "/service000c/char000d"
+    changed = defs.PROPERTIES_INTERFACE, "PropertiesChanged"
+    rules = device_match_rules(device)
+    assert _matched(rules, _signal(device, *changed, defs.DEVICE_INTERFACE, {}, []))
+    assert _matched(
+        rules, _signal(char, *changed, defs.GATT_CHARACTERISTIC_INTERFACE, {}, [])
+    )
+    assert not _matched(
+        rules, _signal(device + "B", *changed, defs.DEVICE_INTERFACE, {}, [])
+    )
+    assert not _matched(
+        device_match_rules(device, characteristics=False),
+        _signal(char, *changed, defs.GATT_CHARACTERISTIC_INTERFACE, {}, []),
+    )
+
+
+def test_listen_properties_changed():
+    """Test that the legacy listener is deprecated and scoped to BlueZ."""
+    bus = FakeBus()
+    with pytest.warns(DeprecationWarning):
+        listener = listen_properties_changed(bus, None, print)
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(listener)
+    finally:
+        loop.close()
+    (_, rule), = bus._matches.values()
+    assert rule["sender"] == defs.BLUEZ_SERVICE
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.stats` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.backends.stats import LatencyHistogram, LatencyStats, TimedABCMeta
+
+
+def test_histogram_percentiles():
+    """Test that percentiles are within the precision of the histogram."""
+    histogram = LatencyHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000.0)
+    assert len(histogram) == 1000
+    assert histogram.min == 1000 and histogram.max == 1000000
+    for q, expected in ((50, 0.5), (90, 0.9), (99, 0.99), (99.9, 0.999)):
+        assert expected <= histogram.percentile(q) <= expected * 1.016
+    assert histogram.percentile(100) == 1.0
+    assert histogram.mean == pytest.approx(0.5005)
+
+
+def test_histogram_bounds():
+    """Test that out of range latencies are clamped."""
+    histogram = LatencyHistogram()
+    histogram.record(-1.0)
+    histogram.record(1e9, error=True)
+    assert histogram.min == 0
+    assert histogram.max == (1 << 32) - 1
+    assert histogram.errors == 1
+    assert LatencyHistogram().percentile(50) == 0.0
+    with pytest.raises(ValueError):
+        LatencyHistogram(significant_bits=1)
+
+
+def test_histogram_merge_and_reset():
+    """Test merging and resetting histograms."""
+    a, b = LatencyHistogram(), LatencyHistogram()
+    a.record(0.002)
+    b.record(0.001)
+    b.record(0.003, error=True)
+    a.merge(b)
+    assert a.as_dict()["count"] == 3 and a.errors == 1
+    assert a.min == 1000 and a.max == 3000
+    with pytest.raises(ValueError):
+        a.merge(LatencyHistogram(significant_bits=5))
+    a.reset()
+    assert a.count == 0 and not any(a.counts)
+
+
+def test_stats_per_device():
+    """Test that stats keep a histogram per operation and device."""
+    stats = LatencyStats()
+    stats.record("connect", "AA", 0.1)
+    stats.record("connect", "BB", 0.2, error=True)
+    stats.record("read_gatt_char", "AA", 0.01)
+    assert stats.operations() == ["connect", "read_gatt_char"]
+    assert stats.histogram("connect").count == 2
+    assert stats.histogram("connect", "BB").errors == 1
+    assert stats.histogram("connect", "CC").count == 0
+    assert set(stats.as_dict()["connect"]) == {"AA", "BB"}
+    stats.reset()
+    assert len(stats) == 0
+
+
+class _Base(metaclass=TimedABCMeta):
+    _timed_operations = ("work",)
+
+    def __init__(self, stats=True):
+        self.address = "AA"
+        self._stats = LatencyStats() if stats else None
+
+    async def work(self, fail=False):
+        if fail:
+            raise RuntimeError()
+        return 42
+
+
+class _Derived(_Base):
+    async def work(self, fail=False):
+        return await super(_Derived, self).work(fail) + 1
+
+
+def test_timed_operations():
+    """Test that implementations of timed operations are recorded."""
+    loop = asyncio.new_event_loop()
+    try:
+        obj = _Derived()
+        assert loop.run_until_complete(obj.work()) == 43
+        with pytest.raises(RuntimeError):
+            loop.run_until_complete(obj.work(fail=True))
+        # Calls up to the base implementation are not recorded twice.
+        histogram = obj._stats.histogram("work", "AA")
+        assert histogram.count == 2 and histogram.errors == 1
+        assert loop.run_until_complete(_Derived(stats=False).work()) == 43
+    finally:
+        loop.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.timeline` module."""
+
+import asyncio
+import io
+import json
+
+from bleak.backends.stats import TimedABCMeta
+from bleak.backends.timeline import TimelineRecorder
+from bleak.backends.trace import TRACER, Tracer
+
+
+def _span(category, operation, start, end, owner=1, error=False):
+    return {
+        "category": category,
+        "operation": operation,
+        "owner": owner,
+        "start": start,
+        "end": end,
+        "error": error,
+    }
+
+
+def test_spans_and_scan_sessions():
+    """Test that spans become complete events on one track per source."""
+    tracer = Tracer()
+    recorder = TimelineRecorder(tracer)
+    with recorder:
+        t = recorder._origin
+        tracer.emit("span", "hci0", _span("scanner", "start", t, t + 0.001))
+        tracer.emit("span", "AA", _span("dbus", "ReadValue", t + 0.002, t + 0.003))
+        tracer.emit("span", "AA", _span("client", "read_gatt_char", t + 0.002, t + 0.004))
+        tracer.emit("gatt.notify", "AA", {"uuid": "x", "value": b"\x01\x02"})
+        tracer.emit("span", "hci0", _span("scanner", "stop", t + 0.005, t + 0.006))
+    assert not tracer.enabled
+    tracer.emit("span", "AA", _span("client", "connect", t, t))
+
+    events = recorder.to_dict()["traceEvents"]
+    tracks = {e["args"]["name"]: e["tid"] for e in events if e["ph"] == "M"}
+    assert tracks == {"hci0": 1, "AA": 2}
+    complete = [(e["tid"], e["name"], e["ts"], e["dur"]) for e in events if e["ph"] == "X"]
+    assert complete == [
+        (1, "start", 0.0, 1000.0),
+        (2, "ReadValue", 2000.0, 1000.0),
+        (2, "read_gatt_char", 2000.0, 2000.0),
+        (1, "stop", 5000.0, 1000.0),
+        (1, "scan", 1000.0, 4000.0),
+    ]
+    notify, = [e for e in events if e["ph"] == "i"]
+    assert notify["tid"] == 2 and notify["args"] == {"uuid": "x", "bytes": 2}
+
+    f = io.StringIO()
+    recorder.dump(f)
+    assert json.loads(f.getvalue())["traceEvents"] == events
+
+
+def test_max_events():
+    """Test that recording stops at max_events."""
+    tracer = Tracer()
+    recorder = TimelineRecorder(tracer, max_events=3)
+    recorder.start()
+    for i in range(5):
+        tracer.emit("span", "AA", _span("client", "write_gatt_char", 0.0, 1.0))
+    recorder.stop()
+    assert len(recorder) == 3
+    recorder.clear()
+    assert len(recorder) == 0
+
+
+class _Client(metaclass=TimedABCMeta):
+    _timed_category = "client"
+    _timed_operations = ("connect",)
+
+    def __init__(self):
+        self.address = "AA"
+        self._stats = None
+
+    async def connect(self):
+        await asyncio.sleep(0)
+        return True
+
+
+def test_timed_operations():
+    """Test that timed operations are recorded without latency stats."""
+    loop = asyncio.new_event_loop()
+    try:
+        with TimelineRecorder() as recorder:
+            assert loop.run_until_complete(_Client().connect())
+        assert not TRACER.enabled
+    finally:
+        loop.close()
+    span, = [e for e in recorder.events if e["ph"] == "X"]
+    assert (span["name"], span["cat"]) == ("connect", "client")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.trace` module."""
+
+import logging
+
+from bleak.backends.trace import LoggingSink, Tracer
+
+
+def test_subscribe():
+    """Test that sinks get the events they subscribed to."""
+    tracer = Tracer()
+    assert not tracer.enabled
+    events, gatt = [], []
+    tracer.subscribe(events.append)
+    tracer.subscribe(gatt.append, prefix="gatt.")
+    assert tracer.enabled
+    tracer.emit("gatt.read", "AA", {"value": b"\x01"})
+    tracer.emit("scan.device", "hci0", {})
+    assert [e.name for e in events] == ["gatt.read", "scan.device"]
+    assert gatt == events[:1]
+    tracer.unsubscribe(events.append)
+    tracer.unsubscribe(gatt.append)
+    assert not tracer.enabled
+
+
+def test_lazy_payload():
+    """Test that payloads are built once, and only if read."""
+    tracer = Tracer()
+    calls = []
+
+    def payload():
+        calls.append(1)
+        return {"value": 1}
+
+    events = []
+    tracer.subscribe(events.append)
+    tracer.emit("gatt.write", "AA", payload)
+    assert calls == []
+    assert events[0].payload == {"value": 1}
+    assert events[0].payload == {"value": 1}
+    assert calls == [1]
+
+
+def test_failing_sink(caplog):
+    """Test that a failing sink does not keep events from other sinks."""
+    tracer = Tracer()
+    events = []
+    tracer.subscribe(lambda event: 1 / 0)
+    tracer.subscribe(events.append)
+    with caplog.at_level(logging.ERROR):
+        tracer.emit("gatt.notify", "AA", {})
+    assert len(events) == 1
+    assert "gatt.notify" in caplog.text
+
+
+def test_logging_sink(caplog):
+    """Test that the logging sink formats events only if they are logged."""
+    tracer = Tracer()
+    logger = logging.getLogger("bleak.test.trace")
+    tracer.subscribe(LoggingSink(logger))
+    calls = []
+    with caplog.at_level(logging.INFO, logger="bleak.test.trace"):
+        tracer.emit("gatt.read", "AA", lambda: calls.append(1))
+    assert calls == []
+    with caplog.at_level(logging.DEBUG, logger="bleak.test.trace"):
+        tracer.emit("gatt.read", "AA", lambda: {"value": b"\x02"})
+    assert "gatt.read AA: {'value': b'\\x02'}" in caplog.text
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""Tests for `bleak.backends.bluezdbus.utils` module."""
+
+import asyncio
+
+import pytest
+
+from bleak.exc import BleakError
+from bleak.backends.bluezdbus import utils
+
+
+def test_get_bluez_version(monkeypatch):
+    """Test that a probe left pending on a closed loop does not break other loops."""
+    monkeypatch.setattr(utils, "_bluez_version", None)
+    versions = [None, BleakError("bluetoothctl not found"), (5, 50)]
+
+    async def probe():
+        version = versions.pop(0)
+        if version is None:
+            await asyncio.sleep(3600)
+        if isinstance(version, BleakError):
+            raise version
+        return version
+
+    monkeypatch.setattr(utils, "_probe_bluez_version", probe)
+
+    async def timeout():
+        await asyncio.wait_for(utils.get_bluez_version(), 0.01)
+
+    loop = asyncio.new_event_loop()
+    with pytest.raises(asyncio.TimeoutError):
+        loop.run_until_complete(timeout())
+    loop.close()
+
+    other = asyncio.new_event_loop()
+    try:
+        with pytest.raises(BleakError):
+            other.run_until_complete(utils.get_bluez_version())
+        assert other.run_until_complete(utils.get_bluez_version()) == (5, 50)
+    finally:
+        other.close()
+    assert utils._bluez_version == (5, 50)
+    assert versions == []